@@ -0,0 +1,185 @@
+# Generated from hospitality_agent_staging/agents/Hospitality_Agent/hospitality_agent/router.py by sync_shared_modules.py; edit that file instead.
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from google.genai import types
+
+from .telemetry import get_telemetry
+
+# ================================================================
+# Deterministic intent router (runs before the LLM)
+#
+#   Plugged into an Agent through ADK callbacks:
+#       before_agent_callback -> classify the user message
+#           "direct"      : answered from tool data, the LLM is skipped
+#           "small_model" : simple question, sent to SMALL_MODEL
+#           "full_model"  : everything else, the agent's own model
+#       before_model_callback -> swaps the model for "small_model"
+#       after_agent_callback  -> records the turn latency per route
+#   Turns per route (and direct answers per pattern) are exported as
+#   adk_router_* metrics (telemetry.py), report() has the same here.
+#
+#   A message is only answered directly when exactly one route
+#   pattern matches and it doesn't look like a multi-part question.
+#
+#   The capital agents use this same module: sync_shared_modules.py
+#   (at the repository root) copies it into their packages.
+# ================================================================
+
+# Model used for mid-complexity questions. Off by default: a smaller
+# model answers differently from the agent's own, so turn it on only
+# after checking its replies, e.g. ROUTER_SMALL_MODEL=gemini-2.0-flash-lite
+# ("" sends those questions to the full model).
+SMALL_MODEL = os.getenv("ROUTER_SMALL_MODEL", "")
+
+# Messages longer than this always go to the full model
+SMALL_MODEL_MAX_WORDS = 20
+DIRECT_MAX_WORDS = 15
+
+# Joins two questions in one message ("spa hours and pool timings")
+_MULTI_PART_RE = re.compile(r"\b(and|also|plus)\b|[?].+[?]|;", re.IGNORECASE)
+
+# Once a conversation needs the full model (e.g. a booking), its next short
+# replies ("Suite", "2 rooms") stay on the full model for this many turns.
+STICKY_FULL_MODEL_TURNS = 3
+STICKY_STATE_KEY = "router_full_model_turns"
+
+# In-flight turns kept for latency measurement (bounded, in case a turn dies)
+_MAX_INFLIGHT = 10_000
+
+ROUTES = ("direct", "small_model", "full_model")
+
+
+@dataclass(frozen=True)
+class DirectRoute:
+  """A compiled pattern plus the function that answers it.
+
+  `answer` gets the regex match and the session state (e.g. to pick the
+  conversation's property) and returns the reply text, or None when it
+  can't answer confidently (the message then falls through to the LLM).
+  """
+
+  name: str
+  pattern: re.Pattern
+  answer: Callable[[re.Match, dict], Optional[str]]
+
+
+def _user_text(callback_context) -> str:
+  content = callback_context.user_content
+  if not content or not content.parts:
+    return ""
+  return " ".join(part.text for part in content.parts if part.text).strip()
+
+
+class IntentRouter:
+  """Routes each user message to a direct answer, the small model or the full model."""
+
+  def __init__(self, direct_routes: list, needs_full_model: Callable[[str], bool] = None,
+               small_model: str = SMALL_MODEL):
+    self.direct_routes = direct_routes
+    self.needs_full_model = needs_full_model or (lambda text: False)
+    self.small_model = small_model
+
+    self.telemetry = get_telemetry()
+    self._lock = threading.Lock()
+    self._inflight = OrderedDict()
+    self.stats = {route: {"count": 0, "total_ms": 0.0, "max_ms": 0.0} for route in ROUTES}
+
+  # ----------------------------------------------------------------
+  # Classification
+  # ----------------------------------------------------------------
+  def classify(self, text: str, sticky: bool = False, state=None):
+    """Returns (route, direct_answer_or_None, route_name) for `text`.
+
+    `sticky` means the conversation is in the middle of a full-model flow,
+    so anything not answered directly stays on the full model. `state` is
+    the session state handed to direct answers.
+    """
+    words = len(text.split())
+    needs_full_model = self.needs_full_model(text)
+
+    if not needs_full_model and words <= DIRECT_MAX_WORDS and not _MULTI_PART_RE.search(text):
+      matches = [(route, m) for route in self.direct_routes if (m := route.pattern.search(text))]
+      if len(matches) == 1:
+        route, match = matches[0]
+        answer = route.answer(match, state if state is not None else {})
+        if answer:
+          return "direct", answer, route.name
+
+    if self.small_model and words <= SMALL_MODEL_MAX_WORDS and not needs_full_model and not sticky:
+      return "small_model", None, None
+    return "full_model", None, None
+
+  # ----------------------------------------------------------------
+  # ADK callbacks
+  # ----------------------------------------------------------------
+  def before_agent_callback(self, callback_context) -> Optional[types.Content]:
+    started = time.perf_counter()
+    text = _user_text(callback_context)
+    sticky_turns = callback_context.state.get(STICKY_STATE_KEY, 0)
+    route, answer, route_name = self.classify(text, sticky=sticky_turns > 0, state=callback_context.state)
+
+    # Keep booking-style conversations on the full model for a few turns
+    if self.needs_full_model(text):
+      callback_context.state[STICKY_STATE_KEY] = STICKY_FULL_MODEL_TURNS
+    elif sticky_turns > 0 and route != "direct":
+      callback_context.state[STICKY_STATE_KEY] = sticky_turns - 1
+
+    if route == "direct":
+      print(f"--- Router: answered directly ({route_name}) ---")
+      self.telemetry.inc("adk_router_direct_answers_total", pattern=route_name)
+      self._record(route, time.perf_counter() - started)
+      return types.Content(role="model", parts=[types.Part(text=answer)])
+
+    with self._lock:
+      self._inflight[callback_context.invocation_id] = (route, started)
+      while len(self._inflight) > _MAX_INFLIGHT:
+        self._inflight.popitem(last=False)
+    return None
+
+  def before_model_callback(self, callback_context, llm_request):
+    with self._lock:
+      route, _ = self._inflight.get(callback_context.invocation_id, (None, None))
+    if route == "small_model":
+      # Same client, smaller model: only valid within one model family (Gemini)
+      llm_request.model = self.small_model
+    return None
+
+  def after_agent_callback(self, callback_context):
+    with self._lock:
+      route, started = self._inflight.pop(callback_context.invocation_id, (None, None))
+    if route is not None:
+      self._record(route, time.perf_counter() - started)
+    return None
+
+  # ----------------------------------------------------------------
+  # Reporting
+  # ----------------------------------------------------------------
+  def _record(self, route: str, seconds: float):
+    ms = seconds * 1000
+    with self._lock:
+      stats = self.stats[route]
+      stats["count"] += 1
+      stats["total_ms"] += ms
+      stats["max_ms"] = max(stats["max_ms"], ms)
+    self.telemetry.inc("adk_router_turns_total", route=route)
+    self.telemetry.observe("adk_router_turn_duration_seconds", seconds, route=route)
+
+  def report(self) -> dict:
+    """Per-route share of traffic and mean/max turn latency."""
+    with self._lock:
+      total = sum(stats["count"] for stats in self.stats.values())
+      return {
+          route: {
+              "count": stats["count"],
+              "share_pct": round(100 * stats["count"] / total, 1) if total else 0.0,
+              "mean_ms": round(stats["total_ms"] / stats["count"], 2) if stats["count"] else 0.0,
+              "max_ms": round(stats["max_ms"], 2),
+          }
+          for route, stats in self.stats.items()
+      }
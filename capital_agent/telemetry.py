@@ -0,0 +1,400 @@
+# Generated from hospitality_agent_staging/agents/Hospitality_Agent/hospitality_agent/telemetry.py by sync_shared_modules.py; edit that file instead.
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# ================================================================
+# Instrumentation: timing spans and metrics for agent turns
+#
+#   Plugged into an Agent through ADK callbacks (like the router):
+#       before/after_agent_callback -> agent turn duration
+#       before/after_model_callback -> model duration, first chunk,
+#                                      prompt/completion tokens
+#       before/after_tool_callback  -> tool duration, args/result bytes
+#   Other modules time their own work with timed() / observe() /
+#   inc(), after naming their metrics with describe_metrics().
+#
+#   Every measurement updates in-memory Prometheus metrics (a dict
+#   update under a lock). Export:
+#       TELEMETRY_PROMETHEUS_PORT=9464 -> text format on :9464/metrics
+#       TELEMETRY_SPANS_FILE=spans.jsonl -> OpenTelemetry-style span
+#           records, written in batches by a background thread
+#       TELEMETRY_ENABLED=0 -> callbacks do nothing
+#
+#   The capital agents use this same module: sync_shared_modules.py
+#   (at the repository root) copies it into their packages.
+# ================================================================
+
+TELEMETRY_ENABLED = os.getenv("TELEMETRY_ENABLED", "1") != "0"
+PROMETHEUS_PORT = os.getenv("TELEMETRY_PROMETHEUS_PORT", "")
+SPANS_FILE = os.getenv("TELEMETRY_SPANS_FILE", "")
+
+# Histogram buckets (seconds): 1ms .. 60s
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# How often queued spans are written to SPANS_FILE
+SPAN_FLUSH_SECONDS = 1.0
+# Spans dropped (not blocked on) when the writer falls this far behind
+MAX_QUEUED_SPANS = 50_000
+
+# Open spans whose end callback never fires (e.g. a tool that raised)
+_MAX_OPEN_SPANS = 10_000
+
+# Metrics of the callbacks below plus router.py and tool_executor.py, which
+# every agent uses; anything else is added by the module that emits it
+METRIC_HELP = {
+    "adk_agent_turn_duration_seconds": ("histogram", "Agent turn duration (before -> after agent callback)"),
+    "adk_model_duration_seconds": ("histogram", "LLM call duration"),
+    "adk_model_first_chunk_seconds": ("histogram", "Time to the first streamed chunk of an LLM call"),
+    "adk_model_tokens_total": ("counter", "LLM tokens by kind (prompt / completion)"),
+    "adk_tool_duration_seconds": ("histogram", "Tool call duration"),
+    "adk_tool_payload_bytes_total": ("counter", "JSON size of tool arguments and results"),
+    "adk_tool_queue_wait_seconds": ("histogram", "Time a tool call waited for a free tool thread (tool_executor.py)"),
+    "adk_router_turns_total": ("counter", "Turns by router route: direct (LLM skipped), small_model, full_model (router.py)"),
+    "adk_router_direct_answers_total": ("counter", "Turns answered directly, by route pattern (router.py)"),
+    "adk_router_turn_duration_seconds": ("histogram", "Turn duration by router route (router.py)"),
+}
+
+
+def describe_metrics(metrics: dict):
+  """Adds name -> (kind, help text) entries for the Prometheus output."""
+  METRIC_HELP.update(metrics)
+
+
+def _payload_bytes(value) -> int:
+  if value is None:
+    return 0
+  if isinstance(value, str):
+    return len(value.encode("utf-8"))
+  try:
+    return len(json.dumps(value, default=str, ensure_ascii=False).encode("utf-8"))
+  except (TypeError, ValueError):
+    return 0
+
+
+def _trace_id(invocation_id) -> str:
+  """32-hex trace id derived from the ADK invocation id (one trace per turn)."""
+  return hashlib.md5(str(invocation_id).encode("utf-8")).hexdigest()
+
+
+def _span_id() -> str:
+  return os.urandom(8).hex()
+
+
+def _escape(value) -> str:
+  return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class SpanFileExporter:
+  """Appends finished spans to a JSONL file from a background thread."""
+
+  def __init__(self, path, flush_seconds: float = SPAN_FLUSH_SECONDS):
+    self.path = Path(path)
+    self.flush_seconds = flush_seconds
+    self.dropped = 0
+    self._queue = queue.Queue(maxsize=MAX_QUEUED_SPANS)
+    threading.Thread(target=self._run, name="telemetry-span-writer", daemon=True).start()
+
+  def export(self, span: dict):
+    try:
+      self._queue.put_nowait(span)
+    except queue.Full:
+      self.dropped += 1
+
+  def _run(self):
+    while True:
+      batch = [self._queue.get()]
+      time.sleep(self.flush_seconds)
+      while True:
+        try:
+          batch.append(self._queue.get_nowait())
+        except queue.Empty:
+          break
+      try:
+        with open(self.path, "a", encoding="utf-8") as f:
+          f.write("".join(json.dumps(span, default=str) + "\n" for span in batch))
+      except OSError as e:
+        print(f"Error writing telemetry spans: {e}")
+
+
+class Telemetry:
+  """Process-wide metrics registry plus the ADK callbacks that feed it."""
+
+  def __init__(self, exporter: SpanFileExporter = None, enabled: bool = TELEMETRY_ENABLED):
+    self.exporter = exporter
+    self.enabled = enabled
+
+    self._lock = threading.Lock()
+    # (name, labels) -> [bucket counts..., sum, count]
+    self._histograms = {}
+    # (name, labels) -> value
+    self._counters = {}
+    # key -> (span_id, start perf_counter, start unix ns, extra)
+    self._open = OrderedDict()
+
+  # ----------------------------------------------------------------
+  # Metrics
+  # ----------------------------------------------------------------
+  def observe(self, name: str, seconds: float, **labels):
+    key = (name, tuple(sorted(labels.items())))
+    with self._lock:
+      histogram = self._histograms.get(key)
+      if histogram is None:
+        histogram = self._histograms[key] = [0] * (len(DURATION_BUCKETS) + 2)
+      for i, bound in enumerate(DURATION_BUCKETS):
+        if seconds <= bound:
+          histogram[i] += 1
+          break
+      histogram[-2] += seconds
+      histogram[-1] += 1
+
+  def inc(self, name: str, value: float = 1, **labels):
+    key = (name, tuple(sorted(labels.items())))
+    with self._lock:
+      self._counters[key] = self._counters.get(key, 0) + value
+
+  def snapshot(self) -> dict:
+    """Copies of the raw histograms and counters (for reports and tests)."""
+    with self._lock:
+      return {
+          "histograms": {key: list(value) for key, value in self._histograms.items()},
+          "counters": dict(self._counters),
+      }
+
+  def render_prometheus(self) -> str:
+    """All metrics in the Prometheus text exposition format."""
+    snapshot = self.snapshot()
+    by_name = {}
+    for (name, labels), value in snapshot["histograms"].items():
+      by_name.setdefault(name, []).append((labels, value))
+    for (name, labels), value in snapshot["counters"].items():
+      by_name.setdefault(name, []).append((labels, value))
+
+    lines = []
+    for name in sorted(by_name):
+      kind, help_text = METRIC_HELP.get(name, ("untyped", name))
+      lines.append(f"# HELP {name} {help_text}")
+      lines.append(f"# TYPE {name} {kind}")
+      for labels, value in sorted(by_name[name]):
+        label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+        if kind != "histogram":
+          lines.append(f"{name}{{{label_text}}} {value}")
+          continue
+        prefix = label_text + "," if label_text else ""
+        cumulative = 0
+        for bound, count in zip(DURATION_BUCKETS, value):
+          cumulative += count
+          lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {value[-1]}')
+        lines.append(f"{name}_sum{{{label_text}}} {value[-2]:.6f}")
+        lines.append(f"{name}_count{{{label_text}}} {value[-1]}")
+    return "\n".join(lines) + "\n"
+
+  # ----------------------------------------------------------------
+  # Spans
+  # ----------------------------------------------------------------
+  def _start(self, key, parent_key=None, **extra):
+    with self._lock:
+      parent = self._open.get(parent_key) if parent_key is not None else None
+      self._open[key] = (_span_id(), time.perf_counter(), time.time_ns(),
+                         parent[0] if parent else None, extra)
+      while len(self._open) > _MAX_OPEN_SPANS:
+        self._open.popitem(last=False)
+
+  def _finish(self, key):
+    """Closes the span opened under `key`; returns (seconds, span_info) or None."""
+    with self._lock:
+      span = self._open.pop(key, None)
+    if span is None:
+      return None
+    return time.perf_counter() - span[1], span
+
+  def _export(self, name: str, trace_id: str, span, seconds: float, attributes: dict):
+    if self.exporter is None:
+      return
+    span_id, _, start_ns, parent_id, _ = span
+    self.exporter.export({
+        "name": name,
+        "trace_id": trace_id,
+        "span_id": span_id,
+        "parent_span_id": parent_id,
+        "start_time_unix_nano": start_ns,
+        "end_time_unix_nano": start_ns + int(seconds * 1e9),
+        "attributes": attributes,
+    })
+
+  @contextmanager
+  def timed(self, metric: str, span_name: str, trace=None, **labels):
+    """Times a block into `metric` (and exports it as a span).
+
+    Yields a dict; attributes put into it are added to the span.
+    """
+    attributes = {}
+    if not self.enabled:
+      yield attributes
+      return
+    start_ns = time.time_ns()
+    started = time.perf_counter()
+    try:
+      yield attributes
+    finally:
+      seconds = time.perf_counter() - started
+      self.observe(metric, seconds, **labels)
+      if self.exporter is not None:
+        span = (_span_id(), started, start_ns, None, None)
+        self._export(span_name, _trace_id(trace or span[0]), span, seconds, {**labels, **attributes})
+
+  # ----------------------------------------------------------------
+  # ADK callbacks
+  # ----------------------------------------------------------------
+  def before_agent_callback(self, callback_context):
+    if self.enabled:
+      self._start(("agent", callback_context.invocation_id))
+    return None
+
+  def after_agent_callback(self, callback_context):
+    if not self.enabled:
+      return None
+    finished = self._finish(("agent", callback_context.invocation_id))
+    if finished:
+      seconds, span = finished
+      agent = callback_context.agent_name
+      self.observe("adk_agent_turn_duration_seconds", seconds, agent=agent)
+      self._export("agent_turn", _trace_id(callback_context.invocation_id), span, seconds, {"agent": agent})
+    return None
+
+  def before_model_callback(self, callback_context, llm_request):
+    if self.enabled:
+      invocation_id = callback_context.invocation_id
+      self._start(("model", invocation_id), parent_key=("agent", invocation_id),
+                  model=llm_request.model or "", first_chunk=False)
+    return None
+
+  def after_model_callback(self, callback_context, llm_response):
+    if not self.enabled:
+      return None
+    invocation_id = callback_context.invocation_id
+    key = ("model", invocation_id)
+    agent = callback_context.agent_name
+
+    if llm_response.partial:
+      # Streaming: only the first chunk is timed, the call stays open
+      with self._lock:
+        span = self._open.get(key)
+        first = span is not None and not span[4]["first_chunk"]
+        if first:
+          span[4]["first_chunk"] = True
+      if first:
+        self.observe("adk_model_first_chunk_seconds", time.perf_counter() - span[1],
+                     agent=agent, model=span[4]["model"])
+      return None
+
+    finished = self._finish(key)
+    if finished is None:
+      return None
+    seconds, span = finished
+    model = span[4]["model"]
+    self.observe("adk_model_duration_seconds", seconds, agent=agent, model=model)
+
+    usage = llm_response.usage_metadata
+    prompt_tokens = (usage.prompt_token_count or 0) if usage else 0
+    completion_tokens = (usage.candidates_token_count or 0) if usage else 0
+    if prompt_tokens:
+      self.inc("adk_model_tokens_total", prompt_tokens, agent=agent, model=model, kind="prompt")
+    if completion_tokens:
+      self.inc("adk_model_tokens_total", completion_tokens, agent=agent, model=model, kind="completion")
+
+    self._export("model_call", _trace_id(invocation_id), span, seconds, {
+        "agent": agent,
+        "model": model,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "error": llm_response.error_code,
+    })
+    return None
+
+  def before_tool_callback(self, tool, args, tool_context):
+    if self.enabled:
+      self._start(("tool", tool_context.function_call_id),
+                  parent_key=("agent", tool_context.invocation_id))
+    return None
+
+  def after_tool_callback(self, tool, args, tool_context, tool_response):
+    if not self.enabled:
+      return None
+    finished = self._finish(("tool", tool_context.function_call_id))
+    if finished is None:
+      return None
+    seconds, span = finished
+    agent = tool_context.agent_name
+    status = "error" if isinstance(tool_response, dict) and "error" in tool_response else "ok"
+    args_bytes = _payload_bytes(args)
+    result_bytes = _payload_bytes(tool_response)
+
+    self.observe("adk_tool_duration_seconds", seconds, agent=agent, tool=tool.name, status=status)
+    self.inc("adk_tool_payload_bytes_total", args_bytes, agent=agent, tool=tool.name, direction="args")
+    self.inc("adk_tool_payload_bytes_total", result_bytes, agent=agent, tool=tool.name, direction="result")
+    self._export("tool_call", _trace_id(tool_context.invocation_id), span, seconds, {
+        "agent": agent,
+        "tool": tool.name,
+        "status": status,
+        "args_bytes": args_bytes,
+        "result_bytes": result_bytes,
+    })
+    return None
+
+
+# ================================================================
+# Prometheus endpoint
+# ================================================================
+def start_prometheus_server(telemetry: Telemetry, port: int, host: str = "0.0.0.0"):
+  """Serves telemetry.render_prometheus() on http://host:port/metrics (daemon thread)."""
+
+  class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+      if self.path.split("?")[0] != "/metrics":
+        self.send_error(404)
+        return
+      body = telemetry.render_prometheus().encode("utf-8")
+      self.send_response(200)
+      self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+      self.send_header("Content-Length", str(len(body)))
+      self.end_headers()
+      self.wfile.write(body)
+
+    def log_message(self, format, *args):
+      pass
+
+  server = ThreadingHTTPServer((host, port), MetricsHandler)
+  threading.Thread(target=server.serve_forever, name="telemetry-metrics", daemon=True).start()
+  print(f"--- Telemetry: Prometheus metrics on :{port}/metrics ---")
+  return server
+
+
+# One registry per process, shared by every agent and session
+_telemetry = None
+_telemetry_lock = threading.Lock()
+
+
+def get_telemetry() -> Telemetry:
+  """Returns the process-wide Telemetry, starting the configured exporters."""
+  global _telemetry
+  if _telemetry is None:
+    with _telemetry_lock:
+      if _telemetry is None:
+        telemetry = Telemetry(exporter=SpanFileExporter(SPANS_FILE) if SPANS_FILE else None)
+        if PROMETHEUS_PORT:
+          try:
+            start_prometheus_server(telemetry, int(PROMETHEUS_PORT))
+          except OSError as e:
+            # e.g. a second process on the same port; metrics still collected
+            print(f"Error starting Prometheus endpoint: {e}")
+        _telemetry = telemetry
+  return _telemetry
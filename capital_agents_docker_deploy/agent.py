@@ -1,19 +1,129 @@
 
+import re
+
 from google.adk.agents import Agent
 
+from .countries import get_country_index
+from .router import DirectRoute, IntentRouter
+from .telemetry import get_telemetry
+from .tool_executor import offloaded
+
+
+def lookup_capital(country: str, codes: bool = True):
+  """Returns the CountryMatch for `country` (name, alias, ISO code or typo), or None.
+
+  ISO codes count only when written in capitals or quoted (see countries.py).
+  """
+  return get_country_index().resolve(country, codes=codes)
+
 
 # Define a tool function
 def get_capital_city(country: str) -> str:
   """Retrieves the capital city for a given country."""
-  # Replace with actual logic (e.g., API call, database lookup)
-  capitals = {"france": "Paris", "japan": "Tokyo", "canada": "Ottawa"}
-  return capitals.get(country.lower(), f"Sorry, I don't know the capital of {country}.")
+  match = lookup_capital(country)
+  if match is None:
+    return f"Sorry, I don't know the capital of {country}."
+  if match.exact:
+    return match.country.capital
+  return f"{match.country.capital} (capital of {match.country.name}, the closest match to '{country}')"
+
+
+def get_capital_cities(countries: list[str]) -> dict:
+  """Retrieves the capital cities of several countries in one call.
+
+  Args:
+    countries: Country names, e.g. ["France", "Japan", "Kenya"]
+
+  Returns: {country: capital} in the order given.
+  """
+  return {country: get_capital_city(country) for country in countries}
+
+
+def capital_sentence(country) -> str:
+  """"The capital of the United States is Washington, D.C." for a Country."""
+  # Some capitals end in an abbreviation ("Washington, D.C.")
+  return f"The capital of {country.display_name} is {country.capital.rstrip('.')}."
+
+
+# Pre-LLM routing: "what is the capital of X?" is a dictionary lookup,
+# so known countries are answered without calling the model. Typos and
+# ISO codes are left to the model, which can confirm the guess with the
+# guest ("capital of it?" is not a question about Italy).
+def _answer_capital(match, state):
+  found = lookup_capital(match.group("country"), codes=False)
+  if found is None or not found.exact:
+    return None
+  return capital_sentence(found.country)
+
+
+CAPITAL_ROUTES = [
+  DirectRoute(
+    "capital_of",
+    re.compile(r"^\s*(?:what(?:'s| is)\s+)?(?:the\s+)?capital(?:\s+city)?\s+of\s+(?P<country>[^?.!]+?)\s*[?.!]*\s*$", re.IGNORECASE),
+    _answer_capital,
+  ),
+  DirectRoute(
+    "country_capital",
+    re.compile(r"^\s*(?P<country>[^?.!]+?)(?:'s)?\s+capital(?:\s+city)?\s*[?.!]*\s*$", re.IGNORECASE),
+    _answer_capital,
+  ),
+]
+
+capital_router = IntentRouter(direct_routes=CAPITAL_ROUTES)
+
+# Messages and the direct route that must answer them (None: left to the
+# model). Checked at image build time, see check_router().
+ROUTER_CHECKS = (
+  ("What is the capital of France?", "capital_of"),
+  ("capital of Côte d'Ivoire", "capital_of"),
+  ("Japan's capital", "country_capital"),
+  ("What is the capital of Frnace?", None),
+  ("what's the capital of it?", None),
+  ("What is the capital of IT?", None),
+  ("capital of us", None),
+  ("capital of in", None),
+  ("so what's the capital", None),
+  ("my capital", None),
+  *((f"what's the capital of {word}?", None) for word in (
+    "it", "in", "is", "me", "no", "us", "be", "do", "to", "so", "my", "by", "at", "as", "am")),
+)
+
+
+# Messages and the exact direct answer they must get
+ANSWER_CHECKS = (
+  ("What is the capital of France?", "The capital of France is Paris."),
+  ("What is the capital of the United States?", "The capital of the United States is Washington, D.C."),
+  ("capital of United Kingdom", "The capital of the United Kingdom is London."),
+  ("Netherlands' capital", "The capital of the Netherlands is Amsterdam."),
+)
+
+
+def check_router():
+  """Raises AssertionError if a ROUTER_CHECKS message is routed differently
+  or an ANSWER_CHECKS message gets a different answer."""
+  for text, expected in ROUTER_CHECKS:
+    route, answer, route_name = capital_router.classify(text)
+    assert route_name == expected, f"{text!r} routed to {route_name!r} ({answer!r}), expected {expected!r}"
+  for text, expected in ANSWER_CHECKS:
+    route, answer, route_name = capital_router.classify(text)
+    assert answer == expected, f"{text!r} answered {answer!r}, expected {expected!r}"
+
+# Timing spans / metrics for turns, model calls and tools (see telemetry.py)
+telemetry = get_telemetry()
 
 # Add the tool to the agent
 root_agent = Agent(
     model="gemini-2.0-flash",
     name="capital_agents_docker_deploy",
     description="Answers user questions about the capital city of a given country.",
-    instruction="""You are an agent that provides the capital city of a country... (previous instruction text)""",
-    tools=[get_capital_city] # Provide the function directly
+    instruction="""You are an agent that provides the capital city of a country... (previous instruction text)
+    When the user asks about several countries, call get_capital_cities once with all of them.""",
+    # Run on the tool thread pool, so a slow call never stalls other sessions (see tool_executor.py)
+    tools=[offloaded(get_capital_city), offloaded(get_capital_cities)],
+    before_agent_callback=[capital_router.before_agent_callback, telemetry.before_agent_callback],
+    before_model_callback=[capital_router.before_model_callback, telemetry.before_model_callback],
+    after_model_callback=telemetry.after_model_callback,
+    before_tool_callback=telemetry.before_tool_callback,
+    after_tool_callback=telemetry.after_tool_callback,
+    after_agent_callback=[capital_router.after_agent_callback, telemetry.after_agent_callback],
 )
\ No newline at end of file
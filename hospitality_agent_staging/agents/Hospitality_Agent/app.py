@@ -1,7 +1,49 @@
 # streamlit_app.py
+import json
+import os
+
+import httpx
 import streamlit as st
-import asyncio
-from main import get_runner_and_session, run_query_async
+
+# Set to the HTTP API (server.py), e.g. http://localhost:8080, to run this UI
+# as a thin client; unset runs the agent inside the Streamlit process.
+AGENT_API_URL = os.getenv("AGENT_API_URL", "").rstrip("/")
+API_TIMEOUT = httpx.Timeout(10.0, read=120.0)
+
+
+def stream_api_query(user_id, user_text, property_id):
+    """Yields reply chunks from the server's SSE endpoint."""
+    with httpx.stream("POST", f"{AGENT_API_URL}/v1/query/stream",
+                      json={"user_id": user_id, "text": user_text, "property_id": property_id},
+                      timeout=API_TIMEOUT) as response:
+        if response.status_code == 404:
+            yield "Sorry, I don't know this property."
+            return
+        if response.status_code == 503:
+            yield "The assistant is busy right now, please try again in a moment."
+            return
+        response.raise_for_status()
+        event = None
+        for line in response.iter_lines():
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                data = json.loads(line[len("data:"):])
+                if event == "error":
+                    yield "Sorry, something went wrong while answering."
+                elif event is None:
+                    yield data["text"]
+            elif not line:
+                event = None
+
+
+def stream_local_query(user_text):
+    """Yields reply chunks from the agent running in this process."""
+    try:
+        yield from stream_query(runner, USER_ID, SESSION_ID, user_text, PROPERTY_ID)
+    except UnknownProperty:
+        # Same answer as the server's 404 (e.g. the property was removed meanwhile)
+        yield "Sorry, I don't know this property."
 
 st.set_page_config(page_title="Resort Ranger Agent", page_icon="🏨", layout="centered")
 
@@ -12,18 +54,29 @@ st.title(" 🏨 Resort Ranger")
 # -------------------------------------------------------
 st.sidebar.header("User Settings")
 USER_ID_INPUT = st.sidebar.text_input("Enter User ID", value="")
+# Which resort this conversation is about (see hospitality_agent/properties.py)
+PROPERTY_ID = st.sidebar.text_input("Property", value=os.getenv("DEFAULT_PROPERTY_ID", "default"))
 
 # -------------------------------------------------------
-# 1. Initialize backend ONCE
+# 1. Backend lookup
+#    main.py owns ONE session service + Runner per process and an
+#    LRU cache of user -> session, so this is cheap on every rerun
+#    (no per-user st.cache_resource entry that grows forever).
+#    With AGENT_API_URL the server does all of this instead.
 # -------------------------------------------------------
-@st.cache_resource
-def init_backend(user_id:str):
-    return get_runner_and_session(user_id)
-
 if not USER_ID_INPUT:
     st.warning("Please enter a User ID in the sidebar to start.")
     st.stop()
-runner, session_service, APP_NAME, USER_ID, SESSION_ID = init_backend(USER_ID_INPUT)
+if AGENT_API_URL:
+    USER_ID = USER_ID_INPUT
+else:
+    from hospitality_agent.properties import UnknownProperty
+    from main import get_runner_and_session, stream_query
+    try:
+        runner, session_service, APP_NAME, USER_ID, SESSION_ID = get_runner_and_session(USER_ID_INPUT, PROPERTY_ID)
+    except UnknownProperty:
+        st.error(f"Unknown property '{PROPERTY_ID}'. Please check the Property in the sidebar.")
+        st.stop()
 
 # -------------------------------------------------------
 # 2. Initialize chat history
@@ -70,13 +123,13 @@ if user_input:
     with st.chat_message("user"):
         st.markdown(user_input)
 
-    # Generate agent reply
+    # Generate agent reply, rendering tokens as they stream in
     with st.chat_message("assistant"):
-        with st.spinner("Thinking..."):
-            reply = asyncio.run(
-                run_query_async(runner, USER_ID, SESSION_ID, user_input)
-            )
-            st.markdown(reply)
+        if AGENT_API_URL:
+            chunks = stream_api_query(USER_ID, user_input, PROPERTY_ID)
+        else:
+            chunks = stream_local_query(user_input)
+        reply = st.write_stream(chunks)
 
     # Save reply
     st.session_state.messages.append({"role": "assistant", "text": reply})
@@ -0,0 +1,91 @@
+"""Micro-benchmark for the availability index range queries.
+
+Builds a synthetic multi-year calendar for many properties (every
+property contributes its own room-type rows) and times:
+    - min_available() for random stays
+    - open_windows() for random room types / stay lengths
+
+Run from agents/Hospitality_Agent:
+    python -m benchmarks.availability_queries --properties 200 --years 3
+"""
+import argparse
+import json
+import random
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from hospitality_agent.availability import build_snapshot
+
+ROOM_TYPES = ("Suite", "Penthouse", "Delux")
+
+
+def synthetic_records(properties: int, days: int, seed: int = 7) -> list:
+    """Generates sheet rows for `properties` x ROOM_TYPES x `days`."""
+    rng = np.random.default_rng(seed)
+    start = date(2025, 1, 1)
+    records = []
+    for p in range(properties):
+        for room in ROOM_TYPES:
+            capacity = int(rng.integers(4, 30))
+            booked = rng.integers(0, capacity + 1, size=days)
+            for d in range(days):
+                records.append({
+                    "Date": start + timedelta(days=d),
+                    "Roomtype": f"P{p:04d} {room}",
+                    "Number_of_rooms": capacity,
+                    "Booked": int(booked[d]),
+                    "Available": capacity - int(booked[d]),
+                })
+    return records
+
+
+def _percentiles(samples: list) -> dict:
+    values = np.array(samples) * 1e6
+    return {
+        "p50_us": round(float(np.percentile(values, 50)), 2),
+        "p99_us": round(float(np.percentile(values, 99)), 2),
+    }
+
+
+def run(properties: int, years: int, queries: int) -> dict:
+    days = 365 * years
+    started = time.perf_counter()
+    snapshot = build_snapshot(synthetic_records(properties, days))
+    build_seconds = time.perf_counter() - started
+
+    rnd = random.Random(11)
+
+    range_samples = []
+    for _ in range(queries):
+        check_in = snapshot.start_date + timedelta(days=rnd.randrange(days - 30))
+        check_out = check_in + timedelta(days=rnd.randint(1, 30))
+        t = time.perf_counter()
+        snapshot.min_available(check_in, check_out)
+        range_samples.append(time.perf_counter() - t)
+
+    window_samples = []
+    for _ in range(queries):
+        room = rnd.choice(snapshot.room_types)
+        nights = rnd.randint(1, 14)
+        t = time.perf_counter()
+        snapshot.open_windows(room, nights, number_of_rooms=1)
+        window_samples.append(time.perf_counter() - t)
+
+    return {
+        "room_rows": len(snapshot.room_types),
+        "days": days,
+        "build_seconds": round(build_seconds, 3),
+        "min_available_all_room_types": _percentiles(range_samples),
+        "open_windows_one_room_type": _percentiles(window_samples),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--properties", type=int, default=200)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.properties, args.years, args.queries), indent=2))
@@ -0,0 +1,108 @@
+"""Contention benchmark for the SQLite booking store.
+
+N writer threads book random 1-4 night stays against a synthetic
+inventory (every writer has its own idempotency identity, so nothing is
+deduplicated). Reports bookings/sec, optimistic-retry counts and checks
+that no night was oversold.
+
+Run from agents/Hospitality_Agent:
+    python -m benchmarks.booking_contention --writers 1 2 4 8 16 32
+"""
+import argparse
+import json
+import random
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from hospitality_agent.booking_store import BookingStore
+
+ROOM_TYPES = ("Suite", "Penthouse", "Delux")
+START = date(2025, 11, 1)
+
+
+def _seed(store: BookingStore, days: int, rooms_per_type: int):
+    conn = store._connection()
+    conn.execute("BEGIN IMMEDIATE")
+    conn.executemany(
+        "INSERT INTO inventory (date, room_type, number_of_rooms, booked, available) VALUES (?, ?, ?, 0, ?)",
+        [
+            ((START + timedelta(days=d)).isoformat(), room, rooms_per_type, rooms_per_type)
+            for d in range(days)
+            for room in ROOM_TYPES
+        ],
+    )
+    conn.execute("COMMIT")
+
+
+def run(writers: int, bookings_per_writer: int, days: int, rooms_per_type: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        # No workbook -> the store starts empty and we seed it ourselves
+        store = BookingStore(path=Path(tmp) / "bookings.db", workbook_path=Path(tmp) / "missing.xlsx")
+        _seed(store, days, rooms_per_type)
+
+        counts = {"success": 0, "unavailable": 0, "conflict": 0}
+        counts_lock = threading.Lock()
+
+        def writer(worker: int):
+            rnd = random.Random(worker)
+            local = {"success": 0, "unavailable": 0, "conflict": 0}
+            for i in range(bookings_per_writer):
+                check_in = START + timedelta(days=rnd.randrange(days - 4))
+                result = store.book(
+                    room_type=rnd.choice(ROOM_TYPES),
+                    check_in=check_in,
+                    check_out=check_in + timedelta(days=rnd.randint(1, 4)),
+                    number_of_rooms=rnd.randint(1, 2),
+                    user_id=f"bench-{worker}",
+                    session_id=str(i),
+                )
+                local[result["status"]] += 1
+            store.close()
+            with counts_lock:
+                for key, value in local.items():
+                    counts[key] += value
+
+        threads = [threading.Thread(target=writer, args=(w,)) for w in range(writers)]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        conn = store._connection()
+        oversold = conn.execute("SELECT COUNT(*) FROM inventory WHERE available < 0").fetchone()[0]
+        held = conn.execute("SELECT COALESCE(SUM(rooms), 0) FROM booking_nights").fetchone()[0]
+        booked = conn.execute("SELECT SUM(booked) FROM inventory").fetchone()[0]
+        store.close()
+
+    attempts = writers * bookings_per_writer
+    return {
+        "writers": writers,
+        "attempts": attempts,
+        "seconds": round(elapsed, 3),
+        "attempts_per_sec": round(attempts / elapsed, 1),
+        "bookings_per_sec": round(counts["success"] / elapsed, 1),
+        **counts,
+        "optimistic_retries": store.optimistic_retries,
+        "oversold_nights": oversold,
+        "ledger_consistent": held == booked,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--bookings-per-writer", type=int, default=200)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--rooms-per-type", type=int, default=500)
+    args = parser.parse_args()
+
+    results = [
+        run(n, args.bookings_per_writer, args.days, args.rooms_per_type)
+        for n in args.writers
+    ]
+    print(json.dumps(results, indent=2))
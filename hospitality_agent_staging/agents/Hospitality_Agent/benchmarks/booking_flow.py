@@ -0,0 +1,244 @@
+"""Booking flow benchmark: model calls and latency per completed booking.
+
+Compares the two ways the agent can book, through the real Runner,
+session DB, callbacks and tools:
+
+    two_step   - booking_availability_tool, then book_room_tool (below;
+                 the model matches the requested room against the result)
+    composite  - check_and_book_tool: checks and books in one call, or
+                 returns ranked alternatives
+
+The model is scripted to follow each flow. Every call sleeps
+--model-latency-ms plus MS_PER_1K_TOKENS per 1000 request tokens, so
+both the extra round trip and the extra payload show up in the turn
+time, as they do with Gemini. Inventory is small, so some stays sell
+out: the guest then asks for the first alternative offered (another
+room type for the same dates in two_step, the first entry of
+alternatives in composite).
+
+Reports model calls, tool calls and request tokens per completed
+booking, plus booking turn latency.
+
+Run from agents/Hospitality_Agent:
+    python -m benchmarks.booking_flow --guests 100 --concurrency 10
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import AsyncGenerator, Optional
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import DatabaseSessionService
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
+
+from benchmarks.booking_contention import ROOM_TYPES, _seed
+from benchmarks.context_budget import MS_PER_1K_TOKENS
+from benchmarks.turn_latency import INVENTORY_DAYS, _percentiles, _stay
+from hospitality_agent import agent, availability, booking_store
+from hospitality_agent.booking_store import BookingStore
+from hospitality_agent.context_budget import content_tokens
+from main import APP_NAME, initial_state
+
+ROOMS_PER_TYPE = 3
+FLOWS = ("two_step", "composite")
+
+
+def book_room_tool(tool_context: ToolContext, booking_criteria: Optional[dict] = None) -> dict:
+    """This tool assists in booking a room based on user preferences.
+    The input booking_criteria dictionary should contain the following details:
+    room_type,
+    check_in_date,
+    check_out_date,
+    number_of_rooms,
+    and any special_requests.
+
+    Args:
+        tool_context: Context for accessing session state
+        booking_criteria: The guest's booking criteria (dates in YYYY-MM-DD format)
+    """
+    # The agent's old booking tool: books without the availability
+    # fallback of check_and_book_tool, through the same store
+    criteria, check_in, check_out, error = agent._booking_request(booking_criteria)
+    if error:
+        return error
+    return agent._book(tool_context, criteria, check_in, check_out)
+
+
+TWO_STEP_TOOLS = [agent.getinformation_tool, agent.booking_availability_tool, agent.open_windows_tool,
+                  book_room_tool]
+COMPOSITE_TOOLS = [agent.getinformation_tool, agent.booking_availability_tool, agent.open_windows_tool,
+                   agent.check_and_book_tool]
+
+
+def _call(name: str, args: dict) -> LlmResponse:
+    return LlmResponse(content=types.Content(
+        role="model", parts=[types.Part(function_call=types.FunctionCall(name=name, args=args))],
+    ))
+
+
+class BookingFlowLlm(BaseLlm):
+    """Scripted model that books the way the agent's instruction tells it to.
+
+    The user message carries the criteria as JSON. two_step checks every
+    room type for the dates and books if the requested one is listed.
+    Records (request tokens, simulated latency ms) per call.
+    """
+
+    model: str = "scripted-booking"
+    latency_ms: float = 0.0
+    model_calls: list = []
+
+    async def generate_content_async(self, llm_request, stream=False) -> AsyncGenerator[LlmResponse, None]:
+        tokens = sum(content_tokens(content) for content in llm_request.contents)
+        latency_ms = self.latency_ms + MS_PER_1K_TOKENS * tokens / 1000
+        self.model_calls.append((tokens, latency_ms))
+        await asyncio.sleep(latency_ms / 1000)
+
+        last = llm_request.contents[-1]
+        responses = [part.function_response for part in last.parts or () if part.function_response]
+        # The guest's latest message carries the criteria
+        criteria = next(json.loads(content.parts[0].text) for content in reversed(llm_request.contents)
+                        if content.role == "user" and content.parts and content.parts[0].text)
+
+        if not responses:
+            if "check_and_book_tool" in llm_request.tools_dict:
+                yield _call("check_and_book_tool", {"booking_criteria": criteria})
+            else:
+                yield _call("booking_availability_tool", {
+                    "check_in_date": criteria["check_in_date"],
+                    "check_out_date": criteria["check_out_date"],
+                    "number_of_rooms": criteria["number_of_rooms"],
+                })
+            return
+
+        response = responses[0]
+        if (response.name == "booking_availability_tool"
+                and criteria["room_type"] in response.response.get("available_room_types", ())):
+            # The requested room type is free: book it
+            yield _call("book_room_tool", {"booking_criteria": criteria})
+            return
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(
+            text=f"Here is what I found. {json.dumps(response.response, default=str)[:200]}")]))
+
+
+async def _turn(runner: Runner, session, criteria: dict) -> tuple:
+    """Runs one booking request; returns (seconds, tool responses by name)."""
+    responses = {}
+    started = time.perf_counter()
+    async for event in runner.run_async(user_id=session.user_id, session_id=session.id,
+                                        new_message=types.Content(role="user", parts=[types.Part(text=json.dumps(criteria))])):
+        for response in event.get_function_responses():
+            responses[response.name] = response.response
+    return time.perf_counter() - started, responses
+
+
+def _next_stay(flow: str, criteria: dict, responses: dict):
+    """The stay the guest asks for next when theirs is sold out, or None."""
+    if flow == "composite":
+        alternatives = responses.get("check_and_book_tool", {}).get("alternatives") or []
+        if not alternatives:
+            return None
+        first = alternatives[0]
+        return dict(criteria, room_type=first["room_type"], check_in_date=first["check_in_date"],
+                    check_out_date=first["check_out_date"])
+
+    # two_step: another room type booking_availability listed for the same dates
+    available = responses.get("booking_availability_tool", {}).get("available_room_types") or []
+    return dict(criteria, room_type=available[0]) if available else None
+
+
+async def _run(flow: str, guests: int, concurrency: int, seed: int, db_url: str) -> dict:
+    session_service = DatabaseSessionService(db_url=db_url)
+    runner = Runner(agent=agent.root_agent, app_name=APP_NAME, session_service=session_service)
+    rnd = random.Random(seed)
+    requests = []
+    for _ in range(guests):
+        check_in, check_out = _stay(rnd)
+        requests.append({"room_type": rnd.choice(ROOM_TYPES), "check_in_date": check_in,
+                         "check_out_date": check_out, "number_of_rooms": 1})
+
+    turn_seconds, tool_calls = [], []
+    outcome = {"completed": 0, "booked_alternative": 0, "gave_up": 0}
+    queue = asyncio.Queue()
+    for i, criteria in enumerate(requests):
+        queue.put_nowait((i, criteria))
+
+    async def guest():
+        while not queue.empty():
+            i, criteria = queue.get_nowait()
+            session = await session_service.create_session(app_name=APP_NAME, user_id=f"guest-{i}",
+                                                           state=initial_state())
+            for attempt in range(2):
+                seconds, responses = await _turn(runner, session, criteria)
+                turn_seconds.append(seconds)
+                tool_calls.append(len(responses))
+                booked = [r for r in responses.values() if r.get("status") == "success"]
+                if booked:
+                    outcome["completed"] += 1
+                    outcome["booked_alternative"] += attempt
+                    break
+                criteria = _next_stay(flow, criteria, responses) if attempt == 0 else None
+                if criteria is None:
+                    outcome["gave_up"] += 1
+                    break
+
+    await asyncio.gather(*(guest() for _ in range(concurrency)))
+    await session_service.close()
+    return {"turns": turn_seconds, "tool_calls": sum(tool_calls), **outcome}
+
+
+def run(flow: str, guests: int, concurrency: int, model_latency_ms: float, seed: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        store = BookingStore(path=tmp / "bookings.db", workbook_path=tmp / "missing.xlsx")
+        _seed(store, INVENTORY_DAYS, ROOMS_PER_TYPE)
+        booking_store._booking_store = store
+        availability._availability_index = availability.AvailabilityIndex(store)
+
+        root_agent = agent.root_agent
+        tools, model = root_agent.tools, root_agent.model
+        root_agent.tools = TWO_STEP_TOOLS if flow == "two_step" else COMPOSITE_TOOLS
+        root_agent.model = llm = BookingFlowLlm(latency_ms=model_latency_ms, model_calls=[])
+        try:
+            # Tool / router logging goes to stderr so stdout stays valid JSON
+            with contextlib.redirect_stdout(sys.stderr):
+                result = asyncio.run(_run(flow, guests, concurrency, seed,
+                                          f"sqlite+aiosqlite:///{tmp / 'sessions.db'}"))
+        finally:
+            root_agent.tools, root_agent.model = tools, model
+            store.close()
+
+    completed = result["completed"] or 1
+    return {
+        "flow": flow,
+        "guests": guests,
+        "completed_bookings": result["completed"],
+        "booked_alternative": result["booked_alternative"],
+        "gave_up": result["gave_up"],
+        "model_calls_per_booking": round(len(llm.model_calls) / completed, 2),
+        "tool_calls_per_booking": round(result["tool_calls"] / completed, 2),
+        "request_tokens_per_booking": round(sum(tokens for tokens, _ in llm.model_calls) / completed),
+        "turn": _percentiles(result["turns"]),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--guests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--model-latency-ms", type=float, default=300.0)
+    parser.add_argument("--flow", choices=FLOWS, nargs="+", default=list(FLOWS))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(json.dumps([run(flow, args.guests, args.concurrency, args.model_latency_ms, args.seed)
+                      for flow in args.flow], indent=2))
@@ -0,0 +1,147 @@
+"""Context budget benchmark: prompt size and model latency as a conversation grows.
+
+Runs one long guest conversation (info questions, availability checks,
+bookings) through the real Runner, session DB, callbacks and tools,
+with the context budget off and on. The model is ScriptedLlm with a
+latency that grows with the history it receives (BASE_LATENCY_MS plus
+MS_PER_1K_TOKENS per 1000 tokens), so a growing prompt shows up as a
+growing turn time, as it does with Gemini.
+
+Reports, every --report-every turns, the history tokens the model
+received, the (simulated) model time and the whole turn time, plus the
+budget's counters. The rest of the turn grows with the session's event
+count (ADK loads and replays every event); session_compaction.py bounds
+that in the live database, this benchmark keeps everything.
+
+Run from agents/Hospitality_Agent:
+    python -m benchmarks.context_budget --turns 60
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from google.adk.runners import Runner
+from google.adk.sessions import DatabaseSessionService
+from google.genai import types
+
+from benchmarks.booking_contention import _seed
+from benchmarks.turn_latency import INVENTORY_DAYS, ROOMS_PER_TYPE, ScriptedLlm, _stay
+from hospitality_agent import availability, booking_store
+from hospitality_agent.agent import context_budget, root_agent
+from hospitality_agent.booking_store import BookingStore
+from hospitality_agent.context_budget import content_tokens
+from main import APP_NAME, initial_state
+
+BASE_LATENCY_MS = 5.0
+MS_PER_1K_TOKENS = 20.0
+
+QUESTIONS = (
+    "Do you have a swimming pool?",
+    "Which restaurants do you have?",
+    "Is there free wifi?",
+    "What activities are there on the weekend?",
+    "Tell me about the spa treatments",
+    "What amenities do the rooms have?",
+)
+
+
+class SizedLlm(ScriptedLlm):
+    """ScriptedLlm whose latency grows with the request history."""
+
+    # (history tokens, simulated latency ms) per call
+    model_calls: list = []
+
+    async def generate_content_async(self, llm_request, stream=False):
+        tokens = sum(content_tokens(content) for content in llm_request.contents)
+        latency_ms = BASE_LATENCY_MS + MS_PER_1K_TOKENS * tokens / 1000
+        self.model_calls.append((tokens, latency_ms))
+        await asyncio.sleep(latency_ms / 1000)
+        async for response in super().generate_content_async(llm_request, stream):
+            yield response
+
+
+def guest_messages(rnd: random.Random, turns: int) -> list:
+    messages = []
+    while len(messages) < turns:
+        check_in, check_out = _stay(rnd)
+        room = rnd.choice(("Suite", "Penthouse", "Delux"))
+        messages += [
+            rnd.choice(QUESTIONS),
+            f"Is a {room} available from {check_in} to {check_out}?",
+            rnd.choice(QUESTIONS),
+            f"Please book one {room} from {check_in} to {check_out}.",
+        ]
+    return messages[:turns]
+
+
+async def _conversation(messages: list, db_url: str) -> list:
+    session_service = DatabaseSessionService(db_url=db_url)
+    runner = Runner(agent=root_agent, app_name=APP_NAME, session_service=session_service)
+    session = await session_service.create_session(app_name=APP_NAME, user_id="guest", state=initial_state())
+
+    rows = []
+    for turn, text in enumerate(messages, start=1):
+        llm = root_agent.model
+        calls = len(llm.model_calls)
+        started = time.perf_counter()
+        async for _ in runner.run_async(user_id="guest", session_id=session.id,
+                                        new_message=types.Content(role="user", parts=[types.Part(text=text)])):
+            pass
+        model_calls = llm.model_calls[calls:]
+        rows.append({
+            "turn": turn,
+            "history_tokens": max((tokens for tokens, _ in model_calls), default=0),
+            "model_ms": round(sum(latency_ms for _, latency_ms in model_calls), 1),
+            "turn_ms": round((time.perf_counter() - started) * 1000, 1),
+        })
+    await session_service.close()
+    return rows
+
+
+def run(turns: int, report_every: int, budget_tokens: int, seed: int) -> list:
+    messages = guest_messages(random.Random(seed), turns)
+    results = []
+    for enabled in (False, True):
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            store = BookingStore(path=tmp / "bookings.db", workbook_path=tmp / "missing.xlsx")
+            _seed(store, INVENTORY_DAYS, ROOMS_PER_TYPE)
+            booking_store._booking_store = store
+            availability._availability_index = availability.AvailabilityIndex(store)
+
+            root_agent.model = SizedLlm(model_calls=[])
+            context_budget.enabled = enabled
+            context_budget.budget_tokens = budget_tokens
+            context_budget.reset_stats()
+
+            # Tool / router logging goes to stderr so stdout stays valid JSON
+            with contextlib.redirect_stdout(sys.stderr):
+                rows = asyncio.run(_conversation(messages, f"sqlite+aiosqlite:///{tmp / 'sessions.db'}"))
+            store.close()
+
+        result = {
+            "context_budget": enabled,
+            "budget_tokens": budget_tokens if enabled else None,
+            "turns": [row for row in rows if row["turn"] % report_every == 0 or row["turn"] == 1],
+        }
+        if enabled:
+            result["stats"] = context_budget.stats()
+        results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=60)
+    parser.add_argument("--report-every", type=int, default=10)
+    parser.add_argument("--budget-tokens", type=int, default=context_budget.budget_tokens)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.turns, args.report_every, args.budget_tokens, args.seed), indent=2))
@@ -0,0 +1,228 @@
+"""Event-loop stall benchmark: sync tools on the loop vs offloaded to the tool thread pool.
+
+Runs --sessions concurrent conversations through the real Runners,
+session DB, callbacks and tools of the hospitality and capital agents,
+once with tools inline on the event loop (TOOL_OFFLOAD=0) and once
+offloaded (see hospitality_agent/tool_executor.py). The scripted model
+answers compound questions with several function calls in one
+response:
+
+    compound  - spa information + availability check + booking
+    info      - one resort information lookup
+    capitals  - get_capital_cities for a tour group (some typos)
+
+A second "worker process" (a thread with its own connection) keeps
+taking the booking store's write lock for --lock-hold-ms every
+--lock-gap-ms, as other server workers do, so bookings sometimes wait
+for it.
+
+A probe task sleeps PROBE_INTERVAL_MS at a time and records how late
+it wakes up: that lag is how long the loop could not run anything.
+Reports loop lag, stalls over STALL_MS, and turn latency per kind.
+
+Run from agents/Hospitality_Agent:
+    python -m benchmarks.event_loop_stalls --sessions 50 --turns 4
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import AsyncGenerator
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import Runner
+from google.genai import types
+
+from benchmarks.booking_contention import ROOM_TYPES, START, _seed
+from benchmarks.turn_latency import (CAPITAL_APP_NAME, INVENTORY_DAYS, ROOMS_PER_TYPE, Timings, _percentiles,
+                                     capital_agent)
+from capital_agent.tool_executor import get_tool_executor as get_capital_tool_executor
+from hospitality_agent import availability, booking_store
+from hospitality_agent.agent import root_agent as hospitality_agent
+from hospitality_agent.booking_store import BookingStore
+from hospitality_agent.tool_cache import get_tool_cache
+from hospitality_agent.tool_executor import get_tool_executor
+from main import APP_NAME, initial_state
+from session_storage import TunedSessionService
+
+PROBE_INTERVAL_MS = 1.0
+STALL_MS = 10.0
+MODES = ("inline", "offloaded")
+
+TOPICS = ("spa", "dining", "pool", "activities", "cancellation policy", "wifi")
+TOUR_GROUP = ["France", "Japan", "Kenya", "Peru", "Viet Nam", "Germny", "Brazl", "Canda", "Egypt",
+              "Australia", "Argentna", "Norway", "Thailand", "Moroco", "Chile", "India"]
+
+
+class MultiCallLlm(BaseLlm):
+    """Scripted model: the user message is a JSON list of [tool, args] calls,
+    all issued in one response; then a one-line summary of the results."""
+
+    model: str = "scripted-multi-call"
+    latency_ms: float = 0.0
+
+    async def generate_content_async(self, llm_request, stream=False) -> AsyncGenerator[LlmResponse, None]:
+        await asyncio.sleep(self.latency_ms / 1000)
+        last = llm_request.contents[-1]
+        responses = [part.function_response for part in last.parts or () if part.function_response]
+        if responses:
+            text = "; ".join(f"{r.name}: {json.dumps(r.response, default=str)[:80]}" for r in responses)
+        else:
+            calls = json.loads(last.parts[0].text)
+            yield LlmResponse(content=types.Content(role="model", parts=[
+                types.Part(function_call=types.FunctionCall(name=name, args=args)) for name, args in calls
+            ]))
+            return
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]))
+
+
+def _turn(rnd: random.Random) -> tuple:
+    """Returns (kind, app_name, [[tool, args], ...]) for one guest turn."""
+    kind = rnd.choice(("compound", "compound", "info", "capitals"))
+    if kind == "capitals":
+        return kind, CAPITAL_APP_NAME, [["get_capital_cities", {"countries": rnd.sample(TOUR_GROUP, 12)}]]
+    if kind == "info":
+        return kind, APP_NAME, [["getinformation_tool", {"topic": rnd.choice(TOPICS)}]]
+    check_in = START + timedelta(days=rnd.randrange(INVENTORY_DAYS - 5))
+    check_out = check_in + timedelta(days=rnd.randint(1, 4))
+    room = rnd.choice(ROOM_TYPES)
+    return kind, APP_NAME, [
+        ["getinformation_tool", {"topic": "spa"}],
+        ["booking_availability_tool", {"check_in_date": check_in.isoformat(), "check_out_date": check_out.isoformat()}],
+        ["check_and_book_tool", {"booking_criteria": {
+            "room_type": room, "check_in_date": check_in.isoformat(),
+            "check_out_date": check_out.isoformat(), "number_of_rooms": 1,
+        }}],
+    ]
+
+
+class OtherWorker(threading.Thread):
+    """Another process's writes to the booking store: holds its write lock now and then."""
+
+    def __init__(self, path: Path, hold_ms: float, gap_ms: float):
+        super().__init__(daemon=True)
+        self.path, self.hold_ms, self.gap_ms = path, hold_ms, gap_ms
+        self.stopped = threading.Event()
+
+    def run(self):
+        conn = sqlite3.connect(self.path, isolation_level=None, timeout=5)
+        while not self.stopped.is_set():
+            conn.execute("BEGIN IMMEDIATE")
+            time.sleep(self.hold_ms / 1000)
+            conn.execute("COMMIT")
+            time.sleep(self.gap_ms / 1000)
+        conn.close()
+
+
+async def _probe(lags: list, stop: asyncio.Event):
+    interval = PROBE_INTERVAL_MS / 1000
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, time.perf_counter() - started - interval))
+
+
+async def _run(sessions: int, turns: int, model_latency_ms: float, seed: int, db_path: Path) -> dict:
+    llm = MultiCallLlm(latency_ms=model_latency_ms)
+    hospitality_agent.model = llm
+    capital_agent.model = llm
+    session_service = TunedSessionService(db_url=f"sqlite+aiosqlite:///{db_path}")
+    runners = {
+        APP_NAME: Runner(agent=hospitality_agent, app_name=APP_NAME, session_service=session_service),
+        CAPITAL_APP_NAME: Runner(agent=capital_agent, app_name=CAPITAL_APP_NAME, session_service=session_service),
+    }
+    await session_service.prepare_tables()
+    turn_timings = Timings()
+
+    async def guest(worker: int):
+        rnd = random.Random(seed + worker)
+        session_ids = {}
+        for _ in range(turns):
+            kind, app_name, calls = _turn(rnd)
+            if app_name not in session_ids:
+                session = await session_service.create_session(
+                    app_name=app_name, user_id=f"guest-{worker}",
+                    state=initial_state() if app_name == APP_NAME else None)
+                session_ids[app_name] = session.id
+            started = time.perf_counter()
+            async for _ in runners[app_name].run_async(
+                user_id=f"guest-{worker}", session_id=session_ids[app_name],
+                new_message=types.Content(role="user", parts=[types.Part(text=json.dumps(calls))]),
+            ):
+                pass
+            turn_timings.record(kind, time.perf_counter() - started)
+
+    lags = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_probe(lags, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(guest(worker) for worker in range(sessions)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+    await session_service.close()
+
+    total_turns = sum(len(samples) for samples in turn_timings.samples.values())
+    return {
+        "turns_per_sec": round(total_turns / elapsed, 1),
+        "loop_lag": _percentiles(lags),
+        f"stalls_over_{STALL_MS:g}ms": sum(lag * 1000 > STALL_MS for lag in lags),
+        "turn_latency": turn_timings.summary(),
+    }
+
+
+def run(mode: str, sessions: int, turns: int, model_latency_ms: float, lock_hold_ms: float,
+        lock_gap_ms: float, seed: int) -> dict:
+    executors = (get_tool_executor(), get_capital_tool_executor())
+    for executor in executors:
+        executor.enabled = mode == "offloaded"
+        executor.reset_stats()
+    get_tool_cache().enabled = False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        store = BookingStore(path=tmp / "bookings.db", workbook_path=tmp / "missing.xlsx")
+        _seed(store, INVENTORY_DAYS, ROOMS_PER_TYPE)
+        booking_store._booking_store = store
+        availability._availability_index = availability.AvailabilityIndex(store)
+
+        other_worker = OtherWorker(tmp / "bookings.db", lock_hold_ms, lock_gap_ms)
+        other_worker.start()
+        try:
+            # Tool / router logging goes to stderr so stdout stays valid JSON
+            with contextlib.redirect_stdout(sys.stderr):
+                result = asyncio.run(_run(sessions, turns, model_latency_ms, seed, tmp / "sessions.db"))
+        finally:
+            other_worker.stopped.set()
+            other_worker.join()
+            for executor in executors:
+                # Worker threads hold booking store connections to this directory
+                executor.shutdown()
+            store.close()
+
+    return {"mode": mode, "sessions": sessions, "turns_per_session": turns,
+            "tool_executor": executors[0].stats(), **result}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=4)
+    parser.add_argument("--model-latency-ms", type=float, default=50.0)
+    parser.add_argument("--lock-hold-ms", type=float, default=20.0)
+    parser.add_argument("--lock-gap-ms", type=float, default=30.0)
+    parser.add_argument("--mode", choices=MODES, nargs="+", default=list(MODES))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(json.dumps([run(mode, args.sessions, args.turns, args.model_latency_ms, args.lock_hold_ms,
+                          args.lock_gap_ms, args.seed) for mode in args.mode], indent=2))
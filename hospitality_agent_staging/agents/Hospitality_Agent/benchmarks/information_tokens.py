@@ -0,0 +1,69 @@
+"""Tool-output size of getinformation_tool: whole document vs scoped sections.
+
+Replays typical guest questions and compares the JSON the model receives
+when the tool returns the full resort_info document (old behaviour)
+against the sections selected by the keyword index.
+
+Tokens are estimated at ~4 characters per token.
+
+Run from agents/Hospitality_Agent:
+    python -m benchmarks.information_tokens
+"""
+import contextlib
+import json
+import sys
+import time
+
+from hospitality_agent.agent import getinformation_tool
+from hospitality_agent.resort_knowledge import RESORT_INFO_PATH
+
+QUESTIONS = [
+    "What time is checkout?",
+    "When is check-in?",
+    "Do you have a swimming pool?",
+    "What are the spa timings?",
+    "What is your cancellation policy?",
+    "Can I bring my dog?",
+    "Where is the resort located?",
+    "What's your phone number?",
+    "Which restaurants do you have?",
+    "What activities are there on the weekend?",
+    "Is there free wifi?",
+    "Do you offer airport pickup?",
+]
+
+
+def _tokens(payload) -> int:
+    return len(json.dumps(payload, ensure_ascii=False)) // 4
+
+
+def run() -> dict:
+    with open(RESORT_INFO_PATH, encoding="utf-8") as f:
+        full_tokens = _tokens(json.load(f))
+
+    rows = []
+    started = time.perf_counter()
+    for question in QUESTIONS:
+        result = getinformation_tool(None, topic=question)
+        rows.append({
+            "question": question,
+            "sections": [key for key in result if key != "resort_name"],
+            "tokens": _tokens(result),
+        })
+    elapsed = time.perf_counter() - started
+
+    scoped = sum(row["tokens"] for row in rows) / len(rows)
+    return {
+        "full_document_tokens": full_tokens,
+        "scoped_tokens_per_call": round(scoped, 1),
+        "reduction_pct": round(100 * (1 - scoped / full_tokens), 1),
+        "lookup_us_per_call": round(elapsed / len(rows) * 1e6, 1),
+        "questions": rows,
+    }
+
+
+if __name__ == "__main__":
+    # Tool logging goes to stderr so stdout stays valid JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        report = run()
+    print(json.dumps(report, indent=2, ensure_ascii=False))
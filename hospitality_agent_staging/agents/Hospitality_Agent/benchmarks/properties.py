@@ -0,0 +1,222 @@
+"""Multi-property benchmark: hundreds of resorts behind one deployment.
+
+Creates --properties property directories (resort_info.json plus a
+seeded booking store each) and calls the agent's real tools for them,
+with the property picked from session state like a live conversation.
+The tool cache is off, so every call reaches the property's data.
+
+Three phases, for sharded inventory (one booking store per property,
+as served) and, for comparison, one store shared by every property:
+
+    cold / warm   - first and repeated availability check per property
+    mixed         - Zipf-distributed traffic (availability checks and
+                    bookings) from several threads; reports latency and
+                    the property LRU's hits / loads / evictions
+    isolation     - availability checks at quiet properties, alone and
+                    while --storm-threads keep booking at one hot property
+
+Run from agents/Hospitality_Agent:
+    python -m benchmarks.properties --properties 300 --max-loaded 64
+"""
+import argparse
+import contextlib
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from benchmarks.booking_contention import ROOM_TYPES, START, _seed
+from benchmarks.booking_flow import book_room_tool
+from benchmarks.turn_latency import INVENTORY_DAYS, _percentiles
+from hospitality_agent import properties
+from hospitality_agent.agent import booking_availability_tool
+from hospitality_agent.booking_store import BookingStore
+from hospitality_agent.properties import Property, PropertyRegistry
+from hospitality_agent.resort_knowledge import RESORT_INFO_PATH
+from hospitality_agent.tool_cache import get_tool_cache
+
+ROOMS_PER_TYPE = 50
+MODES = ("sharded", "shared")
+
+
+class _Session:
+    def __init__(self, session_id: str):
+        self.id = session_id
+
+
+class BenchToolContext:
+    """What the tools read from ADK's ToolContext: state, user and session."""
+
+    def __init__(self, property_id: str, user_id: str, session_id: str):
+        self.state = {properties.PROPERTY_STATE_KEY: property_id}
+        self.user_id = user_id
+        self.session = _Session(session_id)
+
+
+class SharedStoreProperty(Property):
+    """A property whose inventory lives in one store shared by all properties."""
+
+    shared_store = None
+
+    def booking_store(self):
+        return self.shared_store
+
+
+class SharedStoreRegistry(PropertyRegistry):
+    property_class = SharedStoreProperty
+
+
+def create_properties(root: Path, count: int) -> list:
+    resort_info = json.loads(RESORT_INFO_PATH.read_text(encoding="utf-8"))
+    property_ids = []
+    for i in range(count):
+        property_id = f"resort-{i:04d}"
+        directory = root / property_id
+        directory.mkdir(parents=True)
+        info = dict(resort_info, resort_name=f"Resort {i:04d}")
+        (directory / "resort_info.json").write_text(json.dumps(info), encoding="utf-8")
+        store = BookingStore(path=directory / "bookings.db", workbook_path=directory / "missing.xlsx")
+        _seed(store, INVENTORY_DAYS, ROOMS_PER_TYPE)
+        store.close()
+        property_ids.append(property_id)
+    return property_ids
+
+
+def _stay(rnd: random.Random) -> tuple:
+    check_in = START + timedelta(days=rnd.randrange(INVENTORY_DAYS - 5))
+    return check_in.isoformat(), (check_in + timedelta(days=rnd.randint(1, 4))).isoformat()
+
+
+def _availability(property_id: str, rnd: random.Random) -> float:
+    check_in, check_out = _stay(rnd)
+    context = BenchToolContext(property_id, "bench", "bench")
+    started = time.perf_counter()
+    # Held like a turn holds it (main.py), so it is not evicted mid-call
+    with properties.get_properties().in_use(property_id):
+        result = booking_availability_tool(tool_context=context, check_in_date=check_in, check_out_date=check_out)
+    elapsed = time.perf_counter() - started
+    assert "error" not in result, result
+    return elapsed
+
+
+def _book(property_id: str, rnd: random.Random, guest: str) -> float:
+    check_in, check_out = _stay(rnd)
+    context = BenchToolContext(property_id, guest, f"{guest}-{rnd.random()}")
+    started = time.perf_counter()
+    with properties.get_properties().in_use(property_id):
+        book_room_tool(tool_context=context, booking_criteria={
+            "room_type": rnd.choice(ROOM_TYPES), "check_in_date": check_in,
+            "check_out_date": check_out, "number_of_rooms": 1,
+        })
+    return time.perf_counter() - started
+
+
+def _zipf_weights(count: int, s: float = 1.1) -> list:
+    return [1 / (rank ** s) for rank in range(1, count + 1)]
+
+
+def run(mode: str, property_ids: list, root: Path, max_loaded: int, threads: int,
+        calls_per_thread: int, storm_threads: int, seed: int) -> dict:
+    if mode == "sharded":
+        registry = PropertyRegistry(properties_dir=root, max_loaded=max_loaded)
+    else:
+        SharedStoreProperty.shared_store = BookingStore(path=root / "shared.db", workbook_path=root / "missing.xlsx")
+        # Same inventory rows for everyone: one store, one generation counter
+        _seed(SharedStoreProperty.shared_store, INVENTORY_DAYS, ROOMS_PER_TYPE * len(property_ids))
+        registry = SharedStoreRegistry(properties_dir=root, max_loaded=max_loaded)
+    properties._properties = registry
+    rnd = random.Random(seed)
+    result = {"mode": mode, "properties": len(property_ids), "max_loaded": max_loaded}
+
+    # 1. Cold (first call loads the property) vs warm, on a sample
+    sample = rnd.sample(property_ids, min(50, len(property_ids)))
+    result["cold"] = _percentiles([_availability(p, rnd) for p in sample])
+    result["warm"] = _percentiles([_availability(p, rnd) for p in sample])
+
+    # 2. Zipf traffic over every property, availability checks + bookings
+    weights = _zipf_weights(len(property_ids))
+    availability_latencies, booking_latencies = [], []
+    lock = threading.Lock()
+
+    def guest(worker: int):
+        local = random.Random(seed + worker)
+        checks, books = [], []
+        for _ in range(calls_per_thread):
+            property_id = local.choices(property_ids, weights)[0]
+            if local.random() < 0.2:
+                books.append(_book(property_id, local, f"guest-{worker}"))
+            else:
+                checks.append(_availability(property_id, local))
+        with lock:
+            availability_latencies.extend(checks)
+            booking_latencies.extend(books)
+
+    workers = [threading.Thread(target=guest, args=(w,)) for w in range(threads)]
+    started = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    result["mixed"] = {
+        "calls_per_sec": round(threads * calls_per_thread / (time.perf_counter() - started), 1),
+        "availability": _percentiles(availability_latencies),
+        "booking": _percentiles(booking_latencies),
+        "registry": registry.stats(),
+    }
+
+    # 3. Quiet properties, alone and while one hot property takes a booking storm
+    hot, quiet = property_ids[0], property_ids[1:9]
+    for p in quiet:
+        _availability(p, rnd)
+    result["quiet_alone"] = _percentiles([_availability(rnd.choice(quiet), rnd) for _ in range(400)])
+
+    storming = True
+
+    def storm(worker: int):
+        local = random.Random(-worker - 1)
+        while storming:
+            _book(hot, local, f"storm-{worker}")
+
+    storms = [threading.Thread(target=storm, args=(w,)) for w in range(storm_threads)]
+    for t in storms:
+        t.start()
+    try:
+        during = []
+        for _ in range(400):
+            during.append(_availability(rnd.choice(quiet), rnd))
+            # Paced like real guests, leaving the storm room to run
+            time.sleep(0.001)
+    finally:
+        storming = False
+        for t in storms:
+            t.join()
+    result["quiet_during_storm"] = _percentiles(during)
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--properties", type=int, default=300)
+    parser.add_argument("--max-loaded", type=int, default=properties.MAX_LOADED_PROPERTIES)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--calls-per-thread", type=int, default=250)
+    parser.add_argument("--storm-threads", type=int, default=4)
+    parser.add_argument("--mode", choices=MODES, nargs="+", default=list(MODES))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    get_tool_cache().enabled = False
+    results = []
+    for mode in args.mode:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            property_ids = create_properties(root, args.properties)
+            # Tool logging goes to stderr so stdout stays valid JSON
+            with contextlib.redirect_stdout(sys.stderr):
+                results.append(run(mode, property_ids, root, args.max_loaded, args.threads,
+                                   args.calls_per_thread, args.storm_threads, args.seed))
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,213 @@
+"""Load test for the HTTP/SSE server: concurrent conversations per instance.
+
+Starts server.py under uvicorn (N worker processes) with ScriptedLlm in
+place of Gemini, a temporary session DB and a seeded temporary booking
+store, then runs C simulated guests at once. Every guest holds a
+hospitality conversation (info / availability / booking, see
+benchmarks/turn_latency.py) over /v1/query/stream and starts the next
+one as soon as it finishes.
+
+Reports turns/sec, time to first streamed chunk, full turn latency and
+how many requests the server turned away (503) per concurrency level.
+--url points the clients at an already running server instead (real
+model, nothing is started).
+
+Run from agents/Hospitality_Agent:
+    python -m benchmarks.server_load --concurrency 10 50 200 --workers 2
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.turn_latency import _percentiles
+from server import KEEP_ALIVE_SECONDS
+
+AGENT_DIR = Path(__file__).resolve().parents[1]
+STARTUP_TIMEOUT_SECONDS = 60
+
+# Passed to the server processes (see scripted_app)
+BENCH_DIR_ENV = "SERVER_LOAD_DIR"
+MODEL_LATENCY_ENV = "SERVER_LOAD_MODEL_LATENCY_MS"
+
+
+def scripted_app():
+    """uvicorn factory: server.app wired to ScriptedLlm and the benchmark's temp files."""
+    from benchmarks.turn_latency import ScriptedLlm
+    from hospitality_agent import availability, booking_store
+    from hospitality_agent.booking_store import BookingStore
+    import main
+    import server
+
+    tmp = Path(os.environ[BENCH_DIR_ENV])
+    store = BookingStore(path=tmp / "bookings.db", workbook_path=tmp / "missing.xlsx")
+    booking_store._booking_store = store
+    availability._availability_index = availability.AvailabilityIndex(store)
+    main.root_agent.model = ScriptedLlm(latency_ms=float(os.environ[MODEL_LATENCY_ENV]))
+    main.DB_URL = f"sqlite+aiosqlite:///{tmp / 'sessions.db'}"
+    return server.app
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(tmp: Path, workers: int, model_latency_ms: float, max_active: int) -> tuple:
+    from benchmarks.booking_contention import _seed
+    from benchmarks.turn_latency import INVENTORY_DAYS, ROOMS_PER_TYPE
+    from hospitality_agent.booking_store import BookingStore
+
+    store = BookingStore(path=tmp / "bookings.db", workbook_path=tmp / "missing.xlsx")
+    _seed(store, INVENTORY_DAYS, ROOMS_PER_TYPE)
+    store.close()
+
+    port = _free_port()
+    env = {
+        **os.environ,
+        BENCH_DIR_ENV: str(tmp),
+        MODEL_LATENCY_ENV: str(model_latency_ms),
+        "MAX_CONCURRENT_TURNS": str(max_active),
+        "SESSION_COMPACTION": "0",
+    }
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.server_load:scripted_app", "--factory",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+         "--timeout-keep-alive", str(KEEP_ALIVE_SECONDS)],
+        cwd=AGENT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=sys.stderr,
+    )
+
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("server exited during startup")
+        try:
+            if httpx.get(f"{url}/healthz", timeout=1).status_code == 200:
+                return process, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("server did not start in time")
+
+
+def _hospitality_conversation(rnd: random.Random) -> list:
+    from benchmarks.turn_latency import scripted_conversation
+    from main import APP_NAME
+
+    while True:
+        app_name, messages = scripted_conversation(rnd)
+        if app_name == APP_NAME:
+            return messages
+
+
+async def _turn(client: httpx.AsyncClient, url: str, user_id: str, text: str, stats: dict):
+    started = time.perf_counter()
+    try:
+        return await _stream_turn(client, url, user_id, text, stats, started)
+    except httpx.TransportError as e:
+        print(f"Turn failed: {e!r}", file=sys.stderr)
+        stats["errors"] += 1
+        return True
+
+
+async def _stream_turn(client, url, user_id, text, stats, started) -> bool:
+    async with client.stream("POST", f"{url}/v1/query/stream", json={"user_id": user_id, "text": text}) as response:
+        if response.status_code == 503:
+            stats["rejected"] += 1
+            await asyncio.sleep(float(response.headers.get("Retry-After", "1")))
+            return False
+        response.raise_for_status()
+        first_chunk = None
+        event = None
+        async for line in response.aiter_lines():
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+                if event == "error":
+                    stats["errors"] += 1
+            elif line.startswith("data:") and event is None and first_chunk is None:
+                first_chunk = time.perf_counter() - started
+    if first_chunk is not None:
+        stats["first_chunk"].append(first_chunk)
+    stats["turn"].append(time.perf_counter() - started)
+    return True
+
+
+async def _load(url: str, concurrency: int, duration: float, seed: int) -> dict:
+    stats = {"turn": [], "first_chunk": [], "rejected": 0, "errors": 0, "conversations": 0}
+    deadline = time.perf_counter() + duration
+
+    async def guest(client: httpx.AsyncClient, worker: int):
+        rnd = random.Random(seed * 100_003 + worker)
+        conversation = 0
+        while time.perf_counter() < deadline:
+            user_id = f"load-{seed}-{worker}-{conversation}"
+            for text in _hospitality_conversation(rnd):
+                # Retry turned-away turns; a conversation can't skip a message
+                while not await _turn(client, url, user_id, text, stats):
+                    pass
+            stats["conversations"] += 1
+            conversation += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=httpx.Timeout(30.0, read=300.0)) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(guest(client, w) for w in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 2),
+        "conversations": stats["conversations"],
+        "turns": len(stats["turn"]),
+        "turns_per_sec": round(len(stats["turn"]) / elapsed, 1),
+        "turn_latency": _percentiles(stats["turn"]),
+        "first_chunk": _percentiles(stats["first_chunk"]),
+        "rejected_503": stats["rejected"],
+        "errors": stats["errors"],
+    }
+
+
+def run(levels: list, duration: float, workers: int, model_latency_ms: float,
+        max_active: int, seed: int, url: str = None) -> list:
+    if url:
+        return [asyncio.run(_load(url.rstrip("/"), c, duration, seed + i)) for i, c in enumerate(levels)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        process, server_url = start_server(Path(tmp), workers, model_latency_ms, max_active)
+        try:
+            results = [asyncio.run(_load(server_url, c, duration, seed + i)) for i, c in enumerate(levels)]
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+    for result in results:
+        result.update(workers=workers, model_latency_ms=model_latency_ms, max_concurrent_turns=max_active)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 200],
+                        help="simultaneous conversations")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per concurrency level")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--model-latency-ms", type=float, default=300.0, help="simulated model round trip")
+    parser.add_argument("--max-concurrent-turns", type=int, default=32, help="per worker")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", help="load an already running server instead of starting one")
+    args = parser.parse_args()
+
+    results = run(args.concurrency, args.duration, args.workers, args.model_latency_ms,
+                  args.max_concurrent_turns, args.seed, args.url)
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,161 @@
+"""Analytics export benchmark: memory and time of session_export.py as the DB grows.
+
+Builds a template session DB from real hospitality conversations (Runner,
+tools and session service; ScriptedLlm as the model), then copies its
+sessions and events into larger databases, one copy per earlier day, so
+the export also covers many date partitions.
+
+For every size reports a full export (rows/sec, peak Python heap from
+tracemalloc, Arrow memory pool peak) and then a nightly incremental run
+after one more day of conversations is added: only the new rows are
+read, so its time follows the day's traffic, not the database.
+
+Run from agents/Hospitality_Agent:
+    python -m benchmarks.session_export --days 10 50 200
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from google.adk.runners import Runner
+from google.genai import types
+
+from benchmarks.booking_contention import _seed
+from benchmarks.turn_latency import INVENTORY_DAYS, ROOMS_PER_TYPE, ScriptedLlm, scripted_conversation
+from hospitality_agent import availability, booking_store
+from hospitality_agent.agent import root_agent
+from hospitality_agent.booking_store import BookingStore
+from main import APP_NAME
+from session_export import SessionExporter
+from session_storage import TunedSessionService
+
+USERS = 20
+
+
+async def _conversations(db_path: Path, conversations: int, seed: int):
+    service = TunedSessionService(db_url=f"sqlite+aiosqlite:///{db_path}")
+    runner = Runner(agent=root_agent, app_name=APP_NAME, session_service=service)
+    rnd = random.Random(seed)
+    for i in range(conversations):
+        app_name, messages = scripted_conversation(rnd)
+        while app_name != APP_NAME:
+            app_name, messages = scripted_conversation(rnd)
+        session = await service.create_session(app_name=APP_NAME, user_id=f"guest-{i % USERS}")
+        for text in messages:
+            async for _ in runner.run_async(user_id=session.user_id, session_id=session.id,
+                                            new_message=types.Content(role="user", parts=[types.Part(text=text)])):
+                pass
+    await service.close()
+
+
+def build_template(tmp: Path, conversations: int, seed: int) -> Path:
+    """One day of real conversations in a fresh session DB."""
+    store = BookingStore(path=tmp / "bookings.db", workbook_path=tmp / "missing.xlsx")
+    _seed(store, INVENTORY_DAYS, ROOMS_PER_TYPE)
+    booking_store._booking_store = store
+    availability._availability_index = availability.AvailabilityIndex(store)
+    root_agent.model = ScriptedLlm()
+
+    db_path = tmp / "template.db"
+    # Tool / router logging goes to stderr so stdout stays valid JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        asyncio.run(_conversations(db_path, conversations, seed))
+    store.close()
+    return db_path
+
+
+def add_day(conn: sqlite3.Connection, days_back: int):
+    """Copies the template's sessions and events, shifted `days_back` days earlier."""
+    suffix = f"-d{days_back}"
+    shift = f"-{days_back} days"
+    conn.execute(
+        "INSERT INTO sessions SELECT app_name, user_id, id || ?, state, "
+        "strftime('%Y-%m-%d %H:%M:%f', create_time, ?), strftime('%Y-%m-%d %H:%M:%f', update_time, ?) "
+        "FROM template.sessions",
+        (suffix, shift, shift),
+    )
+    conn.execute(
+        "INSERT INTO events SELECT id || ?, app_name, user_id, session_id || ?, invocation_id || ?, "
+        "strftime('%Y-%m-%d %H:%M:%f', timestamp, ?), event_data FROM template.events",
+        (suffix, suffix, suffix, shift),
+    )
+    conn.commit()
+
+
+def _export(exporter: SessionExporter) -> dict:
+    import pyarrow as pa
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    report = exporter.run_once()
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rows = report["events"]["rows"]
+    return {
+        "event_rows": rows,
+        "files": sum(report[table]["files"] for table in ("events", "sessions", "user_states")),
+        "seconds": round(seconds, 2),
+        "event_rows_per_sec": round(rows / seconds) if seconds else 0,
+        "python_peak_mb": round(peak / 2**20, 1),
+        # Process-wide high-water mark of Arrow buffers
+        "arrow_pool_peak_mb": round(pa.default_memory_pool().max_memory() / 2**20, 1),
+    }
+
+
+def run(days: int, conversations: int, chunk_rows: int, file_format: str, seed: int,
+        template: Path = None) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        template = template or build_template(tmp, conversations, seed)
+        db_path = tmp / "sessions.db"
+        # Empty copy of the template schema
+        conn = sqlite3.connect(db_path)
+        conn.execute("ATTACH DATABASE ? AS template", (str(template),))
+        for (sql,) in conn.execute("SELECT sql FROM template.sqlite_master WHERE type = 'table' AND sql IS NOT NULL").fetchall():
+            conn.execute(sql)
+        conn.execute("INSERT INTO user_states SELECT * FROM template.user_states")
+        for days_back in range(days, 0, -1):
+            add_day(conn, days_back)
+
+        exporter = SessionExporter(db_path, export_dir=tmp / "export", archive_dir=tmp / "archive",
+                                   file_format=file_format, chunk_rows=chunk_rows, settle_seconds=0)
+        full = _export(exporter)
+        # Tonight's traffic: the template day itself
+        add_day(conn, 0)
+        conn.close()
+        incremental = _export(exporter)
+
+        (total_events,) = sqlite3.connect(db_path).execute("SELECT COUNT(*) FROM events").fetchone()
+        return {
+            "days": days + 1,
+            "events_in_db": total_events,
+            "db_mb": round(db_path.stat().st_size / 2**20, 1),
+            "full": full,
+            "incremental": incremental,
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--conversations", type=int, default=30, help="Conversations per day")
+    parser.add_argument("--chunk-rows", type=int, default=5000)
+    parser.add_argument("--format", choices=("parquet", "arrow"), default="parquet")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # One template for every size, so only the number of days changes
+        template = build_template(Path(tmp), args.conversations, args.seed)
+        results = [run(days, args.conversations, args.chunk_rows, args.format, args.seed, template=template)
+                   for days in args.days]
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,240 @@
+"""Session sharding benchmark: write throughput vs shard count, and an online rebalance.
+
+throughput - --workers processes (like SERVER_WORKERS) each run
+             --sessions conversations appending --events events
+             through the session service main.py builds for
+             SESSION_SHARDS=N (one TunedSessionService per SQLite
+             file, users spread by session_sharding.py). Reports
+             events/sec over all processes and append latency, per
+             --shards N.
+
+             Every COMMIT holds its DB's write lock for an extra
+             --commit-latency-ms (slept in the connection's thread,
+             so the event loop keeps running), as an fsync on a
+             network disk does. With 0, commits only cost CPU; on a
+             single core, more shards then just mean smaller group
+             commits.
+
+             Each process group-commits the events of its own
+             conversations (session_storage.py), so the write lock
+             matters most with many processes and few conversations
+             each (the default); with many conversations per process
+             the batches already amortize it.
+
+rebalance  - one process with --rebalance-users users on 2 shards adds
+             a third while --rebalance-sessions conversations keep
+             appending. Reports append latency before / during / after
+             the move, how long the move took, and checks that every
+             user ended up on its owner with no event lost.
+
+Run from agents/Hospitality_Agent:
+    python -m benchmarks.session_sharding --shards 1 2 4 8 --workers 8
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import multiprocessing
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import event as sa_event
+
+from benchmarks.session_storage import APP_NAME, _event
+from benchmarks.turn_latency import _percentiles
+from session_sharding import ShardedSessionService, shard_urls
+from session_storage import TunedSessionService
+
+
+def _slow_commits(service: TunedSessionService, latency_ms: float):
+    """Makes every COMMIT on the service's connections take latency_ms longer."""
+    def on_connect(dbapi_connection, connection_record):
+        def trace(statement):
+            if statement == "COMMIT":
+                time.sleep(latency_ms / 1000)
+        # The sqlite3 connection behind aiosqlite; the callback runs in its thread
+        dbapi_connection._connection._conn.set_trace_callback(trace)
+
+    if latency_ms > 0:
+        sa_event.listen(service.db_engine.sync_engine, "connect", on_connect)
+    return service
+
+
+def _db_url(db_dir: Path) -> str:
+    return f"sqlite+aiosqlite:///{db_dir / 'sessions.db'}"
+
+
+def _service(db_dir: Path, shards: int, commit_latency_ms: float):
+    """The session service main.py builds for SESSION_SHARDS=shards."""
+    services = {name: _slow_commits(TunedSessionService(db_url=url), commit_latency_ms)
+                for name, url in shard_urls(_db_url(db_dir), shards).items()}
+    return ShardedSessionService(services) if len(services) > 1 else services["shard-0"]
+
+
+async def _conversations(service, sessions: list, events: int, seed: int, latencies: list):
+    async def conversation(session, index: int):
+        rnd = random.Random(seed + index)
+        for position in range(events):
+            started = time.perf_counter()
+            await service.append_event(session, _event(rnd, position // 2, position))
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(conversation(session, i) for i, session in enumerate(sessions)))
+
+
+# ----------------------------------------------------------------
+# Throughput
+# ----------------------------------------------------------------
+async def _write(db_dir: Path, shards: int, commit_latency_ms: float, worker: int, sessions: int, events: int,
+                 seed: int, barrier) -> dict:
+    service = _service(db_dir, shards, commit_latency_ms)
+    live = [await service.create_session(app_name=APP_NAME, user_id=f"guest-{worker}-{i}", state={"resort_name": "bench"})
+            for i in range(sessions)]
+    # Every process starts writing at the same time
+    await asyncio.get_running_loop().run_in_executor(None, barrier.wait)
+    latencies = []
+    started = time.time()
+    await _conversations(service, live, events, seed + worker * sessions, latencies)
+    finished = time.time()
+    await service.close()
+    return {"started": started, "finished": finished, "latencies": latencies}
+
+
+def _writer(args: tuple, barrier, results):
+    with contextlib.redirect_stdout(sys.stderr):
+        results.put(asyncio.run(_write(*args, barrier)))
+
+
+def run_throughput(shards: int, workers: int, sessions: int, events: int, commit_latency_ms: float,
+                   seed: int) -> dict:
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_dir = Path(tmp)
+
+        async def prepare():
+            # Create every shard's tables up front, not racing in the workers
+            service = _service(db_dir, shards, 0)
+            await service.prepare_tables()
+            await service.close()
+
+        with contextlib.redirect_stdout(sys.stderr):
+            asyncio.run(prepare())
+
+        barrier = context.Barrier(workers)
+        results = context.Queue()
+        processes = [context.Process(target=_writer, args=(
+            (db_dir, shards, commit_latency_ms, worker, sessions, events, seed), barrier, results))
+            for worker in range(workers)]
+        for process in processes:
+            process.start()
+        reports = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+    elapsed = max(r["finished"] for r in reports) - min(r["started"] for r in reports)
+    total = sum(len(r["latencies"]) for r in reports)
+    return {
+        "shards": shards,
+        "workers": workers,
+        "commit_latency_ms": commit_latency_ms,
+        "events": total,
+        "events_per_sec": round(total / elapsed, 1),
+        "append": _percentiles([seconds for r in reports for seconds in r["latencies"]]),
+    }
+
+
+# ----------------------------------------------------------------
+# Online rebalance
+# ----------------------------------------------------------------
+HISTORY_EVENTS = 10
+
+
+async def _rebalance(db_dir: Path, users: int, sessions: int, commit_latency_ms: float, seed: int) -> dict:
+    service = _service(db_dir, 2, commit_latency_ms)
+    rnd = random.Random(seed)
+    # Users with some history to move
+    created = []
+    for i in range(users):
+        session = await service.create_session(app_name=APP_NAME, user_id=f"guest-{i}", state={"resort_name": "bench"})
+        for position in range(HISTORY_EVENTS):
+            await service.append_event(session, _event(rnd, position // 2, position))
+        created.append(session)
+    live = rnd.sample(created, sessions)
+
+    latencies = []
+    appended = {session.id: HISTORY_EVENTS for session in live}
+    stop = asyncio.Event()
+
+    async def conversation(session, index: int):
+        rnd = random.Random(seed + index)
+        while not stop.is_set():
+            position = appended[session.id]
+            started = time.perf_counter()
+            await service.append_event(session, _event(rnd, position // 2, position))
+            latencies.append((time.perf_counter(), time.perf_counter() - started))
+            appended[session.id] += 1
+
+    writing = asyncio.gather(*(conversation(session, i) for i, session in enumerate(live)))
+    await asyncio.sleep(1.0)
+    add_started = time.perf_counter()
+    await service.add_shard("shard-2", _slow_commits(
+        TunedSessionService(db_url=shard_urls(_db_url(db_dir), 3)["shard-2"]), commit_latency_ms))
+    routed = time.perf_counter()
+    while service.stats()["users_to_move"]:
+        await asyncio.sleep(0.01)
+    moved = time.perf_counter()
+    await asyncio.sleep(1.0)
+    stop.set()
+    await writing
+
+    # Every user's rows are on its owner, and no event was lost
+    placed = True
+    for name, shard in service.shards.items():
+        placed = placed and all(service.ring.owner(user_id) == name for user_id in await service._user_ids(shard))
+    found = {session.id: len((await service.get_session(app_name=APP_NAME, user_id=session.user_id,
+                                                        session_id=session.id)).events) for session in live}
+    stats = service.stats()
+    await service.close()
+
+    return {
+        "users": users,
+        "writing_sessions": sessions,
+        "users_moved": stats["users_moved"],
+        "events_moved": stats["events_moved"],
+        "add_shard_ms": round((routed - add_started) * 1000, 2),
+        "move_seconds": round(moved - add_started, 2),
+        "append_before": _percentiles([seconds for at, seconds in latencies if at < add_started]),
+        "append_during": _percentiles([seconds for at, seconds in latencies if add_started <= at <= moved]),
+        "append_after": _percentiles([seconds for at, seconds in latencies if at > moved]),
+        "all_users_on_owner": placed,
+        "no_events_lost": found == appended,
+    }
+
+
+def run_rebalance(users: int, sessions: int, commit_latency_ms: float, seed: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        with contextlib.redirect_stdout(sys.stderr):
+            return asyncio.run(_rebalance(Path(tmp), users, sessions, commit_latency_ms, seed))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--sessions", type=int, default=1, help="conversations per worker")
+    parser.add_argument("--events", type=int, default=100, help="events per conversation")
+    parser.add_argument("--commit-latency-ms", type=float, default=0.0)
+    parser.add_argument("--rebalance-users", type=int, default=2000)
+    parser.add_argument("--rebalance-sessions", type=int, default=25)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(json.dumps({
+        "throughput": [run_throughput(shards, args.workers, args.sessions, args.events, args.commit_latency_ms,
+                                      args.seed) for shards in args.shards],
+        "rebalance": run_rebalance(args.rebalance_users, args.rebalance_sessions, args.commit_latency_ms,
+                                   args.seed),
+    }, indent=2))
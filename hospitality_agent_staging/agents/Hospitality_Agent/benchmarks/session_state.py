@@ -0,0 +1,167 @@
+"""Session state benchmark: reading state through the write-through cache vs full sessions.
+
+Fills a session DB (temporary SQLite file) with --sessions sessions of
+--events events each, every event carrying a small state_delta, through
+TunedSessionService. Then reads every session's state:
+
+    get_session        - what display_state used to do: the session
+                         with all its events
+    state_cold         - get_session_state with an empty cache
+                         (state columns only, no events)
+    state_warm         - get_session_state served by the cache
+    bulk_*             - the same for all sessions in one
+                         get_session_states call (one query per state
+                         table per 500 sessions)
+
+and times append_event with the cache on and off, since every commit
+now also applies its delta to the cache. It also checks that the
+compactor's conversation summary (written straight to the DB) is what
+cached state reads return afterwards.
+
+Run from agents/Hospitality_Agent:
+    python -m benchmarks.session_state --sessions 1000 --events 30
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from benchmarks.turn_latency import _percentiles
+from main import APP_NAME
+from session_compaction import SUMMARY_STATE_KEY, SessionCompactor
+from session_storage import TunedSessionService
+
+USERS = 50
+
+
+def _event(session_index: int, event_index: int) -> Event:
+    return Event(
+        invocation_id=f"e-{session_index}-{event_index}",
+        author="user",
+        content=types.Content(role="user", parts=[types.Part(text=f"Message {event_index} " + "x" * 200)]),
+        actions=EventActions(state_delta={
+            "turns": event_index,
+            "router_sticky_turns": event_index % 3,
+            "user:last_seen_turn": event_index,
+        }),
+    )
+
+
+async def _fill(service: TunedSessionService, sessions: int, events: int) -> list:
+    created = []
+
+    async def one(i: int):
+        session = await service.create_session(
+            app_name=APP_NAME, user_id=f"guest-{i % USERS}",
+            state={"resort_name": "Happy Resort", "location": "Pune", "property_id": "default"},
+        )
+        for j in range(events):
+            await service.append_event(session, _event(i, j))
+        created.append((session.user_id, session.id))
+
+    # Concurrent sessions, like live traffic (appends are group-committed)
+    for start in range(0, sessions, 100):
+        await asyncio.gather(*(one(i) for i in range(start, min(sessions, start + 100))))
+    return created
+
+
+async def _time_each(keys: list, read) -> dict:
+    seconds = []
+    for user_id, session_id in keys:
+        started = time.perf_counter()
+        await read(user_id, session_id)
+        seconds.append(time.perf_counter() - started)
+    return _percentiles(seconds)
+
+
+async def _time_once(coro) -> float:
+    started = time.perf_counter()
+    await coro
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+async def _append_latency(service: TunedSessionService, enabled: bool, count: int) -> dict:
+    service.state_cache.enabled = enabled
+    session = await service.create_session(app_name=APP_NAME, user_id="writer", state={})
+    seconds = []
+    for j in range(count):
+        started = time.perf_counter()
+        await service.append_event(session, _event(-1, j))
+        seconds.append(time.perf_counter() - started)
+    service.state_cache.enabled = True
+    return _percentiles(seconds)
+
+
+async def _run(db_path: Path, sessions: int, events: int, appends: int) -> dict:
+    service = TunedSessionService(db_url=f"sqlite+aiosqlite:///{db_path}")
+    started = time.perf_counter()
+    keys = await _fill(service, sessions, events)
+    fill_seconds = time.perf_counter() - started
+    cache = service.state_cache
+
+    async def full(user_id, session_id):
+        return (await service.get_session(app_name=APP_NAME, user_id=user_id, session_id=session_id)).state
+
+    async def state(user_id, session_id):
+        return await service.get_session_state(app_name=APP_NAME, user_id=user_id, session_id=session_id)
+
+    result = {"sessions": sessions, "events_per_session": events, "fill_seconds": round(fill_seconds, 1)}
+
+    cache.clear()
+    result["get_session"] = await _time_each(keys, full)
+    cache.clear()
+    result["state_cold"] = await _time_each(keys, state)
+    result["state_warm"] = await _time_each(keys, state)
+
+    # Same answers either way
+    cache.clear()
+    expected = {key: await full(*key) for key in keys[:50]}
+    cache.clear()
+    assert await service.get_session_states(app_name=APP_NAME, sessions=keys[:50]) == expected
+
+    cache.clear()
+    result["bulk_get_session_ms"] = await _time_once(asyncio.gather(*(full(*key) for key in keys)))
+    cache.clear()
+    result["bulk_state_cold_ms"] = await _time_once(service.get_session_states(app_name=APP_NAME, sessions=keys))
+    result["bulk_state_warm_ms"] = await _time_once(service.get_session_states(app_name=APP_NAME, sessions=keys))
+
+    # The compactor trims turns beyond MAX_LIVE_INVOCATIONS and writes the
+    # summary to the DB; through on_trim the warm cache returns it too
+    await service.get_session_states(app_name=APP_NAME, sessions=keys[:50])
+    compactor = SessionCompactor(
+        db_path, archive_dir=db_path.parent / "archive",
+        on_trim=lambda app_name, user_id, session_id, summary: cache.update_session(
+            (app_name, user_id, session_id), {SUMMARY_STATE_KEY: summary}))
+    result["compaction"] = compactor.run_once(pause=0)
+    compactor.close()
+    cached = await service.get_session_states(app_name=APP_NAME, sessions=keys[:50])
+    cache.clear()
+    stored = {key: await full(*key) for key in keys[:50]}
+    assert cached == stored
+    assert events <= compactor.max_live_invocations or all(SUMMARY_STATE_KEY in state for state in cached.values())
+
+    result["append_event_cache_off"] = await _append_latency(service, False, appends)
+    result["append_event_cache_on"] = await _append_latency(service, True, appends)
+    result["cache"] = cache.stats()
+    await service.close()
+    return result
+
+
+def run(sessions: int, events: int, appends: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        return asyncio.run(_run(Path(tmp) / "sessions.db", sessions, events, appends))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--events", type=int, default=30)
+    parser.add_argument("--appends", type=int, default=300)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.sessions, args.events, args.appends), indent=2))
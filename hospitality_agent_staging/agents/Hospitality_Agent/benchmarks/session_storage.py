@@ -0,0 +1,126 @@
+"""Append benchmark for the session store: stock ADK vs tuned (WAL + group commit).
+
+N sessions append events concurrently (each session one after another,
+like a conversation), while a few readers keep loading random sessions.
+Reports events/sec and append / read latency percentiles for both modes:
+
+    default - DatabaseSessionService as shipped (rollback journal,
+              one transaction per event)
+    tuned   - session_storage.TunedSessionService
+
+Run from agents/Hospitality_Agent:
+    python -m benchmarks.session_storage --sessions 1 10 100
+"""
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from benchmarks.turn_latency import _percentiles
+from session_storage import TunedSessionService
+
+APP_NAME = "Hospitality Agent"
+MODES = ("default", "tuned")
+
+# One reader per this many sessions (at least one), each loading a session
+# every READ_INTERVAL_SECONDS (paced, so reads don't just starve the loop)
+SESSIONS_PER_READER = 10
+READ_INTERVAL_SECONDS = 0.02
+
+
+def _event(rnd: random.Random, turn: int, position: int) -> Event:
+    author = "user" if position % 2 == 0 else "hospitality_agent"
+    text = " ".join(rnd.choice(("room", "suite", "pool", "spa", "dates", "nights", "breakfast", "view"))
+                    for _ in range(rnd.randint(8, 60)))
+    state_delta = {"last_turn": turn} if position % 2 else {}
+    return Event(
+        invocation_id=f"inv-{turn}",
+        author=author,
+        content=types.Content(role="user" if author == "user" else "model", parts=[types.Part(text=text)]),
+        actions=EventActions(state_delta=state_delta),
+    )
+
+
+async def _run(mode: str, sessions: int, events_per_session: int, db_path: Path, seed: int) -> dict:
+    service = TunedSessionService(db_url=f"sqlite+aiosqlite:///{db_path}", tuned=mode == "tuned")
+    live = [
+        await service.create_session(app_name=APP_NAME, user_id=f"user-{i}", state={"resort_name": "bench"})
+        for i in range(sessions)
+    ]
+
+    append_latencies = []
+    read_latencies = []
+    writing = True
+
+    async def conversation(session, worker: int):
+        rnd = random.Random(seed + worker)
+        for position in range(events_per_session):
+            event = _event(rnd, position // 2, position)
+            started = time.perf_counter()
+            await service.append_event(session, event)
+            append_latencies.append(time.perf_counter() - started)
+
+    async def reader(worker: int):
+        rnd = random.Random(seed - worker - 1)
+        while writing:
+            session = rnd.choice(live)
+            started = time.perf_counter()
+            await service.get_session(app_name=APP_NAME, user_id=session.user_id, session_id=session.id)
+            read_latencies.append(time.perf_counter() - started)
+            await asyncio.sleep(READ_INTERVAL_SECONDS)
+
+    readers = [asyncio.create_task(reader(w)) for w in range(max(1, sessions // SESSIONS_PER_READER))]
+    started = time.perf_counter()
+    await asyncio.gather(*(conversation(session, i) for i, session in enumerate(live)))
+    elapsed = time.perf_counter() - started
+    writing = False
+    await asyncio.gather(*readers)
+
+    stored = 0
+    for session in live:
+        loaded = await service.get_session(app_name=APP_NAME, user_id=session.user_id, session_id=session.id)
+        stored += len(loaded.events)
+    await service.close()
+
+    appended = sessions * events_per_session
+    result = {
+        "mode": mode,
+        "sessions": sessions,
+        "events": appended,
+        "seconds": round(elapsed, 3),
+        "events_per_sec": round(appended / elapsed, 1),
+        "append": _percentiles(append_latencies),
+        "read": _percentiles(read_latencies),
+        "all_events_stored": stored == appended,
+    }
+    if service.tuned:
+        result["group_commits"] = service.metrics["group_commits"]
+        result["max_batch"] = service.metrics["max_batch"]
+    return result
+
+
+def run(mode: str, sessions: int, events_per_session: int, seed: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        return asyncio.run(_run(mode, sessions, events_per_session, Path(tmp) / "sessions.db", seed))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--events-per-session", type=int, default=40)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    results = [
+        run(mode, n, args.events_per_session, args.seed)
+        for n in args.sessions
+        for mode in args.modes
+    ]
+    print(json.dumps(results, indent=2))
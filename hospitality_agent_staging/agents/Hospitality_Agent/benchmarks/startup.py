@@ -0,0 +1,149 @@
+"""Cold-start benchmark: import time and time to the first response.
+
+Every run is a fresh interpreter (like a new Cloud Run instance) with an
+empty session DB and an empty booking store, so the first turn pays for
+everything a new container does. Inside the child:
+
+    import_ms          import main (agent, tools, ADK)
+    warm_up_ms         main.warm_up() (only in the "+warm_up" modes)
+    first_response_ms  first turn of a new guest (session lookup,
+                       inventory load, tool declarations, one answer)
+    second_response_ms the same guest's next turn
+
+Modes:
+    workbook  inventory parsed from booking_db.xlsx (pandas + openpyxl)
+    snapshot  inventory from the build-time snapshot
+              (python -m hospitality_agent.data_snapshot; built
+              first if it is missing or stale)
+
+The model is ScriptedLlm (benchmarks/turn_latency.py), so only our own
+startup work is measured.
+
+Run from agents/Hospitality_Agent:
+    python -m benchmarks.startup --runs 5
+"""
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+AGENT_DIR = Path(__file__).resolve().parents[1]
+
+MODES = {
+    "workbook": {"snapshot": False, "warm_up": False},
+    "snapshot": {"snapshot": True, "warm_up": False},
+    "workbook+warm_up": {"snapshot": False, "warm_up": True},
+    "snapshot+warm_up": {"snapshot": True, "warm_up": True},
+}
+
+FIRST_QUESTION = "Are rooms available from 2025-11-02 to 2025-11-04?"
+SECOND_QUESTION = "Do you have a swimming pool?"
+
+
+def child(snapshot: bool, warm_up: bool):
+    """Runs inside the fresh interpreter; prints one JSON line of timings."""
+    result = {}
+
+    started = time.perf_counter()
+    import main
+    result["import_ms"] = (time.perf_counter() - started) * 1000
+
+    # Benchmark plumbing, outside the timed sections
+    from benchmarks.turn_latency import ScriptedLlm
+    from hospitality_agent import data_snapshot
+
+    main.DB_URL = os.environ["STARTUP_DB_URL"]
+    main.root_agent.model = ScriptedLlm()
+    if not snapshot:
+        data_snapshot.read_snapshot = lambda *args, **kwargs: None
+        data_snapshot.read_snapshot_records = lambda *args, **kwargs: None
+    result["pandas_after_import"] = "pandas" in sys.modules
+
+    if warm_up:
+        started = time.perf_counter()
+        main.warm_up()
+        result["warm_up_ms"] = (time.perf_counter() - started) * 1000
+
+    for key, question in (("first_response_ms", FIRST_QUESTION), ("second_response_ms", SECOND_QUESTION)):
+        started = time.perf_counter()
+        runner, _, _, user_id, session_id = main.get_runner_and_session("startup-guest")
+        main.run_sync(main.run_query_async(runner, user_id, session_id, question))
+        result[key] = (time.perf_counter() - started) * 1000
+
+    result["pandas_imported"] = "pandas" in sys.modules
+    print(json.dumps(result), file=sys.__stdout__, flush=True)
+
+
+def _run_once(mode: str) -> dict:
+    options = MODES[mode]
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "BOOKING_STORE_PATH": str(Path(tmp) / "bookings.db"),
+            "STARTUP_DB_URL": f"sqlite+aiosqlite:///{Path(tmp) / 'sessions.db'}",
+            "SESSION_COMPACTION": "0",
+            "TELEMETRY_PROMETHEUS_PORT": "",
+        }
+        started = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.startup", "--child",
+             "--snapshot" if options["snapshot"] else "--no-snapshot",
+             "--warm-up" if options["warm_up"] else "--no-warm-up"],
+            cwd=AGENT_DIR, env=env, capture_output=True, text=True, check=True,
+        )
+        process_ms = (time.perf_counter() - started) * 1000
+
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["process_ms"] = process_ms
+    return result
+
+
+def run(modes: list, runs: int) -> list:
+    # Imported here: the child must start with nothing loaded
+    import numpy as np
+
+    from hospitality_agent.data_snapshot import build_snapshots, read_snapshot
+
+    if any(MODES[mode]["snapshot"] for mode in modes) and read_snapshot() is None:
+        # What the Docker build does (python -m hospitality_agent.data_snapshot)
+        with contextlib.redirect_stdout(sys.stderr):
+            build_snapshots()
+
+    results = []
+    for mode in modes:
+        samples = [_run_once(mode) for _ in range(runs)]
+        summary = {"mode": mode, "runs": runs}
+        for key in ("import_ms", "warm_up_ms", "first_response_ms", "second_response_ms", "process_ms"):
+            values = [sample[key] for sample in samples if key in sample]
+            if values:
+                summary[key] = {
+                    "median": round(float(np.median(values)), 1),
+                    "min": round(min(values), 1),
+                    "max": round(max(values), 1),
+                }
+        summary["pandas_after_import"] = any(sample["pandas_after_import"] for sample in samples)
+        summary["pandas_imported"] = any(sample["pandas_imported"] for sample in samples)
+        results.append(summary)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per mode")
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--snapshot", action=argparse.BooleanOptionalAction, default=True, help=argparse.SUPPRESS)
+    parser.add_argument("--warm-up", action=argparse.BooleanOptionalAction, default=False, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        # Tool / agent logging must not mix with the JSON line
+        sys.stdout = sys.stderr
+        child(args.snapshot, args.warm_up)
+    else:
+        print(json.dumps(run(args.modes, args.runs), indent=2))
@@ -0,0 +1,83 @@
+"""Tool memoization benchmark: booking conversations with and without the cache.
+
+Replays conversations that follow the agent instruction's booking flow
+through benchmarks/turn_latency.py (real Runner, session DB, tools;
+ScriptedLlm as the model):
+
+    check availability -> ask about the resort -> re-check the same
+    dates before booking -> ask again -> book -> check once more
+
+Re-checks and repeated questions are what tool_cache.py answers from
+its per-session entries; the check after the booking must miss
+(inventory epoch).
+Reports per-tool time for both modes (as the Runner sees it, ADK's own
+per-call work included) plus, per tool, the cache's hit / miss / stale
+counters, hit rate and mean latency of hits and of misses. Hits are
+answered on the event loop; a miss includes the thread pool hop and the
+tool itself.
+
+Run from agents/Hospitality_Agent:
+    python -m benchmarks.tool_cache --conversations 50
+"""
+import argparse
+import json
+import random
+
+from benchmarks import turn_latency
+from benchmarks.turn_latency import _stay
+from hospitality_agent.tool_cache import get_tool_cache
+
+QUESTIONS = (
+    "Do you have a swimming pool?",
+    "Which restaurants do you have?",
+    "Is there free wifi?",
+    "What activities are there on the weekend?",
+)
+
+
+def booking_conversation(rnd: random.Random) -> list:
+    check_in, check_out = _stay(rnd)
+    room = rnd.choice(("Suite", "Penthouse", "Delux"))
+    question = rnd.choice(QUESTIONS)
+    availability = f"Is a {room} available from {check_in} to {check_out}?"
+    return [
+        availability,
+        question,
+        availability,
+        question,
+        f"Please book one {room} from {check_in} to {check_out}.",
+        availability,
+    ]
+
+
+def run(conversations: int, seed: int) -> list:
+    rnd = random.Random(seed)
+    transcripts = [booking_conversation(rnd) for _ in range(conversations)]
+    tool_cache = get_tool_cache()
+
+    results = []
+    for enabled in (False, True):
+        tool_cache.enabled = enabled
+        tool_cache.reset_stats()
+        tool_cache.clear()
+        report = turn_latency.run(0, transcripts=transcripts, seed=seed)
+        result = {
+            "tool_cache": enabled,
+            "conversations": conversations,
+            "turns": report["turns"],
+            "tool_time": report["tool_time"],
+            "turn_latency": report["turn_latency"],
+        }
+        if enabled:
+            result["lookups"] = tool_cache.stats()
+        results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--conversations", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.conversations, args.seed), indent=2))
@@ -0,0 +1,414 @@
+"""End-to-end turn latency benchmark with a scripted stand-in for Gemini.
+
+Runs the real Runner, the session service main.py uses (TunedSessionService
+on a temporary SQLite file),
+router callbacks and tools of the hospitality and capital agents. Only
+the model is replaced: ScriptedLlm picks a tool call from the user text,
+then answers from the tool result, so no API quota is used and every run
+makes the same calls.
+
+N simulated users run concurrently, each through a series of info,
+availability, booking and capital conversations. Transcripts can be
+replayed instead with --transcripts; every JSONL line is either
+    {"user_id": "guest-1", "text": "Do you have a pool?"}
+(lines of one user_id form one conversation, in file order) or
+    {"turns": ["Is a Suite free from 2025-11-03 to 2025-11-05?", "..."]}
+(one conversation per line).
+
+Prints JSON with p50/p95/p99 turn latency, per-tool time, session DB write
+time and turns/sec. --max-p95-ms makes the run exit non-zero on a
+regression.
+
+Run from agents/Hospitality_Agent:
+    python -m benchmarks.turn_latency --users 1 10 50
+    python -m benchmarks.turn_latency --transcripts transcripts.jsonl
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import random
+import re
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import timedelta
+from pathlib import Path
+from typing import AsyncGenerator
+
+import numpy as np
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.runners import Runner
+from google.genai import types
+
+from benchmarks.booking_contention import START, _seed
+from hospitality_agent import availability, booking_store
+from hospitality_agent.agent import hospitality_router, root_agent as hospitality_agent
+from hospitality_agent.booking_store import BookingStore
+from main import APP_NAME, DB_MAX_OVERFLOW, DB_POOL_SIZE, initial_state
+from session_storage import TunedSessionService
+
+# The capital agent lives at the repository root
+REPO_ROOT = Path(__file__).resolve().parents[4]
+sys.path.insert(0, str(REPO_ROOT))
+from capital_agent.agent import capital_router, root_agent as capital_agent  # noqa: E402
+
+CAPITAL_APP_NAME = "Capital Agent"
+
+# Synthetic inventory for the temporary booking store
+INVENTORY_DAYS = 60
+ROOMS_PER_TYPE = 100_000
+
+_ISO_DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+_ROOM_TYPE_RE = re.compile(r"\b(suite|penthouse|delux)\b", re.IGNORECASE)
+_CAPITAL_RE = re.compile(r"capital of (\w+)", re.IGNORECASE)
+_CAPITALS_RE = re.compile(r"capitals of ([\w ,]+)", re.IGNORECASE)
+
+
+# ================================================================
+# Scripted model
+# ================================================================
+def _script_call(text: str, tools: set):
+    """Returns the (tool_name, args) a model would plausibly call for `text`, or None."""
+    dates = _ISO_DATE_RE.findall(text)
+    room = _ROOM_TYPE_RE.search(text)
+    room_type = room.group(1).title() if room else ""
+    lowered = text.lower()
+
+    if "check_and_book_tool" in tools and "book" in lowered and len(dates) >= 2:
+        return "check_and_book_tool", {"booking_criteria": {
+            "room_type": room_type or "Suite",
+            "check_in_date": dates[0],
+            "check_out_date": dates[1],
+            "number_of_rooms": 1,
+        }}
+    if "booking_availability_tool" in tools and len(dates) >= 2:
+        return "booking_availability_tool", {
+            "check_in_date": dates[0],
+            "check_out_date": dates[1],
+            "room_type": room_type,
+        }
+    if "open_windows_tool" in tools and "nights" in lowered and room_type:
+        nights = re.search(r"(\d+) nights", lowered)
+        return "open_windows_tool", {"room_type": room_type, "nights": int(nights.group(1)) if nights else 2}
+    if "get_capital_cities" in tools and (match := _CAPITALS_RE.search(text)):
+        return "get_capital_cities", {"countries": [c for c in re.split(r",|\band\b", match.group(1)) if c.strip()]}
+    if "get_capital_city" in tools and (match := _CAPITAL_RE.search(text)):
+        return "get_capital_city", {"country": match.group(1)}
+    if "getinformation_tool" in tools:
+        return "getinformation_tool", {"topic": text}
+    return None
+
+
+class ScriptedLlm(BaseLlm):
+    """Deterministic BaseLlm: one scripted tool call per user message, then a summary.
+
+    `latency_ms` is awaited before every response to stand in for the
+    network round trip without blocking the event loop.
+    """
+
+    model: str = "scripted"
+    latency_ms: float = 0.0
+    calls: int = 0
+
+    async def generate_content_async(self, llm_request, stream=False) -> AsyncGenerator[LlmResponse, None]:
+        self.calls += 1
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+
+        last = llm_request.contents[-1] if llm_request.contents else None
+        parts = last.parts if last and last.parts else []
+        responses = [part.function_response for part in parts if part.function_response]
+
+        if responses:
+            summary = "; ".join(f"{r.name}: {json.dumps(r.response, default=str)[:200]}" for r in responses)
+            text = f"Here is what I found. {summary}"
+        else:
+            user_text = " ".join(part.text for part in parts if part.text)
+            call = _script_call(user_text, set(llm_request.tools_dict))
+            if call is not None:
+                name, args = call
+                yield LlmResponse(content=types.Content(
+                    role="model",
+                    parts=[types.Part(function_call=types.FunctionCall(name=name, args=args))],
+                ))
+                return
+            text = "Happy to help with that."
+
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]))
+
+
+# ================================================================
+# Measurements
+# ================================================================
+class Timings:
+    """Named lists of durations (seconds) with percentile summaries."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    def record(self, name: str, seconds: float):
+        self.samples[name].append(seconds)
+
+    def summary(self) -> dict:
+        return {name: _percentiles(values) for name, values in sorted(self.samples.items())}
+
+
+def _percentiles(values: list) -> dict:
+    ms = np.asarray(values) * 1000
+    if not len(ms):
+        return {"count": 0}
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "count": len(ms),
+        "total_ms": round(float(ms.sum()), 2),
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(ms.max()), 3),
+    }
+
+
+class ToolTimingPlugin(BasePlugin):
+    """Times every tool call through the Runner's plugin hooks."""
+
+    def __init__(self, timings: Timings):
+        super().__init__(name="tool_timing")
+        self.timings = timings
+        self._started = {}
+
+    async def before_tool_callback(self, *, tool, tool_args, tool_context):
+        self._started[tool_context.function_call_id] = time.perf_counter()
+        return None
+
+    async def after_tool_callback(self, *, tool, tool_args, tool_context, result):
+        started = self._started.pop(tool_context.function_call_id, None)
+        if started is not None:
+            self.timings.record(tool.name, time.perf_counter() - started)
+        return None
+
+
+class TimedSessionService(TunedSessionService):
+    """TunedSessionService (as main.py builds it) that records how long its writes take."""
+
+    def __init__(self, timings: Timings, **kwargs):
+        super().__init__(**kwargs)
+        self.timings = timings
+
+    async def create_session(self, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await super().create_session(**kwargs)
+        finally:
+            self.timings.record("create_session", time.perf_counter() - started)
+
+    async def append_event(self, session, event):
+        started = time.perf_counter()
+        try:
+            return await super().append_event(session, event)
+        finally:
+            self.timings.record("append_event", time.perf_counter() - started)
+
+
+# ================================================================
+# Conversations
+# ================================================================
+def _stay(rnd: random.Random):
+    check_in = START + timedelta(days=rnd.randrange(INVENTORY_DAYS - 5))
+    return check_in.isoformat(), (check_in + timedelta(days=rnd.randint(1, 4))).isoformat()
+
+
+def scripted_conversation(rnd: random.Random):
+    """Returns (app_name, [user messages]) for one randomly chosen scenario."""
+    check_in, check_out = _stay(rnd)
+    room = rnd.choice(("Suite", "Penthouse", "Delux"))
+    scenario = rnd.choice(("info", "availability", "booking", "capital"))
+
+    if scenario == "info":
+        return APP_NAME, rnd.sample([
+            "Do you have a swimming pool?",
+            "Which restaurants do you have?",
+            "Is there free wifi?",
+            "What activities are there on the weekend?",
+            "What time is check-in?",
+        ], 3)
+    if scenario == "availability":
+        return APP_NAME, [
+            f"Are rooms available from {check_in} to {check_out}?",
+            f"When is a {room} open for 3 nights?",
+        ]
+    if scenario == "booking":
+        return APP_NAME, [
+            f"Is a {room} available from {check_in} to {check_out}?",
+            f"Please book one {room} from {check_in} to {check_out}.",
+        ]
+    return CAPITAL_APP_NAME, [
+        "What is the capital of France?",
+        f"Tell me the capital of {rnd.choice(('Japan', 'Canada', 'Germany'))} and why it was chosen",
+        "What are the capitals of Kenya, Peru and Viet Nam?",
+    ]
+
+
+def load_transcripts(path: Path) -> list:
+    """Reads conversations (lists of messages) from a JSONL transcript file."""
+    conversations = []
+    by_user = {}
+    skipped = 0
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if isinstance(record.get("turns"), list):
+                conversations.append([str(turn) for turn in record["turns"]])
+            elif "text" in record:
+                user_id = str(record.get("user_id", "transcript"))
+                if user_id not in by_user:
+                    by_user[user_id] = []
+                    conversations.append(by_user[user_id])
+                by_user[user_id].append(str(record["text"]))
+            else:
+                skipped += 1
+    if skipped:
+        print(f"Skipped {skipped} transcript lines without 'turns' or 'text'", file=sys.stderr)
+    return [c for c in conversations if c]
+
+
+# ================================================================
+# Driver
+# ================================================================
+async def _run(users: int, conversations_per_user: int, transcripts: list,
+               model_latency_ms: float, seed: int, tmp: Path) -> dict:
+    tool_timings = Timings()
+    db_timings = Timings()
+    turn_timings = Timings()
+
+    llm = ScriptedLlm(latency_ms=model_latency_ms)
+    hospitality_agent.model = llm
+    capital_agent.model = llm
+
+    session_service = TimedSessionService(
+        db_timings,
+        db_url=f"sqlite+aiosqlite:///{tmp / 'sessions.db'}",
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+    )
+    plugins = [ToolTimingPlugin(tool_timings)]
+    runners = {
+        APP_NAME: Runner(agent=hospitality_agent, app_name=APP_NAME,
+                         session_service=session_service, plugins=plugins),
+        CAPITAL_APP_NAME: Runner(agent=capital_agent, app_name=CAPITAL_APP_NAME,
+                                 session_service=session_service, plugins=plugins),
+    }
+
+    async def converse(user_id: str, app_name: str, messages: list):
+        session = await session_service.create_session(
+            app_name=app_name,
+            user_id=user_id,
+            state=initial_state() if app_name == APP_NAME else None,
+        )
+        for text in messages:
+            started = time.perf_counter()
+            async for _ in runners[app_name].run_async(
+                user_id=user_id,
+                session_id=session.id,
+                new_message=types.Content(role="user", parts=[types.Part(text=text)]),
+            ):
+                pass
+            turn_timings.record(app_name, time.perf_counter() - started)
+
+    async def simulated_user(worker: int):
+        rnd = random.Random(seed + worker)
+        for _ in range(conversations_per_user):
+            app_name, messages = scripted_conversation(rnd)
+            await converse(f"bench-{worker}", app_name, messages)
+
+    if transcripts:
+        jobs = [converse(f"transcript-{i}", APP_NAME, messages) for i, messages in enumerate(transcripts)]
+    else:
+        jobs = [simulated_user(worker) for worker in range(users)]
+
+    started = time.perf_counter()
+    await asyncio.gather(*jobs)
+    elapsed = time.perf_counter() - started
+    await session_service.close()
+
+    all_turns = [s for samples in turn_timings.samples.values() for s in samples]
+    return {
+        "users": len(jobs),
+        "turns": len(all_turns),
+        "model_calls": llm.calls,
+        "seconds": round(elapsed, 3),
+        "turns_per_sec": round(len(all_turns) / elapsed, 1),
+        "turn_latency": _percentiles(all_turns),
+        "turn_latency_by_app": turn_timings.summary(),
+        "tool_time": tool_timings.summary(),
+        "db_write_time": db_timings.summary(),
+    }
+
+
+def _reset_router_stats():
+    for router in (hospitality_router, capital_router):
+        for stats in router.stats.values():
+            stats.update(count=0, total_ms=0.0, max_ms=0.0)
+
+
+def run(users: int, conversations_per_user: int = 5, transcripts: list = None,
+        model_latency_ms: float = 0.0, seed: int = 0) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        # Bookings go to a throwaway store seeded with a large synthetic inventory
+        store = BookingStore(path=tmp / "bookings.db", workbook_path=tmp / "missing.xlsx")
+        _seed(store, INVENTORY_DAYS, ROOMS_PER_TYPE)
+        booking_store._booking_store = store
+        availability._availability_index = availability.AvailabilityIndex(store)
+        _reset_router_stats()
+
+        # Tool / router logging goes to stderr so stdout stays valid JSON
+        with contextlib.redirect_stdout(sys.stderr):
+            result = asyncio.run(_run(users, conversations_per_user, transcripts or [],
+                                      model_latency_ms, seed, tmp))
+        store.close()
+
+    result["routes"] = {
+        APP_NAME: hospitality_router.report(),
+        CAPITAL_APP_NAME: capital_router.report(),
+    }
+    result["optimistic_retries"] = store.optimistic_retries
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--conversations-per-user", type=int, default=5)
+    parser.add_argument("--transcripts", type=Path, help="JSONL transcript file to replay instead of the scripted users")
+    parser.add_argument("--model-latency-ms", type=float, default=0.0, help="simulated model round trip")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="also write the JSON report to this file")
+    parser.add_argument("--max-p95-ms", type=float, help="exit with status 1 if any run's p95 turn latency is above this")
+    args = parser.parse_args()
+
+    if args.transcripts:
+        results = [run(0, transcripts=load_transcripts(args.transcripts),
+                       model_latency_ms=args.model_latency_ms, seed=args.seed)]
+    else:
+        results = [
+            run(n, args.conversations_per_user, model_latency_ms=args.model_latency_ms, seed=args.seed)
+            for n in args.users
+        ]
+
+    report = json.dumps(results, indent=2)
+    print(report)
+    if args.output:
+        args.output.write_text(report + "\n", encoding="utf-8")
+
+    if args.max_p95_ms is not None:
+        worst = max(result["turn_latency"].get("p95_ms", 0.0) for result in results)
+        if worst > args.max_p95_ms:
+            print(f"p95 turn latency {worst} ms is above --max-p95-ms {args.max_p95_ms}", file=sys.stderr)
+            sys.exit(1)
@@ -1,135 +1,244 @@
 from google.adk.agents import Agent
 from google.adk.tools.tool_context import ToolContext
-import pandas as pd
 from pydantic import BaseModel, Field
 from typing import Optional
-from pathlib import Path
+from datetime import date, timedelta
+import logging
+import re
+
+from .context_budget import get_context_budget
+from .properties import UnknownProperty, get_properties, property_id_of
+from .router import DirectRoute, IntentRouter
+from .telemetry import describe_metrics, get_telemetry
+from .tool_cache import get_tool_cache
+from .tool_executor import offloaded
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on the windows returned to the model by open_windows_tool
+MAX_OPEN_WINDOWS = 10
+
+# Alternatives offered by check_and_book_tool when the stay is sold out
+MAX_ALTERNATIVES = 5
+ALTERNATIVE_MAX_DAYS_MOVED = 7
+
+# How long a conversation may reuse a tool result (see tool_cache.py).
+# Inventory results are also dropped when the inventory snapshot changes
+# or the guest books; the TTL bounds how long a booking made by another
+# worker process can go unnoticed.
+INFORMATION_CACHE_TTL_SECONDS = 60 * 60
+INVENTORY_CACHE_TTL_SECONDS = 60
+
+tool_cache = get_tool_cache()
+
+
+def _property(tool_context: ToolContext):
+    """The property the calling conversation is about (see properties.py)."""
+    if tool_context is None:
+        return get_properties().default
+    return get_properties().get(property_id_of(tool_context.state))
+
+
+def _inventory_version(tool_context: ToolContext):
+    return _property(tool_context).availability_index().current_stamp()
+
+
+def _knowledge_version(tool_context: ToolContext):
+    return _property(tool_context).knowledge_base().stamp
+
 
 # Tool to get information about the resort
-def getinformation_tool(tool_context: ToolContext) -> dict:
-    """This tool provides information about the resort, contact, rooms, amenities, dining, spa, activities, and policies.
-    These details are stored as a JSON-like dictionary within the function for easy access.
-    The dictionary will be returned whenever this tool is invoked which the agent can use to answer user queries.
+@tool_cache.memoize(INFORMATION_CACHE_TTL_SECONDS, version=_knowledge_version)
+def getinformation_tool(tool_context: ToolContext, topic: str = "") -> dict:
+    """This tool provides information about the resort: location, contact, rooms, amenities, dining, spa, activities, and policies.
+    Pass the guest's question (or a topic such as "spa" or "cancellation policy") as `topic`
+    and only the matching sections of the resort information are returned.
 
     Args:
         tool_context: Context for accessing session state
+        topic: The guest's question or the topic to look up (e.g. "what time is checkout?", "dining")
         
-    Returns: A dictionary containing resort information.
+    Returns: A dictionary with the resort name and the matching information sections.
         """
-    print("--- Tool: get_information called ---")
-
-    # Full resort dictionary (same as in your docstring)
-    resort_info = {
-        "resort_name": "Happy Resort",
-        "location": {
-            "city": "Pune",
-            "state": "Maharashtra",
-            "country": "India",
-            "address": "Sr. No. 45, Lakeside Road, Mulshi, Pune",
-            "nearby_landmarks": [
-                "Mulshi Lake – 1.2 km",
-                "Lavasa Road – 8 km",
-                "Pashan Hills – 22 km"
-            ]
-        },
-        "contact": {
-            "phone": "+91-020-44556677",
-            "email": "contact@happyresort.com",
-            "website": "www.happyresort.com"
-        },
-        "rooms": {
-            "types": [
-                "Suite : A spacious, elegantly furnished room offering separate living and sleeping areas for enhanced comfort.",
-                "Penthouse : A premium top-floor residence featuring luxurious interiors, exclusive amenities, and breathtaking panoramic views.",
-                "Delux : A well-appointed room designed for comfort, combining stylish décor with modern conveniences for a relaxing stay."
-            ],
-            "check_in_time": "2:00 PM",
-            "check_out_time": "11:00 AM"
-        },
-        "amenities": [
-            "Infinity Pool",
-            "24x7 Room Service",
-            "Free High-Speed Wi-Fi",
-            "Gym & Yoga Studio",
-            "Kids Play Area",
-            "Business Center",
-            "Airport Shuttle Services"
-        ],
-        "dining": {
-            "restaurants": [
-                {
-                    "name": "Lakeview Diner",
-                    "cuisine": "Multi-Cuisine",
-                    "timings": "7:00 AM – 11:00 PM"
-                },
-                {
-                    "name": "Skyline Bar",
-                    "cuisine": "Cocktails & Tapas",
-                    "timings": "5:00 PM – 1:00 AM"
-                }
-            ],
-            "room_dining": {
-                "available": True,
-                "hours": "24x7"
-            }
-        },
-        "spa": {
-            "name": "Harmony Spa",
-            "services": [
-                "Swedish Massage",
-                "Aroma Therapy",
-                "Deep Tissue Massage",
-                "Foot Reflexology",
-                "Couple Spa Packages"
-            ],
-            "timings": "9:00 AM – 9:00 PM"
-        },
-        "activities": [
-            "Kayaking",
-            "Nature Walks",
-            "Cycling Trails",
-            "Bonfire Nights",
-            "Live Music Events (Fri–Sun)"
-        ],
-        "policies": {
-            "cancellation": "Free cancellation up to 48 hours before check-in.",
-            "pets": "Pets are allowed in designated pet-friendly rooms.",
-            "smoking": "Smoking is prohibited in indoor areas; allowed in designated zones."
-        }
-    }
+    logger.debug("Tool: get_information called")
+
+    # Loaded once from the property's resort_info.json and indexed by section/keyword
+    try:
+        knowledge_base = _property(tool_context).knowledge_base()
+    except Exception as e:
+        logger.exception("Error reading resort information")
+        return {"error": "Unable to read resort information."}
+
+    resort_info = {"resort_name": knowledge_base.resort_name}
+
+    sections = knowledge_base.lookup(topic) if topic else {}
+    if sections:
+        resort_info.update(sections)
+    else:
+        # Nothing matched: tell the model which topics it can ask for
+        resort_info["available_topics"] = knowledge_base.topics
 
     return resort_info
 
 
+def _parse_date(value: str, name: str) -> date:
+    """Parses a YYYY-MM-DD tool argument, raising ValueError with a clear message."""
+    try:
+        return date.fromisoformat(str(value).strip())
+    except ValueError:
+        raise ValueError(f"{name} must be in YYYY-MM-DD format, got '{value}'.")
+
+
+def _session_identity(tool_context: ToolContext) -> tuple:
+    """Returns (user_id, session_id) of the conversation calling a tool."""
+    if tool_context is None:
+        return "", ""
+    return tool_context.user_id, tool_context.session.id
 
-def booking_availability_tool(tool_context: ToolContext) -> dict:
-    """This tool provides information about room booking availability.
+
+@tool_cache.memoize(INVENTORY_CACHE_TTL_SECONDS, version=_inventory_version, inventory=True)
+def booking_availability_tool(
+    tool_context: ToolContext,
+    check_in_date: str = "",
+    check_out_date: str = "",
+    room_type: str = "",
+    number_of_rooms: int = 1,
+) -> dict:
+    """This tool checks which room types can be booked for a stay.
+
+    A room type is available only if it has at least `number_of_rooms` free
+    on every night from check_in_date up to (not including) check_out_date.
 
     Args:
         tool_context: Context for accessing session state
+        check_in_date: Check-in date in YYYY-MM-DD format
+        check_out_date: Check-out date in YYYY-MM-DD format
+        room_type: Optional room type to check (e.g. Suite). Leave empty to check all room types.
+        number_of_rooms: Number of rooms the guest needs (default 1)
 
-    Returns: A dictionary containing room availability information.
+    Returns: A dictionary listing the available and unavailable room types for the stay.
     """
-    print("--- Tool: booking_availability called ---")
+    logger.debug("Tool: booking_availability called")
 
-    #db_path = "/Users/ankit/Documents/Data-Science/Google-ADK-Capital-Agent/hospitality_agent_staging/agents/Hospitality_Agent/hospitality_agent/resort_database"
-    #file_name = "booking_db.xlsx"
+    # The workbook is parsed once per process and hot-reloaded when it changes
+    # (see availability.py), so a call here is just an in-memory read.
+    try:
+        snapshot = _property(tool_context).availability_index().snapshot()
+    except Exception as e:
+        logger.exception("Error reading booking database")
+        return {"error": "Unable to read booking database."}
 
-    file_path = Path(__file__).parent / "resort_database" / "booking_db.xlsx"
+    bookable_dates = {
+        "from": snapshot.start_date.isoformat(),
+        "to": snapshot.end_date.isoformat(),
+    }
 
-    #file_path = f"{db_path}/{file_name}"
+    if not check_in_date or not check_out_date:
+        return {
+            "error": "Please ask the guest for check_in_date and check_out_date (YYYY-MM-DD).",
+            "bookable_dates": bookable_dates,
+            "room_types": list(snapshot.room_types),
+        }
 
     try:
-        booking_db_file = pd.read_excel(file_path)
-        
-        # convert the excel data into a dictionary
-        availability_info = booking_db_file.to_dict(orient="records")
+        check_in = _parse_date(check_in_date, "check_in_date")
+        check_out = _parse_date(check_out_date, "check_out_date")
+        if check_out <= check_in:
+            raise ValueError("check_out_date must be after check_in_date.")
+        if number_of_rooms < 1:
+            raise ValueError("number_of_rooms must be at least 1.")
+    except ValueError as e:
+        return {"error": str(e), "bookable_dates": bookable_dates}
+
+    if room_type and snapshot.room_offset(room_type) is None:
+        return {
+            "error": f"Unknown room type '{room_type}'.",
+            "room_types": list(snapshot.room_types),
+        }
 
+    # Minimum rooms free across every night of the stay, for all room types
+    min_available = snapshot.min_available(check_in, check_out)
+
+    requested = [snapshot.room_offset(room_type)] if room_type else range(len(snapshot.room_types))
+    available, unavailable = [], []
+    for i in requested:
+        if min_available[i] >= number_of_rooms:
+            available.append(snapshot.room_types[i])
+        else:
+            unavailable.append(snapshot.room_types[i])
+
+    availability_info = {
+        "check_in_date": check_in.isoformat(),
+        "check_out_date": check_out.isoformat(),
+        "nights": (check_out - check_in).days,
+        "number_of_rooms": number_of_rooms,
+        "available_room_types": available,
+        "unavailable_room_types": unavailable,
+    }
+    if check_in < snapshot.start_date or check_out > snapshot.end_date + timedelta(days=1):
+        availability_info["note"] = "Some nights fall outside the bookable dates."
+        availability_info["bookable_dates"] = bookable_dates
+
+    return availability_info
+
+
+@tool_cache.memoize(INVENTORY_CACHE_TTL_SECONDS, version=_inventory_version, inventory=True)
+def open_windows_tool(
+    tool_context: ToolContext,
+    room_type: str,
+    nights: int,
+    number_of_rooms: int = 1,
+    earliest_check_in: str = "",
+    latest_check_in: str = "",
+) -> dict:
+    """This tool finds the dates when a room type is free for a stay of N nights.
+
+    Use it when the guest is flexible on dates, or when the dates they asked
+    for are not available.
+
+    Args:
+        tool_context: Context for accessing session state
+        room_type: Room type to search (e.g. Suite)
+        nights: Length of the stay in nights
+        number_of_rooms: Number of rooms the guest needs (default 1)
+        earliest_check_in: Optional earliest check-in date (YYYY-MM-DD)
+        latest_check_in: Optional latest check-in date (YYYY-MM-DD)
+
+    Returns: A dictionary with the first 10 open check-in/check-out windows and the total count.
+    """
+    logger.debug("Tool: open_windows called")
+
+    try:
+        snapshot = _property(tool_context).availability_index().snapshot()
     except Exception as e:
-        print(f"Error reading booking database: {e}")
+        logger.exception("Error reading booking database")
         return {"error": "Unable to read booking database."}
-    
-    return availability_info
+
+    try:
+        earliest = _parse_date(earliest_check_in, "earliest_check_in") if earliest_check_in else None
+        latest = _parse_date(latest_check_in, "latest_check_in") if latest_check_in else None
+        check_ins = snapshot.open_windows(room_type, nights, number_of_rooms, earliest, latest)
+    except KeyError:
+        return {
+            "error": f"Unknown room type '{room_type}'.",
+            "room_types": list(snapshot.room_types),
+        }
+    except ValueError as e:
+        return {"error": str(e)}
+
+    return {
+        "room_type": snapshot.room_types[snapshot.room_offset(room_type)],
+        "nights": nights,
+        "number_of_rooms": number_of_rooms,
+        "total_windows": len(check_ins),
+        "windows": [
+            {
+                "check_in_date": day.isoformat(),
+                "check_out_date": (day + timedelta(days=nights)).isoformat(),
+            }
+            for day in check_ins[:MAX_OPEN_WINDOWS].tolist()
+        ],
+    }
 
 class BookingCriteria(BaseModel):
     room_type: str = Field(None, description="Type of room to book (e.g., Deluxe Garden View)")
@@ -138,49 +247,269 @@ class BookingCriteria(BaseModel):
     number_of_rooms: int = Field(None, description="Number of rooms for the booking")
     special_requests: Optional[str] = Field(None, description="Any special requests from the guest")
 
-def book_room_tool(tool_context: ToolContext,booking_criteria: Optional[dict] = None) -> dict:
-    """This tool assists in booking a room based on user preferences.
+def _booking_request(booking_criteria: Optional[dict]):
+    """Validates tool booking criteria.
+
+    Returns: (criteria, check_in, check_out, None), or (None, None, None, error dict).
+    """
+    if booking_criteria is None:
+        return None, None, None, {"error": "No booking criteria provided."}
+
+    # validate booking_criteria using Pydantic model
+    try:
+        criteria = BookingCriteria(**booking_criteria)
+    except Exception:
+        # The model's input, not a fault here; its values stay out of the log
+        logger.warning("Invalid booking criteria")
+        return None, None, None, {"error": "Invalid booking criteria provided."}
+
+    missing = [name for name in ("room_type", "check_in_date", "check_out_date", "number_of_rooms")
+               if getattr(criteria, name) in (None, "")]
+    if missing:
+        return None, None, None, {"error": f"Missing booking criteria: {', '.join(missing)}."}
+
+    try:
+        check_in = _parse_date(criteria.check_in_date, "check_in_date")
+        check_out = _parse_date(criteria.check_out_date, "check_out_date")
+    except ValueError as e:
+        return None, None, None, {"error": str(e)}
+    return criteria, check_in, check_out, None
+
+
+def _book(tool_context: ToolContext, criteria: BookingCriteria, check_in: date, check_out: date) -> dict:
+    """Books through the property's store; returns its result or an error dict."""
+    user_id, session_id = _session_identity(tool_context)
+    # Booked or sold out, this session's cached availability is now outdated
+    tool_cache.invalidate_inventory(tool_context)
+
+    # Atomically checks and decrements every night of the stay. Retried calls
+    # within the same turn (invocation) return the original confirmation; the
+    # same stay asked for again in a later turn is a new booking.
+    prop = _property(tool_context)
+    try:
+        # Each property books against its own store (shard)
+        result = prop.booking_store().book(
+            room_type=criteria.room_type,
+            check_in=check_in,
+            check_out=check_out,
+            number_of_rooms=criteria.number_of_rooms,
+            special_requests=criteria.special_requests,
+            user_id=user_id,
+            session_id=session_id,
+            request_id=tool_context.invocation_id if tool_context is not None else None,
+        )
+        # The next availability check in this process picks the booking up
+        prop.availability_index().invalidate()
+        return result
+    except ValueError as e:
+        return {"error": str(e)}
+    except Exception as e:
+        logger.exception("Error writing booking")
+        return {"error": "Unable to complete the booking right now."}
+
+
+def _alternatives(snapshot, room_type: str, check_in: date, check_out: date, number_of_rooms: int) -> list:
+    """Bookable stays closest to the one requested, best first.
+
+    Other room types for the same dates come first, then the same room
+    type with check-in moved by up to ALTERNATIVE_MAX_DAYS_MOVED days
+    (smallest move first, later before earlier on a tie).
+    """
+    nights = (check_out - check_in).days
+    requested = snapshot.room_offset(room_type)
+    alternatives = []
+
+    # Nights outside the sheet count as 0 rooms, so no room type qualifies then
+    min_available = snapshot.min_available(check_in, check_out)
+    for i, name in enumerate(snapshot.room_types):
+        if i != requested and min_available[i] >= number_of_rooms:
+            alternatives.append({
+                "room_type": name,
+                "check_in_date": check_in.isoformat(),
+                "check_out_date": check_out.isoformat(),
+                "days_moved": 0,
+            })
+
+    check_ins = snapshot.open_windows(
+        room_type, nights, number_of_rooms,
+        check_in - timedelta(days=ALTERNATIVE_MAX_DAYS_MOVED),
+        check_in + timedelta(days=ALTERNATIVE_MAX_DAYS_MOVED),
+    ).tolist()
+    moved = sorted(
+        ((day - check_in).days for day in check_ins if day != check_in),
+        key=lambda days: (abs(days), days < 0),
+    )
+    for days in moved:
+        day = check_in + timedelta(days=days)
+        alternatives.append({
+            "room_type": snapshot.room_types[requested],
+            "check_in_date": day.isoformat(),
+            "check_out_date": (day + timedelta(days=nights)).isoformat(),
+            "days_moved": days,
+        })
+    return alternatives[:MAX_ALTERNATIVES]
+
+
+def check_and_book_tool(tool_context: ToolContext, booking_criteria: Optional[dict] = None) -> dict:
+    """This tool books a room in one step: it checks that the room type is free on
+    every night of the stay and books it, or, if it is not, returns the closest
+    bookable alternatives (other room types for the same dates, or the same room
+    type on nearby dates), best first.
+
     The input booking_criteria dictionary should contain the following details:
-    room_type, 
-    check_in_date, 
-    check_out_date, 
-    number_of_rooms, 
+    room_type,
+    check_in_date,
+    check_out_date,
+    number_of_rooms,
     and any special_requests.
 
     Args:
         tool_context: Context for accessing session state
+        booking_criteria: The guest's booking criteria (dates in YYYY-MM-DD format)
 
+    Returns: A dictionary with "status" = "success" and the booking_details (including
+        the confirmation_id), or "status" = "unavailable" with a list of alternatives.
     """
+    # Criteria stay out of the log: special requests may hold personal details
+    logger.debug("Tool: check_and_book called")
 
-    print("--- Tool: book_room called ---")
-    print(booking_criteria)
+    criteria, check_in, check_out, error = _booking_request(booking_criteria)
+    if error:
+        telemetry.inc("adk_booking_attempts_total", result="invalid")
+        return error
 
-    if booking_criteria is None:
-        return {"error": "No booking criteria provided."}
-    
-    # validate booking_criteria using Pydantic model
     try:
-        criteria = BookingCriteria(**booking_criteria)
+        snapshot = _property(tool_context).availability_index().snapshot()
     except Exception as e:
-        print(f"Error in booking criteria: {e}")
-        return {"error": "Invalid booking criteria provided."}  
-    
-    # No real booking logic here — simulation only
-    confirmation = {
-        "status": "success",
-        "message": "Room booking simulated successfully.",
-        "booking_details": {
-            "room_type": criteria.room_type,
-            "check_in_date": criteria.check_in_date,
-            "check_out_date": criteria.check_out_date,
-            "number_of_rooms": criteria.number_of_rooms,
-            "special_requests": criteria.special_requests or "None",
-            "confirmation_id": f"SIM-{hash(str(criteria)) % 1000000}",
+        logger.exception("Error reading booking database")
+        telemetry.inc("adk_booking_attempts_total", result="error")
+        return {"error": "Unable to read booking database."}
+
+    if snapshot.room_offset(criteria.room_type) is None:
+        telemetry.inc("adk_booking_attempts_total", result="invalid")
+        return {
+            "error": f"Unknown room type '{criteria.room_type}'.",
+            "room_types": list(snapshot.room_types),
         }
+
+    # The store checks every night inside the booking itself, so there is no
+    # separate availability read to race with (and a retried call gets its
+    # original confirmation even if that booking took the last room).
+    result = _book(tool_context, criteria, check_in, check_out)
+    if "error" in result:
+        telemetry.inc("adk_booking_attempts_total", result="error")
+        return result
+    telemetry.inc("adk_booking_attempts_total", result=result["status"])
+    if result["status"] == "success":
+        return result
+
+    # Sold out (or lost the race): offer what is bookable instead, from the
+    # snapshot this booking has just made stale
+    snapshot = _property(tool_context).availability_index().snapshot()
+    result["requested"] = {
+        "room_type": snapshot.room_types[snapshot.room_offset(criteria.room_type)],
+        "check_in_date": check_in.isoformat(),
+        "check_out_date": check_out.isoformat(),
+        "number_of_rooms": criteria.number_of_rooms,
     }
-    
+    result["alternatives"] = _alternatives(snapshot, criteria.room_type, check_in, check_out,
+                                           criteria.number_of_rooms)
+    if check_in < snapshot.start_date or check_out > snapshot.end_date + timedelta(days=1):
+        result["bookable_dates"] = {
+            "from": snapshot.start_date.isoformat(),
+            "to": snapshot.end_date.isoformat(),
+        }
+    return result
 
-    return booking_criteria
+
+# ================================================================
+# Pre-LLM routing: one-field lookups in resort_info are answered
+# directly, booking/availability always goes to the full model.
+# ================================================================
+_TIME_WORDS = r"\b(time|timings?|hours?|when|open|close)\b"
+
+_BOOKING_INTENT_RE = re.compile(
+    r"\b(book|booking|reserve|reservation|availab\w*|vacan\w*|nights?|dates?|confirm\w*|stay|tonight|tomorrow)\b"
+    r"|\d{4}-\d{1,2}-\d{1,2}",
+    re.IGNORECASE,
+)
+
+
+def _resort_section(state, name: str):
+    """One resort_info section of the conversation's property."""
+    try:
+        knowledge_base = get_properties().get(property_id_of(state)).knowledge_base()
+    except UnknownProperty:
+        # Nothing to answer from; the model (and its tools) will say so
+        return {}
+    return knowledge_base.sections.get(name) or {}
+
+
+def _answer_field(section: str, key: str, template: str):
+    """Builds a route answer from one field of a resort_info section."""
+    def answer(match, state):
+        value = _resort_section(state, section).get(key)
+        return template.format(value) if value else None
+    return answer
+
+
+def _answer_spa_hours(match, state):
+    spa = _resort_section(state, "spa")
+    return f"{spa['name']} is open {spa['timings']}." if spa.get("timings") else None
+
+
+def _answer_dining_hours(match, state):
+    restaurants = _resort_section(state, "dining").get("restaurants") or []
+    if not restaurants:
+        return None
+    lines = [f"- {r['name']} ({r['cuisine']}): {r['timings']}" for r in restaurants]
+    return "Our dining timings are:\n" + "\n".join(lines)
+
+
+def _answer_address(match, state):
+    location = _resort_section(state, "location")
+    return f"We are located at {location['address']}, {location['state']}, {location['country']}." if location.get("address") else None
+
+
+HOSPITALITY_ROUTES = [
+    DirectRoute("check_in_time", re.compile(rf"^(?=.*{_TIME_WORDS})(?=.*\bcheck[\s-]?in\b)(?!.*\bcheck[\s-]?out\b)", re.IGNORECASE),
+                _answer_field("rooms", "check_in_time", "Check-in time is {}.")),
+    DirectRoute("check_out_time", re.compile(rf"^(?=.*{_TIME_WORDS})(?=.*\bcheck[\s-]?out\b)(?!.*\bcheck[\s-]?in\b)", re.IGNORECASE),
+                _answer_field("rooms", "check_out_time", "Check-out time is {}.")),
+    DirectRoute("phone", re.compile(r"\b(phone|telephone|contact number|call you)\b", re.IGNORECASE),
+                _answer_field("contact", "phone", "You can call us on {}.")),
+    DirectRoute("email", re.compile(r"\be-?mail\b", re.IGNORECASE),
+                _answer_field("contact", "email", "You can email us at {}.")),
+    DirectRoute("website", re.compile(r"\b(website|web site)\b", re.IGNORECASE),
+                _answer_field("contact", "website", "Our website is {}.")),
+    DirectRoute("address", re.compile(r"\b(address|where (is|are) (the resort|you|it) located)\b", re.IGNORECASE),
+                _answer_address),
+    DirectRoute("spa_hours", re.compile(rf"^(?=.*\bspa\b)(?=.*{_TIME_WORDS})", re.IGNORECASE),
+                _answer_spa_hours),
+    DirectRoute("dining_hours", re.compile(rf"^(?=.*\b(restaurants?|diner|dining|bar)\b)(?=.*{_TIME_WORDS})", re.IGNORECASE),
+                _answer_dining_hours),
+    DirectRoute("cancellation_policy", re.compile(r"^(?=.*\bcancel\w*)(?=.*\bpolic(y|ies)\b)", re.IGNORECASE),
+                _answer_field("policies", "cancellation", "{}")),
+    DirectRoute("pet_policy", re.compile(r"\b(pets?|dogs?|cats?)\b", re.IGNORECASE),
+                _answer_field("policies", "pets", "{}")),
+    DirectRoute("smoking_policy", re.compile(r"\bsmok(e|ing)\b", re.IGNORECASE),
+                _answer_field("policies", "smoking", "{}")),
+]
+
+hospitality_router = IntentRouter(
+    direct_routes=HOSPITALITY_ROUTES,
+    needs_full_model=lambda text: _BOOKING_INTENT_RE.search(text) is not None,
+)
+
+# Timing spans / metrics for turns, model calls and tools (see telemetry.py).
+# Router callbacks run first: a direct answer skips the model entirely.
+telemetry = get_telemetry()
+describe_metrics({
+    "adk_booking_attempts_total": ("counter", "check_and_book_tool calls by result (success / unavailable / conflict / invalid / error)"),
+})
+
+# Fits the resent history into a token budget (see context_budget.py)
+context_budget = get_context_budget()
 
 
 #create a comprehensive hospitality agent
@@ -201,20 +530,28 @@ root_agent = Agent(
     You have access to the following tools:
 
     1. get_information  
-    - Use this tool to retrieve all resort-related information such as amenities, services,
+    - Use this tool to retrieve resort-related information such as amenities, services,
         dining options, spa details, activities, and general policies.
+    - Pass the guest's question (or the topic) as `topic`; the tool returns only the relevant sections.
+      If it returns available_topics instead, call it again with one of those topics.
     - Always refer to the dictionary returned by this tool when answering any factual question 
         about the resort.
 
     2. booking_availability  
     - Use this tool to check room availability for the dates provided by the user.
     - Always ask the user for check-in and check-out dates before checking availability.
-    - Once the user provides a date range, call this tool and use the returned dictionary 
-        to give precise availability details. Just share which room types are available for booking and the date range.
+    - Once the user provides a date range, call this tool with check_in_date, check_out_date
+        (and room_type / number_of_rooms if known). The tool already checks every night of the stay
+        and returns available_room_types and unavailable_room_types.
+        Just share which room types are available for booking and the date range.
+
+    3. open_windows
+    - Use this tool when the guest is flexible on dates or their dates are not available.
+    - Call it with the room_type and the number of nights; it returns open check-in / check-out windows.
     
-    3. book_room  
-    - Use this tool to create a room booking, but only after validating that the users 
-     requested room type and dates are actually available.
+    4. check_and_book
+    - Use this tool to book a room. It checks that the room type is free on every night of the stay
+      and books it in the same call, so do NOT call booking_availability before it.
 
     - Before calling this tool, ALWAYS gather the users booking criteria:
         • room type (if user hasnt decided, help them choose)
@@ -223,31 +560,37 @@ root_agent = Agent(
         • number of rooms required
         • special requests (optional)
 
-    - Once you have the users criteria, call booking_availability with the dates 
-     the guest provided.
-
-    - From the booking_availability result:
-        - Check which room types are available for the given date range
-        - Perform an accurate match between the users requested room type and the 
-          available room types, ensure the available room types are greater than or equal to the rooms requested by user
-        - Do not share the number of rooms available with the user. Just share which rooms can be booked.
-        - Do NOT offer or confirm a room that is not listed as available.
+    - Once you have the users criteria, call check_and_book with the exact criteria provided by the user.
 
+    - If it returns status "success":
+        - Return a clear confirmation message summarizing the booking details, including the confirmation_id.
 
-    - If the requested room type is available:
-        - Proceed with book_room using the exact criteria provided by the user.
-        - Return a clear confirmation message summarizing the booking details.
-
-    - If the requested room type is NOT available:
-        - Inform the guest politely.
-        - Suggest only those room types that match availability for the exact dates 
-          they provided.
+    - If it returns status "unavailable" or "conflict":
+        - Inform the guest politely that the requested room type is not available for those dates.
+        - Offer only the stays listed in alternatives, in the order given (best match first).
+          Do not share the number of rooms available with the user.
+        - If the guest picks one, call check_and_book again with that room type and those dates.
         - Never guess or hallucinate availability—always rely solely on the tool output.
 
     - Accuracy Requirements:
         - Availability must be matched strictly based on the tool response.
         - Do not assume availability outside of the returned dictionary.
-        - Do not complete a booking until validation is complete.    
+        - Never tell the guest a room is booked unless check_and_book returned status "success".
+
+    Earlier turns of long conversations are summarized here (may be empty):
+    {conversation_summary?}
     """,
-    tools=[getinformation_tool,booking_availability_tool,book_room_tool],
+    # Run on the tool thread pool, so a blocking call never stalls other sessions (see tool_executor.py)
+    tools=[offloaded(getinformation_tool),offloaded(booking_availability_tool),offloaded(open_windows_tool),
+           offloaded(check_and_book_tool)],
+    before_agent_callback=[hospitality_router.before_agent_callback, telemetry.before_agent_callback],
+    before_model_callback=[
+        hospitality_router.before_model_callback,
+        context_budget.before_model_callback,
+        telemetry.before_model_callback,
+    ],
+    after_model_callback=telemetry.after_model_callback,
+    before_tool_callback=telemetry.before_tool_callback,
+    after_tool_callback=telemetry.after_tool_callback,
+    after_agent_callback=[hospitality_router.after_agent_callback, telemetry.after_agent_callback],
 )
\ No newline at end of file
@@ -0,0 +1,441 @@
+import dataclasses
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+
+# ================================================================
+# Availability index for the resort booking sheet
+#
+#   The workbook is parsed once into a columnar grid:
+#       rows    -> room types
+#       columns -> calendar days (contiguous, starting at start_date)
+#   so a (Date, Roomtype) lookup is two integer offsets.
+#
+#   Snapshots are immutable. A reload builds a brand new snapshot
+#   and swaps the reference, so readers never take a lock.
+#
+#   Each snapshot also carries a sparse table over `Available`, so
+#   "minimum rooms free across a stay" is two array reads for any
+#   stay length, and "every N-night window that is open" is one
+#   vectorized np.minimum over the whole calendar.
+#
+#   A booking only changes a few cells: with_rows() copies the
+#   snapshot and recomputes just those cells and the sparse-table
+#   entries that cover them (see BookingStore.refresh_snapshot).
+# ================================================================
+
+BOOKING_DB_PATH = Path(__file__).parent / "resort_database" / "booking_db.xlsx"
+
+# How often (seconds) the workbook is stat()-ed for changes
+STAT_INTERVAL_SECONDS = 1.0
+
+COLUMNS = ("Date", "Roomtype", "Number_of_rooms", "Booked", "Available")
+
+
+def _file_stamp(path: Path) -> tuple:
+    """Returns the (mtime, size) pair used to detect workbook changes."""
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _to_date(value) -> date:
+    """Normalizes a sheet/ISO value (Timestamp, datetime, str) into a date."""
+    if isinstance(value, str):
+        return date.fromisoformat(value.strip()[:10])
+    if hasattr(value, "date"):
+        return value.date()
+    return value
+
+
+@dataclass(frozen=True)
+class AvailabilitySnapshot:
+    """Immutable, columnar view of the booking sheet.
+
+    Each array has shape (len(room_types), number_of_days). Cells that are
+    not present in the sheet are masked out by `present` and hold 0 rooms.
+    """
+
+    start_date: date
+    room_types: tuple
+    number_of_rooms: np.ndarray
+    booked: np.ndarray
+    available: np.ndarray
+    present: np.ndarray
+    stamp: tuple = ()
+    _room_offsets: dict = field(default_factory=dict, repr=False)
+    _range_min: tuple = field(default=(), repr=False)
+
+    @property
+    def number_of_days(self) -> int:
+        return self.available.shape[1]
+
+    @property
+    def end_date(self) -> date:
+        """Last calendar day covered by the sheet (inclusive)."""
+        return self.start_date + timedelta(days=self.number_of_days - 1)
+
+    def room_offset(self, room_type: str):
+        """Returns the row of `room_type` (case-insensitive) or None."""
+        return self._room_offsets.get(room_type.strip().lower())
+
+    def day_offset(self, day) -> int:
+        return (_to_date(day) - self.start_date).days
+
+    def lookup(self, day, room_type: str):
+        """Returns the sheet row for (day, room_type) or None if absent."""
+        row = self.room_offset(room_type)
+        col = self.day_offset(day)
+        if row is None or not 0 <= col < self.number_of_days:
+            return None
+        if not self.present[row, col]:
+            return None
+        return {
+            "Date": (self.start_date + timedelta(days=col)).isoformat(),
+            "Roomtype": self.room_types[row],
+            "Number_of_rooms": int(self.number_of_rooms[row, col]),
+            "Booked": int(self.booked[row, col]),
+            "Available": int(self.available[row, col]),
+        }
+
+    def to_records(self) -> list:
+        """Returns every sheet row, in the same shape as the workbook (date, then room)."""
+        return [
+            {
+                "Date": (self.start_date + timedelta(days=j)).isoformat(),
+                "Roomtype": self.room_types[i],
+                "Number_of_rooms": int(self.number_of_rooms[i, j]),
+                "Booked": int(self.booked[i, j]),
+                "Available": int(self.available[i, j]),
+            }
+            for j in range(self.number_of_days)
+            for i in range(len(self.room_types))
+            if self.present[i, j]
+        ]
+
+    def with_rows(self, records: list, stamp: tuple = ()):
+        """Returns a copy of the snapshot with some sheet rows replaced.
+
+        Only the given cells and the sparse-table entries over them are
+        recomputed, so applying a booking costs a few array copies.
+
+        Returns: The new snapshot, or None if a row is outside the grid
+            (new room type or date), which needs a full build_snapshot().
+        """
+        arrays = [array.copy() for array in (self.number_of_rooms, self.booked, self.available, self.present)]
+        number_of_rooms, booked, available, present = arrays
+
+        # room row -> (first, last) changed day
+        touched = {}
+        for record in records:
+            i = self.room_offset(str(record["Roomtype"]))
+            j = self.day_offset(record["Date"])
+            if i is None or not 0 <= j < self.number_of_days:
+                return None
+            number_of_rooms[i, j] = int(record["Number_of_rooms"])
+            booked[i, j] = int(record["Booked"])
+            available[i, j] = max(0, int(record["Available"]))
+            present[i, j] = True
+            first, last = touched.get(i, (j, j))
+            touched[i] = (min(first, j), max(last, j))
+
+        for array in arrays:
+            array.setflags(write=False)
+
+        range_min = [available]
+        for k, level in enumerate(self._range_min[1:], 1):
+            width, half = 1 << k, 1 << (k - 1)
+            below = range_min[-1]
+            level = level.copy()
+            for i, (first, last) in touched.items():
+                # Windows [j, j + width) that overlap the changed days
+                lo, hi = max(0, first - width + 1), min(last, level.shape[1] - 1) + 1
+                level[i, lo:hi] = np.minimum(below[i, lo:hi], below[i, lo + half:hi + half])
+            level.setflags(write=False)
+            range_min.append(level)
+
+        return dataclasses.replace(
+            self, number_of_rooms=number_of_rooms, booked=booked, available=available,
+            present=present, stamp=stamp, _range_min=tuple(range_min),
+        )
+
+    def min_available(self, check_in, check_out) -> np.ndarray:
+        """Minimum `Available` per room type over the nights [check_in, check_out).
+
+        Nights that fall outside the sheet count as 0 rooms available.
+
+        Returns: int array of shape (len(room_types),).
+        """
+        start = self.day_offset(check_in)
+        stop = self.day_offset(check_out)
+        if stop <= start:
+            raise ValueError("check_out must be after check_in")
+        if start < 0 or stop > self.number_of_days:
+            return np.zeros(len(self.room_types), dtype=np.int32)
+
+        level = (stop - start).bit_length() - 1
+        table = self._range_min[level]
+        return np.minimum(table[:, start], table[:, stop - (1 << level)])
+
+    def open_windows(self, room_type: str, nights: int, number_of_rooms: int = 1,
+                     earliest_check_in=None, latest_check_in=None) -> list:
+        """Lists every check-in date where `room_type` has `number_of_rooms`
+        free for `nights` consecutive nights.
+
+        Returns: Sorted numpy datetime64[D] array of check-in dates.
+        """
+        row = self.room_offset(room_type)
+        if row is None:
+            raise KeyError(room_type)
+        if nights < 1:
+            raise ValueError("nights must be at least 1")
+
+        starts = self.number_of_days - nights + 1
+        if starts <= 0:
+            return np.array([], dtype="datetime64[D]")
+
+        # Window minimum for every possible check-in at once
+        level = nights.bit_length() - 1
+        table = self._range_min[level][row]
+        window_min = np.minimum(table[:starts], table[nights - (1 << level):nights - (1 << level) + starts])
+
+        first = 0 if earliest_check_in is None else max(0, self.day_offset(earliest_check_in))
+        last = starts - 1 if latest_check_in is None else min(starts - 1, self.day_offset(latest_check_in))
+        if first > last:
+            return np.array([], dtype="datetime64[D]")
+
+        offsets = np.flatnonzero(window_min[first:last + 1] >= number_of_rooms) + first
+        return np.datetime64(self.start_date, "D") + offsets
+
+
+def _build_range_min(available: np.ndarray) -> tuple:
+    """Builds the sparse table used for range-minimum queries.
+
+    Level k holds, for every start day j, min(available[:, j : j + 2**k]).
+    """
+    levels = [available]
+    width = 1
+    while 2 * width <= available.shape[1]:
+        previous = levels[-1]
+        level = np.minimum(previous[:, :-width], previous[:, width:])
+        level.setflags(write=False)
+        levels.append(level)
+        width *= 2
+    return tuple(levels)
+
+
+def build_snapshot(records: list, stamp: tuple = ()) -> AvailabilitySnapshot:
+    """Builds a snapshot from row dicts keyed by the sheet COLUMNS.
+
+    Args:
+        records: Iterable of {"Date", "Roomtype", "Number_of_rooms", "Booked", "Available"}
+        stamp: Source version marker stored on the snapshot.
+
+    Returns: An AvailabilitySnapshot covering every date in `records`.
+    """
+    rows = [(_to_date(r["Date"]), str(r["Roomtype"]).strip(), r) for r in records]
+
+    if not rows:
+        empty = np.zeros((0, 0), dtype=np.int32)
+        return AvailabilitySnapshot(
+            start_date=date.today(),
+            room_types=(),
+            number_of_rooms=empty,
+            booked=empty,
+            available=empty,
+            present=empty.astype(bool),
+            stamp=stamp,
+            _range_min=(empty,),
+        )
+
+    # Keep room types in first-seen order (Suite, Penthouse, Delux ...)
+    room_types = tuple(dict.fromkeys(room for _, room, _ in rows))
+    room_offsets = {room.lower(): i for i, room in enumerate(room_types)}
+
+    start_date = min(day for day, _, _ in rows)
+    number_of_days = (max(day for day, _, _ in rows) - start_date).days + 1
+    shape = (len(room_types), number_of_days)
+
+    number_of_rooms = np.zeros(shape, dtype=np.int32)
+    booked = np.zeros(shape, dtype=np.int32)
+    available = np.zeros(shape, dtype=np.int32)
+    present = np.zeros(shape, dtype=bool)
+
+    for day, room, record in rows:
+        i = room_offsets[room.lower()]
+        j = (day - start_date).days
+        number_of_rooms[i, j] = int(record["Number_of_rooms"])
+        booked[i, j] = int(record["Booked"])
+        available[i, j] = int(record["Available"])
+        present[i, j] = True
+
+    return snapshot_from_arrays(start_date, room_types, number_of_rooms, booked, available, present, stamp)
+
+
+def snapshot_from_arrays(start_date: date, room_types: tuple, number_of_rooms: np.ndarray,
+                         booked: np.ndarray, available: np.ndarray, present: np.ndarray,
+                         stamp: tuple = ()) -> AvailabilitySnapshot:
+    """Builds a snapshot around existing (room types, days) arrays.
+
+    The arrays are used as they are (e.g. memory-mapped, see
+    data_snapshot.py) and made read-only; only the sparse table is
+    computed.
+    """
+    # Negative counts in the sheet mean overbooked -> nothing to sell
+    if available.size and available.min() < 0:
+        available = np.clip(available, 0, None)
+
+    for array in (number_of_rooms, booked, available, present):
+        array.setflags(write=False)
+
+    return AvailabilitySnapshot(
+        start_date=start_date,
+        room_types=tuple(room_types),
+        number_of_rooms=number_of_rooms,
+        booked=booked,
+        available=available,
+        present=present,
+        stamp=stamp,
+        _room_offsets={room.lower(): i for i, room in enumerate(room_types)},
+        _range_min=_build_range_min(available),
+    )
+
+
+def read_workbook_records(path: Path = BOOKING_DB_PATH) -> list:
+    """Reads the booking workbook into row dicts with ISO-formatted dates."""
+    # pandas (+ openpyxl) cost ~0.5 s to import: only pay for it when a
+    # workbook really has to be parsed (see data_snapshot.py)
+    import pandas as pd
+
+    booking_db_file = pd.read_excel(path)
+    records = booking_db_file.to_dict(orient="records")
+    for record in records:
+        record["Date"] = _to_date(record["Date"]).isoformat()
+    return records
+
+
+def read_inventory_records(path: Path = BOOKING_DB_PATH) -> list:
+    """Workbook rows, from the build-time snapshot when it matches the workbook."""
+    from .data_snapshot import SNAPSHOT_DIR, read_snapshot_records
+
+    snapshot_dir = Path(path).parent / SNAPSHOT_DIR.name
+    records = read_snapshot_records(path, snapshot_dir)
+    if records is None:
+        records = read_workbook_records(path)
+    return records
+
+
+class WorkbookSource:
+    """Availability source that reads straight from the booking workbook."""
+
+    def __init__(self, path: Path = BOOKING_DB_PATH):
+        self.path = Path(path)
+
+    def stamp(self) -> tuple:
+        return _file_stamp(self.path)
+
+    def load_snapshot(self) -> AvailabilitySnapshot:
+        from .data_snapshot import SNAPSHOT_DIR, read_snapshot
+
+        # Stamp before reading: if the file changes mid-read we reload again
+        stamp = self.stamp()
+        snapshot = read_snapshot(self.path, self.path.parent / SNAPSHOT_DIR.name, stamp=stamp)
+        if snapshot is None:
+            snapshot = build_snapshot(read_workbook_records(self.path), stamp=stamp)
+        return snapshot
+
+
+class AvailabilityIndex:
+    """Hot-reloading holder of the current AvailabilitySnapshot.
+
+    - The source is loaded on first use and again only when its stamp
+      changes: (mtime, size) for the workbook, plus the inventory
+      generation when bookings are served from the booking store.
+      A source with refresh_snapshot() (the booking store) updates the
+      current snapshot in place of a full reload.
+    - The stamp is checked at most every `stat_interval` seconds;
+      invalidate() makes the next call check it (after a booking).
+    - Readers never block on a reload: while one thread rebuilds the
+      snapshot, everybody else keeps reading the previous one.
+    """
+
+    def __init__(self, source=None, stat_interval: float = STAT_INTERVAL_SECONDS):
+        self.source = source if source is not None else WorkbookSource()
+        self.stat_interval = stat_interval
+        self._snapshot = None
+        self._next_stat = 0.0
+        self._reload_lock = threading.Lock()
+
+    def snapshot(self) -> AvailabilitySnapshot:
+        """Returns the current snapshot, reloading it if the source changed."""
+        snapshot = self._snapshot
+
+        if snapshot is None:
+            # Nothing to serve yet, so the first callers have to wait
+            with self._reload_lock:
+                if self._snapshot is None:
+                    self._snapshot = self.source.load_snapshot()
+                    self._next_stat = time.monotonic() + self.stat_interval
+                return self._snapshot
+
+        now = time.monotonic()
+        if now < self._next_stat:
+            return snapshot
+        self._next_stat = now + self.stat_interval
+
+        try:
+            stamp = self.source.stamp()
+        except Exception as e:
+            print(f"Error checking booking database: {e}")
+            return snapshot
+        if stamp == snapshot.stamp:
+            return snapshot
+
+        # Somebody else is already reloading -> serve the previous snapshot
+        if not self._reload_lock.acquire(blocking=False):
+            return snapshot
+        try:
+            refresh = getattr(self.source, "refresh_snapshot", None)
+            self._snapshot = refresh(snapshot) if refresh is not None else self.source.load_snapshot()
+        except Exception as e:
+            # Half-written file etc. Keep serving the last good snapshot.
+            print(f"Error reloading booking database: {e}")
+        finally:
+            self._reload_lock.release()
+        return self._snapshot
+
+    def invalidate(self):
+        """Checks the source again on the next call (e.g. after a booking)."""
+        self._next_stat = 0.0
+
+    def current_stamp(self) -> tuple:
+        """Stamp of the snapshot being served, without checking the source."""
+        snapshot = self._snapshot
+        return snapshot.stamp if snapshot is not None else ()
+
+
+# One index per process, shared by every session
+_availability_index = None
+_availability_index_lock = threading.Lock()
+
+
+def get_availability_index() -> AvailabilityIndex:
+    """Returns the process-wide availability index.
+
+    Inventory is served from the booking store. Rooms booked through
+    check_and_book_tool in this process show up in the very next
+    availability check (see agent._book); bookings made by other worker
+    processes within STAT_INTERVAL_SECONDS.
+    """
+    global _availability_index
+    if _availability_index is None:
+        with _availability_index_lock:
+            if _availability_index is None:
+                from .booking_store import get_booking_store
+
+                _availability_index = AvailabilityIndex(get_booking_store())
+    return _availability_index
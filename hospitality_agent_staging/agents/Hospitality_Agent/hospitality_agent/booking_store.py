@@ -0,0 +1,525 @@
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+from .availability import BOOKING_DB_PATH, _file_stamp, build_snapshot, read_inventory_records
+
+# ================================================================
+# Booking engine backed by SQLite (WAL)
+#
+#   inventory      one row per (date, room_type), seeded from booking_db.xlsx
+#   bookings       one row per confirmed booking, keyed by an idempotency key
+#   booking_nights the rooms each booking holds on each night
+#   inventory_changes  room type + nights changed by each booking, by
+#                  generation (lets availability indexes apply deltas)
+#   meta           generation counter, generation of the last import
+#                  and stamp of the imported workbook
+#
+#   Booking is optimistic:
+#       1. read `available` + `version` for every night (no write lock)
+#       2. in one short write transaction, decrement every night with
+#          "... WHERE version = <read version> AND available >= rooms"
+#       3. if any row did not match, somebody booked in between:
+#          roll back, back off, and retry from step 1
+#   There is no process-wide lock; SQLite only serializes the short
+#   write transaction in step 2.
+# ================================================================
+
+BOOKING_STORE_PATH = Path(os.getenv(
+    "BOOKING_STORE_PATH", Path(__file__).parent / "resort_database" / "bookings.db"))
+
+MAX_BOOKING_ATTEMPTS = 8
+BUSY_TIMEOUT_MS = 5000
+
+# inventory_changes rows kept; an index further behind reloads in full
+MAX_LOGGED_CHANGES = 10_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS inventory (
+    date            TEXT    NOT NULL,
+    room_type       TEXT    NOT NULL,
+    number_of_rooms INTEGER NOT NULL,
+    booked          INTEGER NOT NULL,
+    available       INTEGER NOT NULL,
+    version         INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (room_type, date)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS bookings (
+    confirmation_id  TEXT PRIMARY KEY,
+    idempotency_key  TEXT NOT NULL UNIQUE,
+    room_type        TEXT NOT NULL,
+    check_in_date    TEXT NOT NULL,
+    check_out_date   TEXT NOT NULL,
+    number_of_rooms  INTEGER NOT NULL,
+    special_requests TEXT,
+    user_id          TEXT,
+    session_id       TEXT,
+    created_at       TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS booking_nights (
+    confirmation_id TEXT    NOT NULL REFERENCES bookings (confirmation_id),
+    date            TEXT    NOT NULL,
+    room_type       TEXT    NOT NULL,
+    rooms           INTEGER NOT NULL,
+    PRIMARY KEY (confirmation_id, date)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_booking_nights_room_date
+    ON booking_nights (room_type, date);
+
+CREATE TABLE IF NOT EXISTS inventory_changes (
+    generation INTEGER PRIMARY KEY,
+    room_type  TEXT NOT NULL,
+    first_date TEXT NOT NULL,
+    last_date  TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', '0');
+INSERT OR IGNORE INTO meta (key, value) VALUES ('import_generation', '0');
+"""
+
+
+class BookingConflict(Exception):
+    """Raised internally when a concurrent booking changed a night we read."""
+
+
+def idempotency_key(user_id: str, session_id: str, request_id: str, room_type: str,
+                    check_in: date, check_out: date, number_of_rooms: int) -> str:
+    """Deterministic key for a booking request.
+
+    `request_id` identifies the guest's request (the ADK invocation id): a
+    retry of that request maps to the same key (and so the same
+    confirmation id) in every process and container, while the same stay
+    booked again in a later turn is a new booking. The stay is part of the
+    key so one request can still book two different stays. Python's hash()
+    is salted per process, so it can't be used here.
+    """
+    payload = json.dumps(
+        [user_id or "", session_id or "", request_id, room_type.strip().lower(),
+         check_in.isoformat(), check_out.isoformat(), int(number_of_rooms)],
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def confirmation_id_for(key: str) -> str:
+    return f"HR-{key[:12].upper()}"
+
+
+class BookingStore:
+    """Transactional inventory + bookings for the resort.
+
+    One SQLite connection per thread; WAL lets readers run alongside the
+    single writer. close_all() closes every thread's connection (e.g. when
+    the property is unloaded); a thread that uses the store again reopens.
+    """
+
+    def __init__(self, path: Path = BOOKING_STORE_PATH, workbook_path: Path = BOOKING_DB_PATH):
+        self.path = Path(path)
+        self.workbook_path = Path(workbook_path)
+        self._local = threading.local()
+        # Every open connection, so close_all() can reach other threads' ones
+        self._connections = set()
+        self._connections_lock = threading.Lock()
+        self._import_lock = threading.Lock()
+        self._room_types = {}
+        # Number of times book() lost an optimistic race and re-read (for tuning)
+        self.optimistic_retries = 0
+
+        conn = self._connection()
+        conn.executescript(_SCHEMA)
+        if conn.execute("SELECT COUNT(*) FROM inventory").fetchone()[0] == 0 and self.workbook_path.exists():
+            self.import_from_xlsx()
+
+    # ----------------------------------------------------------------
+    # Connections
+    # ----------------------------------------------------------------
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or conn not in self._connections:
+            # isolation_level=None -> we issue BEGIN/COMMIT ourselves.
+            # Still one connection per thread; other threads only close it.
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=BUSY_TIMEOUT_MS / 1000,
+                                   check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            conn.execute("PRAGMA foreign_keys=ON")
+            with self._connections_lock:
+                self._connections.add(conn)
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """Closes the calling thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            with self._connections_lock:
+                self._connections.discard(conn)
+            conn.close()
+            self._local.conn = None
+
+    def close_all(self):
+        """Closes the connection of every thread; call it only while no thread is using the store."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, set()
+        for conn in connections:
+            conn.close()
+        self._local.conn = None
+
+    # ----------------------------------------------------------------
+    # Inventory import / snapshot
+    # ----------------------------------------------------------------
+    def import_from_xlsx(self, workbook_path: Path = None) -> int:
+        """Loads (or refreshes) inventory from the booking workbook.
+
+        Rows are upserted: Number_of_rooms/Booked/Available come from the
+        sheet, and rooms held by bookings made through this store are
+        re-applied on top, so refreshing the sheet never loses a booking.
+
+        Returns: Number of inventory rows imported.
+        """
+        workbook_path = Path(workbook_path or self.workbook_path)
+        with self._import_lock:
+            stamp = _file_stamp(workbook_path)
+            records = read_inventory_records(workbook_path)
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Rooms held by our own bookings are re-applied on top of the sheet
+                held = {
+                    (r["room_type"], r["date"]): r["rooms"]
+                    for r in conn.execute(
+                        "SELECT room_type, date, SUM(rooms) AS rooms FROM booking_nights GROUP BY room_type, date"
+                    )
+                }
+                rows = []
+                for r in records:
+                    room_type = str(r["Roomtype"]).strip()
+                    rooms_held = held.get((room_type, r["Date"]), 0)
+                    rows.append({
+                        "date": r["Date"],
+                        "room_type": room_type,
+                        "number_of_rooms": int(r["Number_of_rooms"]),
+                        "booked": int(r["Booked"]) + rooms_held,
+                        "available": int(r["Available"]) - rooms_held,
+                    })
+                conn.executemany(
+                    """
+                    INSERT INTO inventory (date, room_type, number_of_rooms, booked, available)
+                    VALUES (:date, :room_type, :number_of_rooms, :booked, :available)
+                    ON CONFLICT (room_type, date) DO UPDATE SET
+                        number_of_rooms = excluded.number_of_rooms,
+                        booked          = excluded.booked,
+                        available       = excluded.available,
+                        version         = inventory.version + 1
+                    """,
+                    rows,
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('workbook_stamp', ?)",
+                    (json.dumps(stamp),),
+                )
+                # Indexes behind this generation can't apply deltas, they reload
+                conn.execute(
+                    "UPDATE meta SET value = ? WHERE key = 'import_generation'",
+                    (str(self._bump_generation(conn)),),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        print(f"--- Booking store imported {len(records)} rows from {workbook_path.name} ---")
+        return len(records)
+
+    def _bump_generation(self, conn: sqlite3.Connection) -> int:
+        """Increments the generation (inside the caller's transaction) and returns it."""
+        conn.execute("UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'generation'")
+        return int(conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()[0])
+
+    def stamp(self) -> tuple:
+        """Version marker for the inventory: (workbook stamp, generation)."""
+        conn = self._connection()
+        generation = conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()[0]
+        try:
+            workbook_stamp = _file_stamp(self.workbook_path)
+        except OSError:
+            workbook_stamp = ()
+        return (workbook_stamp, int(generation))
+
+    def load_snapshot(self):
+        """Builds an AvailabilitySnapshot from the live inventory.
+
+        If the workbook changed since it was last imported, it is
+        re-imported first (keeping the hot-reload behaviour of the sheet).
+        """
+        stamp = self.stamp()
+        conn = self._connection()
+        row = conn.execute("SELECT value FROM meta WHERE key = 'workbook_stamp'").fetchone()
+        if stamp[0] and (row is None or tuple(json.loads(row[0])) != stamp[0]):
+            self.import_from_xlsx()
+            stamp = self.stamp()
+
+        rows = conn.execute(
+            "SELECT date, room_type, number_of_rooms, booked, available FROM inventory ORDER BY date"
+        ).fetchall()
+        return build_snapshot([_record(r) for r in rows], stamp=stamp)
+
+    def refresh_snapshot(self, snapshot):
+        """Brings `snapshot` up to date with the live inventory.
+
+        Bookings since the snapshot's generation are applied as deltas:
+        only the nights they changed are re-read and patched in (see
+        AvailabilitySnapshot.with_rows). A workbook import, or a snapshot
+        older than the change log, means a full load_snapshot().
+        """
+        if not snapshot.stamp:
+            return self.load_snapshot()
+        workbook_stamp, since = snapshot.stamp
+        try:
+            if _file_stamp(self.workbook_path) != workbook_stamp:
+                return self.load_snapshot()
+        except OSError:
+            if workbook_stamp:
+                return self.load_snapshot()
+
+        conn = self._connection()
+        # One read transaction: the generation and the rows it covers agree
+        conn.execute("BEGIN")
+        try:
+            meta = dict(conn.execute("SELECT key, value FROM meta WHERE key IN ('generation', 'import_generation')"))
+            generation = int(meta["generation"])
+            if generation == since:
+                return snapshot
+            changes = conn.execute(
+                "SELECT room_type, first_date, last_date FROM inventory_changes WHERE generation > ?",
+                (since,),
+            ).fetchall()
+            if int(meta["import_generation"]) > since or len(changes) != generation - since:
+                rows = None
+            else:
+                rows = [
+                    row
+                    for change in changes
+                    for row in conn.execute(
+                        """
+                        SELECT date, room_type, number_of_rooms, booked, available FROM inventory
+                        WHERE room_type = ? AND date BETWEEN ? AND ?
+                        """,
+                        tuple(change),
+                    )
+                ]
+        finally:
+            conn.execute("COMMIT")
+
+        updated = None if rows is None else snapshot.with_rows(
+            [_record(r) for r in rows], stamp=(workbook_stamp, generation))
+        return updated if updated is not None else self.load_snapshot()
+
+    # ----------------------------------------------------------------
+    # Bookings
+    # ----------------------------------------------------------------
+    def _canonical_room_type(self, room_type: str) -> str:
+        """Maps a guest-typed room type ("suite ") to the stored name ("Suite")."""
+        wanted = room_type.strip().lower()
+        canonical = self._room_types.get(wanted)
+        if canonical is None:
+            rows = self._connection().execute("SELECT DISTINCT room_type FROM inventory").fetchall()
+            self._room_types = {r[0].lower(): r[0] for r in rows}
+            canonical = self._room_types.get(wanted, room_type.strip())
+        return canonical
+
+    def get_booking(self, confirmation_id: str):
+        row = self._connection().execute(
+            "SELECT * FROM bookings WHERE confirmation_id = ?", (confirmation_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def book(self, room_type: str, check_in: date, check_out: date, number_of_rooms: int,
+             special_requests: str = None, user_id: str = "", session_id: str = "",
+             request_id: str = None) -> dict:
+        """Atomically reserves `number_of_rooms` of `room_type` for every night
+        in [check_in, check_out).
+
+        Retried calls with the same guest/session/request_id/stay return the
+        original confirmation instead of booking again. Without a request_id
+        every call is a new booking.
+
+        Returns: A dictionary with "status" = "success" | "unavailable" | "conflict".
+        """
+        if check_out <= check_in:
+            raise ValueError("check_out_date must be after check_in_date.")
+        if number_of_rooms < 1:
+            raise ValueError("number_of_rooms must be at least 1.")
+
+        if request_id is None:
+            request_id = uuid.uuid4().hex
+        key = idempotency_key(user_id, session_id, request_id, room_type, check_in, check_out, number_of_rooms)
+        confirmation_id = confirmation_id_for(key)
+        nights = [(check_in + timedelta(days=i)).isoformat() for i in range((check_out - check_in).days)]
+        conn = self._connection()
+
+        for attempt in range(MAX_BOOKING_ATTEMPTS):
+            existing = self.get_booking(confirmation_id)
+            if existing is not None:
+                return _confirmation(existing, replayed=True)
+
+            # 1. Optimistic read of every night, outside any write transaction
+            rows = conn.execute(
+                """
+                SELECT date, room_type, available, version FROM inventory
+                WHERE room_type = ? AND date >= ? AND date < ?
+                ORDER BY date
+                """,
+                (self._canonical_room_type(room_type), nights[0], check_out.isoformat()),
+            ).fetchall()
+            if len(rows) != len(nights):
+                return {
+                    "status": "unavailable",
+                    "message": "Some nights of the stay are outside the bookable dates or the room type is unknown.",
+                }
+            if min(r["available"] for r in rows) < number_of_rooms:
+                return {
+                    "status": "unavailable",
+                    "message": f"{rows[0]['room_type']} is not available for every night of the stay.",
+                }
+
+            # 2. Conditional write of every night + the booking, all or nothing
+            try:
+                self._commit_booking(conn, rows, confirmation_id, key, check_in, check_out,
+                                     number_of_rooms, special_requests, user_id, session_id)
+            except BookingConflict:
+                # 3. Lost the race for at least one night -> back off and re-read
+                self.optimistic_retries += 1
+                time.sleep(random.uniform(0, 0.002 * (2 ** attempt)))
+                continue
+            except sqlite3.OperationalError as e:
+                # busy_timeout expired while waiting for the writer slot
+                if "locked" not in str(e) and "busy" not in str(e):
+                    raise
+                self.optimistic_retries += 1
+                time.sleep(random.uniform(0, 0.002 * (2 ** attempt)))
+                continue
+            except sqlite3.IntegrityError:
+                # A concurrent retry of the same request committed first
+                existing = self.get_booking(confirmation_id)
+                if existing is not None:
+                    return _confirmation(existing, replayed=True)
+                raise
+
+            return _confirmation(self.get_booking(confirmation_id), replayed=False)
+
+        return {
+            "status": "conflict",
+            "message": "The rooms are in high demand right now, please try again.",
+        }
+
+    def _commit_booking(self, conn, rows, confirmation_id, key, check_in, check_out,
+                        number_of_rooms, special_requests, user_id, session_id):
+        room_type = rows[0]["room_type"]
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for row in rows:
+                updated = conn.execute(
+                    """
+                    UPDATE inventory SET
+                        available = available - :rooms,
+                        booked    = booked + :rooms,
+                        version   = version + 1
+                    WHERE room_type = :room_type AND date = :date
+                      AND version = :version AND available >= :rooms
+                    """,
+                    {"rooms": number_of_rooms, "room_type": room_type,
+                     "date": row["date"], "version": row["version"]},
+                ).rowcount
+                if updated != 1:
+                    raise BookingConflict(row["date"])
+
+            conn.execute(
+                """
+                INSERT INTO bookings (confirmation_id, idempotency_key, room_type, check_in_date,
+                    check_out_date, number_of_rooms, special_requests, user_id, session_id, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (confirmation_id, key, room_type, check_in.isoformat(), check_out.isoformat(),
+                 number_of_rooms, special_requests, user_id, session_id,
+                 datetime.now(timezone.utc).isoformat()),
+            )
+            conn.executemany(
+                "INSERT INTO booking_nights (confirmation_id, date, room_type, rooms) VALUES (?, ?, ?, ?)",
+                [(confirmation_id, row["date"], room_type, number_of_rooms) for row in rows],
+            )
+            generation = self._bump_generation(conn)
+            conn.execute(
+                "INSERT INTO inventory_changes (generation, room_type, first_date, last_date) VALUES (?, ?, ?, ?)",
+                (generation, room_type, rows[0]["date"], rows[-1]["date"]),
+            )
+            conn.execute("DELETE FROM inventory_changes WHERE generation <= ?",
+                         (generation - MAX_LOGGED_CHANGES,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+
+def _record(row: sqlite3.Row) -> dict:
+    """An inventory row in the workbook's shape (see availability.COLUMNS)."""
+    return {
+        "Date": row["date"],
+        "Roomtype": row["room_type"],
+        "Number_of_rooms": row["number_of_rooms"],
+        "Booked": row["booked"],
+        "Available": row["available"],
+    }
+
+
+def _confirmation(booking: dict, replayed: bool) -> dict:
+    return {
+        "status": "success",
+        "message": "Room booked successfully." if not replayed else "This booking was already confirmed.",
+        "booking_details": {
+            "room_type": booking["room_type"],
+            "check_in_date": booking["check_in_date"],
+            "check_out_date": booking["check_out_date"],
+            "number_of_rooms": booking["number_of_rooms"],
+            "special_requests": booking["special_requests"] or "None",
+            "confirmation_id": booking["confirmation_id"],
+        },
+    }
+
+
+# One store per process
+_booking_store = None
+_booking_store_lock = threading.Lock()
+
+
+def get_booking_store() -> BookingStore:
+    """Returns the process-wide booking store (created on first use)."""
+    global _booking_store
+    if _booking_store is None:
+        with _booking_store_lock:
+            if _booking_store is None:
+                _booking_store = BookingStore()
+    return _booking_store
+
+
+if __name__ == "__main__":
+    # python -m hospitality_agent.booking_store   -> (re)import the workbook
+    store = get_booking_store()
+    store.import_from_xlsx()
+    print(f"Inventory generation: {store.stamp()[1]}")
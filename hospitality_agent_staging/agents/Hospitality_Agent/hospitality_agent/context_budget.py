@@ -0,0 +1,261 @@
+import json
+import os
+import threading
+
+from google.genai import types
+
+from .telemetry import describe_metrics, get_telemetry
+
+# ================================================================
+# Token budget for the conversation history sent to the model
+#
+#   Plugged into an Agent as a before_model_callback (after the
+#   router, before telemetry). Every model call resends the session
+#   history, so without a bound each turn costs more than the last.
+#   Per request, older turns are cut down until the history fits
+#   CONTEXT_TOKEN_BUDGET:
+#       1. results of tools called in earlier turns are reduced to
+#          their short fields (status, dates, room types, ids...);
+#          the current turn's tool results are never touched
+#       2. if that is not enough, the oldest turns are dropped whole
+#          (a turn = a guest message plus everything up to the next
+#          one) and replaced by a one-line summary of what the guest
+#          asked and which bookings were confirmed
+#   The newest KEEP_RECENT_TURNS earlier turns always stay, so a reply
+#   like "yes, book it" keeps its context. The system instruction is
+#   not counted against the budget.
+#
+#   Tokens are estimated at ~4 characters each. Per-call numbers:
+#   ContextBudget.stats() and the adk_context_tokens_total metric.
+#       CONTEXT_BUDGET=0 -> history is sent untouched
+# ================================================================
+
+CONTEXT_BUDGET_ENABLED = os.getenv("CONTEXT_BUDGET", "1") != "0"
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "2000"))
+KEEP_RECENT_TURNS = 2
+
+CHARS_PER_TOKEN = 4
+# Fields of an earlier tool result longer than this (JSON) are dropped
+STALE_FIELD_CHARS = 160
+
+SUMMARY_QUESTION_CHARS = 120
+SUMMARY_MAX_CHARS = 1200
+
+describe_metrics({
+    "adk_context_tokens_total": ("counter", "History tokens sent to the model and saved by the context budget"),
+})
+
+
+def _json_chars(value) -> int:
+    return len(json.dumps(value, default=str, ensure_ascii=False))
+
+
+def part_tokens(part: types.Part) -> int:
+    chars = len(part.text or "")
+    if part.function_call:
+        chars += len(part.function_call.name or "") + _json_chars(part.function_call.args or {})
+    if part.function_response:
+        chars += len(part.function_response.name or "") + _json_chars(part.function_response.response or {})
+    return chars // CHARS_PER_TOKEN + 1
+
+
+def content_tokens(content: types.Content) -> int:
+    return sum(part_tokens(part) for part in content.parts or ())
+
+
+def _is_guest_message(content: types.Content) -> bool:
+    return content.role == "user" and any(part.text for part in content.parts or ())
+
+
+def split_turns(contents: list) -> list:
+    """Groups contents into turns, each starting at a guest message.
+
+    Anything before the first guest message forms its own leading group.
+    """
+    turns = []
+    for content in contents:
+        if not turns or _is_guest_message(content):
+            turns.append([])
+        turns[-1].append(content)
+    return turns
+
+
+def compact_result(response: dict) -> dict:
+    """Keeps the short fields of a tool result and names the dropped ones."""
+    kept, omitted = {}, []
+    for key, value in response.items():
+        if _json_chars(value) <= STALE_FIELD_CHARS:
+            kept[key] = value
+        else:
+            omitted.append(key)
+    if omitted:
+        kept["omitted_from_history"] = omitted
+    return kept
+
+
+def _compact_content(content: types.Content) -> types.Content:
+    """Copy of `content` with its tool results compacted (nothing is mutated)."""
+    parts = []
+    changed = False
+    for part in content.parts or ():
+        response = part.function_response
+        if response is not None and isinstance(response.response, dict):
+            compacted = compact_result(response.response)
+            if "omitted_from_history" in compacted:
+                part = part.model_copy(update={"function_response": response.model_copy(update={"response": compacted})})
+                changed = True
+        parts.append(part)
+    return content.model_copy(update={"parts": parts}) if changed else content
+
+
+def summarize_messages(messages, previous: str = "", question_chars: int = SUMMARY_QUESTION_CHARS,
+                       max_chars: int = SUMMARY_MAX_CHARS) -> str:
+    """Extractive summary of earlier turns: the guest's questions and booking ids.
+
+    `messages` yields (role, text, tool_response) for every content part
+    in order; `previous` is an earlier summary to extend. Also used by
+    session_compaction.py for the turns it archives.
+    """
+    questions = []
+    confirmations = []
+    for role, text, response in messages:
+        if role == "user" and text:
+            questions.append(" ".join(text.split())[:question_chars])
+        # check_and_book_tool nests it under booking_details
+        details = response.get("booking_details") if isinstance(response, dict) else None
+        confirmation = details.get("confirmation_id") if isinstance(details, dict) else None
+        if confirmation and confirmation not in confirmations:
+            confirmations.append(confirmation)
+
+    lines = [previous] if previous else []
+    if questions:
+        lines.append("Guest asked earlier: " + " | ".join(questions))
+    if confirmations:
+        lines.append("Bookings confirmed earlier: " + ", ".join(confirmations))
+    # Drop the oldest context when the summary is full
+    return "\n".join(lines)[-max_chars:]
+
+
+def summarize_turns(turns: list) -> str:
+    """One-line extractive summary of dropped turns (guest questions, booking ids)."""
+    return summarize_messages(
+        (content.role, part.text, part.function_response.response if part.function_response else None)
+        for turn in turns
+        for content in turn
+        for part in content.parts or ()
+    )
+
+
+class ContextBudget:
+    """before_model_callback that fits the request history into a token budget."""
+
+    def __init__(self, budget_tokens: int = CONTEXT_TOKEN_BUDGET, keep_recent_turns: int = KEEP_RECENT_TURNS,
+                 enabled: bool = CONTEXT_BUDGET_ENABLED):
+        self.budget_tokens = budget_tokens
+        self.keep_recent_turns = keep_recent_turns
+        self.enabled = enabled
+        self.telemetry = get_telemetry()
+        self._lock = threading.Lock()
+        self.metrics = {
+            "requests": 0,
+            "trimmed_requests": 0,
+            "tokens_before": 0,
+            "tokens_after": 0,
+            "compacted_results": 0,
+            "dropped_turns": 0,
+        }
+
+    def fit(self, contents: list) -> tuple:
+        """Returns (contents within budget, stats dict). `contents` is not modified.
+
+        Walks the earlier turns newest first: verbatim while they fit, then
+        with compacted tool results, then the rest is dropped. Only the
+        turns that end up in the request are measured, so the cost follows
+        the budget, not the length of the conversation.
+        """
+        turns = split_turns(contents)
+        stats = {"tokens_before": 0, "tokens_after": 0, "compacted_results": 0, "dropped_turns": 0}
+        total = sum(content_tokens(c) for c in turns[-1])
+        kept = [turns[-1]]
+        compacting = False
+        dropped = 0
+
+        for i in range(len(turns) - 2, -1, -1):
+            recent = len(kept) <= self.keep_recent_turns
+            turn = turns[i]
+            if not compacting:
+                size = sum(content_tokens(c) for c in turn)
+                if total + size <= self.budget_tokens or recent:
+                    total += size
+                    kept.append(turn)
+                    continue
+                compacting = True
+            compacted = [_compact_content(c) for c in turn]
+            size = sum(content_tokens(c) for c in compacted)
+            if total + size > self.budget_tokens and not recent:
+                dropped = i + 1
+                break
+            stats["compacted_results"] += sum(a is not b for a, b in zip(compacted, turn))
+            total += size
+            kept.append(compacted)
+
+        if not stats["compacted_results"] and not dropped:
+            stats["tokens_before"] = stats["tokens_after"] = total
+            return contents, stats
+
+        kept = [content for turn in reversed(kept) for content in turn]
+        summary = summarize_turns(turns[:dropped]) if dropped else ""
+        if summary:
+            # Prepended to the first kept guest message (no back-to-back user contents)
+            note = types.Part(text=f"[Earlier in this conversation]\n{summary}")
+            kept[0] = kept[0].model_copy(update={"parts": [note, *kept[0].parts]})
+            total += part_tokens(note)
+
+        # What the history would have cost untouched (dropped turns counted too)
+        stats["tokens_before"] = sum(content_tokens(c) for c in contents)
+        stats.update(tokens_after=total, dropped_turns=dropped)
+        return kept, stats
+
+    def before_model_callback(self, callback_context, llm_request):
+        if not self.enabled or not llm_request.contents:
+            return None
+
+        contents, stats = self.fit(llm_request.contents)
+        llm_request.contents = contents
+
+        saved = stats["tokens_before"] - stats["tokens_after"]
+        with self._lock:
+            self.metrics["requests"] += 1
+            self.metrics["trimmed_requests"] += saved > 0
+            for key in ("tokens_before", "tokens_after", "compacted_results", "dropped_turns"):
+                self.metrics[key] += stats[key]
+        agent = callback_context.agent_name
+        self.telemetry.inc("adk_context_tokens_total", stats["tokens_after"], agent=agent, kind="sent")
+        self.telemetry.inc("adk_context_tokens_total", saved, agent=agent, kind="saved")
+        return None
+
+    def stats(self) -> dict:
+        with self._lock:
+            metrics = dict(self.metrics)
+        requests = metrics["requests"]
+        metrics["avg_tokens_saved"] = round((metrics["tokens_before"] - metrics["tokens_after"]) / requests, 1) if requests else 0.0
+        return metrics
+
+    def reset_stats(self):
+        with self._lock:
+            for key in self.metrics:
+                self.metrics[key] = 0
+
+
+# One budget per process, shared by every session
+_context_budget = None
+_context_budget_lock = threading.Lock()
+
+
+def get_context_budget() -> ContextBudget:
+    global _context_budget
+    if _context_budget is None:
+        with _context_budget_lock:
+            if _context_budget is None:
+                _context_budget = ContextBudget()
+    return _context_budget
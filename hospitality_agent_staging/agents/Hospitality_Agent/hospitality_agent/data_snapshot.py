@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from .availability import BOOKING_DB_PATH, _file_stamp, snapshot_from_arrays
+
+# ================================================================
+# Build-time snapshot of the booking workbook
+#
+#   Parsing booking_db.xlsx needs pandas + openpyxl (~0.5 s of imports
+#   and parsing on a cold container). The Docker build runs
+#       python -m hospitality_agent.data_snapshot
+#   once, which writes next to each workbook (the default one and
+#   every resort_database/properties/<id>/booking_db.xlsx):
+#       snapshot/inventory.npy   int32 (4, room types, days):
+#                                Number_of_rooms, Booked, Available, present
+#       snapshot/inventory.json  start date, room types, workbook
+#                                sha256 and (mtime, size)
+#   At runtime the array is memory-mapped and its planes become the
+#   AvailabilitySnapshot's arrays as they are (no copy, no pandas).
+#
+#   The snapshot is keyed by the workbook's content hash, so an edited
+#   workbook is never shadowed by a stale snapshot: callers fall back
+#   to parsing the workbook. The workbook is only hashed when its
+#   (mtime, size) differs from the one recorded at build time.
+# ================================================================
+
+SNAPSHOT_DIR = BOOKING_DB_PATH.parent / "snapshot"
+SNAPSHOT_VERSION = 2
+
+# Planes of inventory.npy
+PLANES = ("Number_of_rooms", "Booked", "Available", "present")
+
+
+def workbook_digest(path: Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def write_snapshot(records: list, workbook_path: Path = BOOKING_DB_PATH, snapshot_dir: Path = SNAPSHOT_DIR) -> Path:
+    """Writes the snapshot for `records` (sheet rows) read from `workbook_path`."""
+    room_types = tuple(dict.fromkeys(str(r["Roomtype"]).strip() for r in records))
+    days = [date.fromisoformat(r["Date"]) for r in records]
+    start_date = min(days)
+    offsets = {room: i for i, room in enumerate(room_types)}
+
+    grid = np.zeros((len(PLANES), len(room_types), (max(days) - start_date).days + 1), dtype=np.int32)
+    for day, record in zip(days, records):
+        i = offsets[str(record["Roomtype"]).strip()]
+        j = (day - start_date).days
+        grid[:, i, j] = (int(record["Number_of_rooms"]), int(record["Booked"]), int(record["Available"]), 1)
+
+    snapshot_dir = Path(snapshot_dir)
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    # Array first, metadata last: a half-written snapshot never validates
+    np.save(snapshot_dir / "inventory.npy", grid)
+    meta = {
+        "version": SNAPSHOT_VERSION,
+        "workbook_sha256": workbook_digest(workbook_path),
+        "workbook_stamp": list(_file_stamp(workbook_path)),
+        "start_date": start_date.isoformat(),
+        "room_types": list(room_types),
+    }
+    tmp = snapshot_dir / "inventory.json.tmp"
+    tmp.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    os.replace(tmp, snapshot_dir / "inventory.json")
+    return snapshot_dir
+
+
+def _is_current(meta: dict, workbook_path: Path) -> bool:
+    """True if the snapshot was built from the workbook as it is now."""
+    if meta.get("version") != SNAPSHOT_VERSION:
+        return False
+    # Same (mtime, size) as at build time: unchanged, no need to hash it
+    if tuple(meta["workbook_stamp"]) == _file_stamp(workbook_path):
+        return True
+    # Touched (e.g. checked out again) but maybe not edited
+    return meta["workbook_sha256"] == workbook_digest(workbook_path)
+
+
+def _load(workbook_path: Path, snapshot_dir: Path):
+    """Returns (meta, memory-mapped grid), or None if the snapshot is missing or stale."""
+    snapshot_dir = Path(snapshot_dir)
+    try:
+        meta = json.loads((snapshot_dir / "inventory.json").read_text(encoding="utf-8"))
+        if not _is_current(meta, workbook_path):
+            return None
+        return meta, np.load(snapshot_dir / "inventory.npy", mmap_mode="r")
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def read_snapshot(workbook_path: Path = BOOKING_DB_PATH, snapshot_dir: Path = SNAPSHOT_DIR, stamp: tuple = ()):
+    """Returns the AvailabilitySnapshot stored for the workbook, or None if it is missing or stale.
+
+    Its count arrays are read-only views of the memory-mapped file.
+    """
+    loaded = _load(workbook_path, snapshot_dir)
+    if loaded is None:
+        return None
+    meta, (rooms, booked, available, present) = loaded
+    return snapshot_from_arrays(date.fromisoformat(meta["start_date"]), tuple(meta["room_types"]),
+                                rooms, booked, available, present != 0, stamp=stamp)
+
+
+def read_snapshot_records(workbook_path: Path = BOOKING_DB_PATH, snapshot_dir: Path = SNAPSHOT_DIR):
+    """Returns the workbook rows from the snapshot, or None if it is missing or stale.
+
+    Counts are as in the sheet (an overbooked night keeps its negative
+    Available), for BookingStore.import_from_xlsx().
+    """
+    loaded = _load(workbook_path, snapshot_dir)
+    if loaded is None:
+        return None
+    meta, grid = loaded
+    start_date = date.fromisoformat(meta["start_date"])
+    room_types = meta["room_types"]
+    # Sheet order: date, then room type
+    days, rooms = np.nonzero(grid[3].T)
+    counts = grid[:3, rooms, days].T.tolist()
+    return [
+        {
+            "Date": (start_date + timedelta(days=int(j))).isoformat(),
+            "Roomtype": room_types[i],
+            "Number_of_rooms": number_of_rooms,
+            "Booked": booked,
+            "Available": available,
+        }
+        for i, j, (number_of_rooms, booked, available) in zip(rooms.tolist(), days.tolist(), counts)
+    ]
+
+
+def build_snapshots() -> list:
+    """(Re)builds the snapshot of the default workbook and of every property's
+    (see properties.py); returns the snapshot directories."""
+    from .availability import read_workbook_records
+    from .properties import PROPERTIES_DIR
+
+    written = []
+    for workbook_path in [BOOKING_DB_PATH, *sorted(PROPERTIES_DIR.glob("*/booking_db.xlsx"))]:
+        records = read_workbook_records(workbook_path)
+        path = write_snapshot(records, workbook_path, workbook_path.parent / SNAPSHOT_DIR.name)
+        print(f"--- Wrote {len(records)} inventory rows to {path} ---")
+        written.append(path)
+    return written
+
+
+if __name__ == "__main__":
+    # python -m hospitality_agent.data_snapshot   -> (re)build the snapshots
+    build_snapshots()
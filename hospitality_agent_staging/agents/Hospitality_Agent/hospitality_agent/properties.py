@@ -0,0 +1,276 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+from .availability import AvailabilityIndex, get_availability_index
+from .booking_store import BookingStore, get_booking_store
+from .resort_knowledge import RESORT_INFO_PATH, KnowledgeBaseFile, get_knowledge_base
+from .telemetry import describe_metrics, get_telemetry
+
+# ================================================================
+# Multi-property tenancy
+#
+#   One deployment serves many resorts. A conversation's property is
+#   chosen when its session is created and kept in session state
+#   ("property_id"); tools, direct answers and the FAQ cache all read
+#   that property's data:
+#       resort_database/                   the default property
+#       resort_database/properties/<id>/   every other property
+#           resort_info.json               resort information
+#           booking_db.xlsx                inventory workbook (optional)
+#           bookings.db                    its booking store shard
+#
+#   Inventory is sharded by property: every property has its own
+#   booking store (SQLite file), so bookings at a busy property never
+#   wait on another property's write lock.
+#
+#   Properties are loaded on first use into an LRU of at most
+#   MAX_LOADED_PROPERTIES (the default property is always loaded).
+#   Each one owns its data and its caches (attachment()), bounded per
+#   property, so a busy property can't push the others' entries out.
+#   Loading happens outside the LRU lock, piece by piece under the
+#   property's own lock, so a slow load (e.g. parsing a workbook) only
+#   delays that property's guests.
+#
+#   A turn holds its property with PropertyRegistry.in_use() (main.py).
+#   Eviction skips properties in use (the LRU may briefly hold more
+#   than MAX_LOADED_PROPERTIES) and closes the evicted property's
+#   booking store connections, so a busy property is never unloaded
+#   under its guests and reloaded on their next call.
+# ================================================================
+
+PROPERTIES_DIR = Path(os.getenv("PROPERTIES_DIR", RESORT_INFO_PATH.parent / "properties"))
+DEFAULT_PROPERTY_ID = os.getenv("DEFAULT_PROPERTY_ID", "default")
+MAX_LOADED_PROPERTIES = int(os.getenv("MAX_LOADED_PROPERTIES", "64"))
+
+PROPERTY_STATE_KEY = "property_id"
+
+# Property ids are directory names: no separators, no dots
+PROPERTY_ID_PATTERN = r"^[a-z0-9][a-z0-9_-]{0,63}$"
+_PROPERTY_ID_RE = re.compile(PROPERTY_ID_PATTERN)
+
+describe_metrics({
+    "adk_property_cache_total": ("counter", "Properties loaded into / evicted from the per-process LRU (properties.py)"),
+})
+
+
+class UnknownProperty(KeyError):
+    """Raised for a property id without a data directory."""
+
+
+def property_id_of(state) -> str:
+    """Returns the property of a conversation from its session state."""
+    return state.get(PROPERTY_STATE_KEY) or DEFAULT_PROPERTY_ID
+
+
+class Property:
+    """Data and caches of one property, each loaded on first use."""
+
+    def __init__(self, property_id: str, directory: Path):
+        self.property_id = property_id
+        self.directory = Path(directory)
+        self._knowledge_base_file = KnowledgeBaseFile(self.directory / "resort_info.json")
+        self._lock = threading.Lock()
+        self._booking_store = None
+        self._availability_index = None
+        self._attachments = {}
+        # Turns using the property (PropertyRegistry.in_use); guarded by the registry's lock
+        self.in_flight = 0
+
+    def knowledge_base(self):
+        return self._knowledge_base_file.get()
+
+    def booking_store(self) -> BookingStore:
+        if self._booking_store is None:
+            with self._lock:
+                if self._booking_store is None:
+                    self._booking_store = BookingStore(path=self.directory / "bookings.db",
+                                                       workbook_path=self.directory / "booking_db.xlsx")
+        return self._booking_store
+
+    def availability_index(self) -> AvailabilityIndex:
+        if self._availability_index is None:
+            store = self.booking_store()
+            with self._lock:
+                if self._availability_index is None:
+                    self._availability_index = AvailabilityIndex(store)
+        return self._availability_index
+
+    def attachment(self, name: str, factory):
+        """Returns this property's `name` object, created by factory(property) on first use.
+
+        For per-property caches kept outside this package (e.g. the
+        response cache); they are dropped with the property.
+        """
+        value = self._attachments.get(name)
+        if value is None:
+            with self._lock:
+                value = self._attachments.get(name)
+                if value is None:
+                    value = self._attachments[name] = factory(self)
+        return value
+
+    def close(self):
+        """Closes the booking store's connections and drops the loaded data.
+
+        A caller still holding the property loads it again on its next use.
+        """
+        with self._lock:
+            store = self._booking_store
+            self._booking_store = None
+            self._availability_index = None
+            self._attachments = {}
+        if store is not None:
+            store.close_all()
+
+    def initial_state(self) -> dict:
+        """Session state of a new conversation with this property."""
+        knowledge_base = self.knowledge_base()
+        location = knowledge_base.sections.get("location") or {}
+        return {
+            PROPERTY_STATE_KEY: self.property_id,
+            "resort_name": knowledge_base.resort_name,
+            "location": location.get("city", ""),
+        }
+
+
+class DefaultProperty(Property):
+    """The original resort (resort_database/), served by the process-wide singletons."""
+
+    def __init__(self):
+        super().__init__(DEFAULT_PROPERTY_ID, RESORT_INFO_PATH.parent)
+
+    def knowledge_base(self):
+        return get_knowledge_base()
+
+    def booking_store(self) -> BookingStore:
+        return get_booking_store()
+
+    def availability_index(self) -> AvailabilityIndex:
+        return get_availability_index()
+
+    def close(self):
+        # Never evicted; the singletons outlive the registry
+        pass
+
+
+class PropertyRegistry:
+    """Bounded LRU of loaded properties, plus the always-loaded default one."""
+
+    property_class = Property
+
+    def __init__(self, properties_dir: Path = PROPERTIES_DIR, max_loaded: int = MAX_LOADED_PROPERTIES):
+        self.properties_dir = Path(properties_dir)
+        self.max_loaded = max_loaded
+        self.default = DefaultProperty()
+        self.telemetry = get_telemetry()
+        self._loaded = OrderedDict()
+        self._lock = threading.Lock()
+        self.metrics = {"hits": 0, "loads": 0, "evictions": 0}
+
+    def directory_of(self, property_id: str) -> Path:
+        """Data directory of `property_id`; raises UnknownProperty if there is none."""
+        if not _PROPERTY_ID_RE.match(property_id or ""):
+            raise UnknownProperty(property_id)
+        directory = self.properties_dir / property_id
+        if not (directory / "resort_info.json").is_file():
+            raise UnknownProperty(property_id)
+        return directory
+
+    def get(self, property_id: str = None) -> Property:
+        """Returns the property, registering it on first use (data loads lazily)."""
+        return self._get(property_id)
+
+    @contextmanager
+    def in_use(self, property_id: str = None):
+        """Holds the property for the duration of a turn: it is not evicted meanwhile."""
+        prop = self._get(property_id, pin=True)
+        try:
+            yield prop
+        finally:
+            with self._lock:
+                prop.in_flight -= 1
+
+    def _get(self, property_id: str, pin: bool = False) -> Property:
+        if not property_id or property_id == DEFAULT_PROPERTY_ID:
+            if not pin:
+                return self.default
+            with self._lock:
+                return self._pinned(self.default, pin)
+
+        with self._lock:
+            prop = self._loaded.get(property_id)
+            if prop is not None:
+                self._loaded.move_to_end(property_id)
+                self.metrics["hits"] += 1
+                return self._pinned(prop, pin)
+
+        # Outside the lock: a stat() per miss, nothing is read yet
+        prop = self.property_class(property_id, self.directory_of(property_id))
+        with self._lock:
+            existing = self._loaded.get(property_id)
+            if existing is not None:
+                return self._pinned(existing, pin)
+            self._loaded[property_id] = self._pinned(prop, pin)
+            self.metrics["loads"] += 1
+            evicted = self._evict()
+            self.metrics["evictions"] += len(evicted)
+        # Outside the lock: closing waits for nothing but the SQLite handles
+        for old in evicted:
+            old.close()
+        self.telemetry.inc("adk_property_cache_total", result="load")
+        if evicted:
+            self.telemetry.inc("adk_property_cache_total", len(evicted), result="eviction")
+        return prop
+
+    @staticmethod
+    def _pinned(prop: Property, pin: bool) -> Property:
+        # Caller holds the lock
+        if pin:
+            prop.in_flight += 1
+        return prop
+
+    def _evict(self) -> list:
+        """Drops least recently used properties that are not in use (caller holds the lock)."""
+        evicted = []
+        excess = len(self._loaded) - self.max_loaded
+        for property_id, prop in list(self._loaded.items()):
+            if excess <= 0:
+                break
+            if prop.in_flight:
+                continue
+            del self._loaded[property_id]
+            evicted.append(prop)
+            excess -= 1
+        return evicted
+
+    def property_ids(self) -> list:
+        """Every property with a data directory, default first."""
+        if not self.properties_dir.is_dir():
+            return [DEFAULT_PROPERTY_ID]
+        others = sorted(
+            path.name for path in self.properties_dir.iterdir()
+            if _PROPERTY_ID_RE.match(path.name) and (path / "resort_info.json").is_file()
+        )
+        return [DEFAULT_PROPERTY_ID, *others]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self.metrics, "loaded": len(self._loaded), "max_loaded": self.max_loaded}
+
+
+# One registry per process
+_properties = None
+_properties_lock = threading.Lock()
+
+
+def get_properties() -> PropertyRegistry:
+    global _properties
+    if _properties is None:
+        with _properties_lock:
+            if _properties is None:
+                _properties = PropertyRegistry()
+    return _properties
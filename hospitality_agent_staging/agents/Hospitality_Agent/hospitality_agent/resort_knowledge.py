@@ -0,0 +1,198 @@
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+# ================================================================
+# Resort knowledge base
+#
+#   resort_info.json is loaded once and split into its top-level
+#   sections (location, contact, rooms, amenities, dining, spa,
+#   activities, policies). Every section is indexed in an inverted
+#   index (token -> sections) with TF-IDF weights, so a question
+#   like "what time is checkout?" returns just the `rooms` section
+#   instead of the whole document.
+# ================================================================
+
+RESORT_INFO_PATH = Path(__file__).parent / "resort_database" / "resort_info.json"
+
+# How often (seconds) the data file is stat()-ed for changes
+STAT_INTERVAL_SECONDS = 1.0
+
+# Max number of sections returned for one query
+MAX_SECTIONS = 3
+
+# Words guests use for a section that don't appear in the data itself
+SECTION_KEYWORDS = {
+    "location": "where address located location directions city state country landmark nearby far distance map",
+    "contact": "contact phone call number email mail website reach",
+    "rooms": "room stay suite penthouse delux deluxe bed checkin checkout arrival departure early late time",
+    "amenities": "amenity facility pool swim swimming wifi internet gym workout yoga kid child play business shuttle airport pickup transfer room service",
+    "dining": "dining restaurant food eat breakfast lunch dinner bar drink cocktail cuisine menu meal",
+    "spa": "spa massage therapy treatment wellness relax reflexology couple",
+    "activities": "activity thing do kayak walk cycle cycling bike bonfire music live event entertainment weekend",
+    "policies": "policy rule cancel cancellation refund pet dog cat smoke smoking allowed",
+}
+
+STOPWORDS = frozenset(
+    "a an and are at be can do does for from have how i in is it me my of on or our "
+    "the there to what when where which who will with you your any about tell".split()
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _stem(token: str) -> str:
+    """Very small plural folding: policies -> policy, pools -> pool."""
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> list:
+    """Lowercases, splits, folds plurals and joins "check in/out" into one token."""
+    raw = _TOKEN_RE.findall(text.lower().replace("_", " "))
+    tokens = []
+    i = 0
+    while i < len(raw):
+        word = raw[i]
+        if word == "check" and i + 1 < len(raw) and raw[i + 1] in ("in", "out"):
+            tokens.append("check" + raw[i + 1])
+            i += 2
+            continue
+        if word not in STOPWORDS:
+            tokens.append(_stem(word))
+        i += 1
+    return tokens
+
+
+def _flatten(value) -> str:
+    """Renders a section (keys and values) as plain text for indexing."""
+    if isinstance(value, dict):
+        return " ".join(f"{key} {_flatten(item)}" for key, item in value.items())
+    if isinstance(value, list):
+        return " ".join(_flatten(item) for item in value)
+    return str(value)
+
+
+@dataclass(frozen=True)
+class KnowledgeBase:
+    """Immutable, indexed copy of resort_info.json."""
+
+    resort_name: str
+    sections: dict
+    stamp: tuple = ()
+    # token -> ((section, tf-idf weight), ...)
+    _postings: dict = field(default_factory=dict, repr=False)
+
+    @property
+    def topics(self) -> list:
+        return list(self.sections)
+
+    def search(self, query: str, limit: int = MAX_SECTIONS) -> list:
+        """Returns the names of the sections that best match `query`.
+
+        Sections scoring less than half of the best match are dropped, so a
+        focused question gets one section and a broad one gets a few.
+        """
+        scores = defaultdict(float)
+        for token in set(tokenize(query)):
+            # An exact section name ("spa", "dining") always wins
+            if token in self.sections:
+                scores[token] += 10.0
+            for section, weight in self._postings.get(token, ()):
+                scores[section] += weight
+
+        if not scores:
+            return []
+        best = max(scores.values())
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return [section for section, score in ranked[:limit] if score >= best / 2]
+
+    def lookup(self, query: str) -> dict:
+        """Returns {section: data} for the sections matching `query`."""
+        return {section: self.sections[section] for section in self.search(query)}
+
+
+def build_knowledge_base(resort_info: dict, stamp: tuple = ()) -> KnowledgeBase:
+    """Splits `resort_info` into sections and builds the TF-IDF inverted index."""
+    resort_name = resort_info.get("resort_name", "")
+    sections = {key: value for key, value in resort_info.items() if key != "resort_name"}
+
+    term_counts = {}
+    for section, value in sections.items():
+        text = f"{section} {_flatten(value)} {SECTION_KEYWORDS.get(section, '')}"
+        term_counts[section] = Counter(tokenize(text))
+
+    document_frequency = Counter()
+    for counts in term_counts.values():
+        document_frequency.update(counts.keys())
+
+    postings = defaultdict(list)
+    for section, counts in term_counts.items():
+        # Length-normalized so long sections don't win on volume alone
+        norm = math.sqrt(sum(counts.values()))
+        for token, count in counts.items():
+            idf = math.log(1 + len(sections) / document_frequency[token])
+            postings[token].append((section, count * idf / norm))
+
+    return KnowledgeBase(
+        resort_name=resort_name,
+        sections=sections,
+        stamp=stamp,
+        _postings={token: tuple(entries) for token, entries in postings.items()},
+    )
+
+
+def load_knowledge_base(path: Path = RESORT_INFO_PATH) -> KnowledgeBase:
+    stat = os.stat(path)
+    with open(path, encoding="utf-8") as f:
+        resort_info = json.load(f)
+    return build_knowledge_base(resort_info, stamp=(stat.st_mtime_ns, stat.st_size))
+
+
+class KnowledgeBaseFile:
+    """Knowledge base of one resort_info.json, reloaded when the file changes."""
+
+    def __init__(self, path: Path = RESORT_INFO_PATH, stat_interval: float = STAT_INTERVAL_SECONDS):
+        self.path = Path(path)
+        self.stat_interval = stat_interval
+        self._knowledge_base = None
+        self._next_stat = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> KnowledgeBase:
+        """Returns the current knowledge base, reloading it if the file changed."""
+        knowledge_base = self._knowledge_base
+        if knowledge_base is not None and time.monotonic() < self._next_stat:
+            return knowledge_base
+
+        with self._lock:
+            self._next_stat = time.monotonic() + self.stat_interval
+            try:
+                stat = os.stat(self.path)
+                if self._knowledge_base is None or self._knowledge_base.stamp != (stat.st_mtime_ns, stat.st_size):
+                    self._knowledge_base = load_knowledge_base(self.path)
+            except Exception as e:
+                if self._knowledge_base is None:
+                    raise
+                # Keep serving the last good copy
+                print(f"Error reloading resort information: {e}")
+            return self._knowledge_base
+
+
+# The default property's knowledge base (one per process); other
+# properties get their own KnowledgeBaseFile (see properties.py)
+_knowledge_base_file = KnowledgeBaseFile(RESORT_INFO_PATH)
+
+
+def get_knowledge_base() -> KnowledgeBase:
+    """Returns the current knowledge base, reloading it if the file changed."""
+    return _knowledge_base_file.get()
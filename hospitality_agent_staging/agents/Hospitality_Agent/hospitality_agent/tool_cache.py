@@ -0,0 +1,279 @@
+import functools
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .telemetry import describe_metrics, get_telemetry
+
+# ================================================================
+# Per-session memoization of tool results
+#
+#   Wraps a tool function (same name, signature and docstring, so
+#   ADK builds the same declaration). Results are kept in process,
+#   per session:
+#       (app, user, session) -> {<tool>:<args hash> -> {"expires_at",
+#                                "version", "epoch", "result"}}
+#   so a repeated call in the same conversation is answered from
+#   memory: no file, DB or index access. Nothing is written to the
+#   session (its state and events stay small); the cache is an LRU of
+#   MAX_SESSIONS sessions with at most MAX_ENTRIES_PER_SESSION entries
+#   each, and expired entries of a session are dropped whenever it
+#   stores a new one. A session served by another worker process just
+#   misses once there.
+#
+#   An entry is used only while it is
+#       - younger than the tool's TTL
+#       - built from the same data version (e.g. resort_info.json
+#         stamp, inventory stamp of the snapshot being served),
+#         read right after the tool ran
+#       - built in the same inventory epoch of the session: any
+#         booking attempt (check_and_book_tool) bumps the epoch, so
+#         availability is re-read after it
+#   Results with an "error" key are never stored.
+#
+#   Behind offloaded() (tool_executor.py) the lookup runs on the event
+#   loop, so a hit never waits for the tool thread pool; only misses
+#   run there.
+#
+#   Hit / miss counters and latency per tool: ToolCache.stats(), and
+#   the adk_tool_cache_lookups_total metric.
+#       TOOL_CACHE=0 -> tools always run
+# ================================================================
+
+TOOL_CACHE_ENABLED = os.getenv("TOOL_CACHE", "1") != "0"
+
+# Sessions kept in the LRU, and entries kept per session
+MAX_SESSIONS = 10_000
+MAX_ENTRIES_PER_SESSION = 32
+
+# The inventory epoch stays in session state (one small counter), so a
+# booking invalidates the session's entries in every worker process
+EPOCH_STATE_KEY = "tool_cache_inventory_epoch"
+
+LOOKUP_RESULTS = ("hit", "miss", "expired", "stale")
+
+describe_metrics({
+    "adk_tool_cache_lookups_total": ("counter", "Memoized tool lookups by result (hit / miss / expired / stale)"),
+})
+
+
+def args_digest(arguments: dict) -> str:
+    """Stable hash of a tool call's arguments (tool_context excluded)."""
+    payload = json.dumps(arguments, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class ToolCache:
+    """Memoizing decorator factory plus the hit/miss counters of every tool."""
+
+    def __init__(self, enabled: bool = TOOL_CACHE_ENABLED, max_sessions: int = MAX_SESSIONS,
+                 max_entries_per_session: int = MAX_ENTRIES_PER_SESSION, clock=time.monotonic):
+        self.enabled = enabled
+        self.max_sessions = max_sessions
+        self.max_entries_per_session = max_entries_per_session
+        self._clock = clock
+        self._lock = threading.Lock()
+        # (app, user, session) -> OrderedDict(entry key -> entry), both LRU
+        self._sessions = OrderedDict()
+        # tool -> {"hit": n, "miss": n, ...}
+        self._metrics = {}
+        self.telemetry = get_telemetry()
+
+    def memoize(self, ttl_seconds: float, version=None, inventory: bool = False):
+        """Decorator for a tool function taking `tool_context`.
+
+        Args:
+            ttl_seconds: How long a stored result may be reused.
+            version: Optional callable taking the tool_context and returning
+                the current version of the data behind the tool (e.g. of the
+                conversation's property). Must be cheap (no I/O).
+            inventory: The result depends on room inventory, so it is
+                dropped when the session books (see invalidate_inventory).
+        """
+        def decorator(func):
+            signature = inspect.signature(func)
+            defaults = {
+                name: parameter.default
+                for name, parameter in signature.parameters.items()
+                if parameter.default is not inspect.Parameter.empty
+            }
+            name = func.__name__
+
+            def current_version(tool_context):
+                return json.dumps(version(tool_context), default=str) if version is not None else None
+
+            def lookup(*args, **kwargs):
+                """Returns (True, result) for a usable entry, else (False, pending) for call()."""
+                started = time.perf_counter()
+                if args:
+                    bound = signature.bind(*args, **kwargs)
+                    bound.apply_defaults()
+                    arguments = dict(bound.arguments)
+                else:
+                    # How ADK calls tools: keywords only
+                    arguments = {**defaults, **kwargs}
+                tool_context = arguments.pop("tool_context", None)
+                session = getattr(tool_context, "session", None)
+                if not self.enabled or session is None:
+                    return False, None
+
+                session_key = (session.app_name, session.user_id, session.id)
+                key = f"{name}:{args_digest(arguments)}"
+                epoch = tool_context.state.get(EPOCH_STATE_KEY, 0) if inventory else None
+                now = self._clock()
+
+                entry = self._get(session_key, key)
+                try:
+                    if entry is None:
+                        self._count(name, "miss")
+                    elif entry.get("expires_at", 0) <= now:
+                        self._count(name, "expired")
+                    elif entry.get("version") != current_version(tool_context) or entry.get("epoch") != epoch:
+                        self._count(name, "stale")
+                    else:
+                        self._count(name, "hit", time.perf_counter() - started)
+                        # Shallow copy: callers may add keys, the stored entry stays as is
+                        return True, dict(entry["result"])
+                except Exception:
+                    # The data can't be read; let the tool report its own error
+                    return False, None
+                return False, (session_key, key, epoch, now, started, tool_context)
+
+            # Runs the tool and stores its result (`pending` as returned by
+            # lookup()); named like the tool for the executor's metrics
+            @functools.wraps(func)
+            def call(pending, *args, **kwargs):
+                result = func(*args, **kwargs)
+                if pending is None:
+                    return result
+                session_key, key, epoch, now, started, tool_context = pending
+                self._time(name, "miss", time.perf_counter() - started)
+                if isinstance(result, dict) and "error" not in result:
+                    try:
+                        # Read after the call: the version of the data the tool just used
+                        stored_version = current_version(tool_context)
+                        stored = json.loads(json.dumps(result))
+                    except Exception:
+                        return result
+                    self._put(session_key, key, {
+                        "expires_at": now + ttl_seconds,
+                        "version": stored_version,
+                        "epoch": epoch,
+                        "result": stored,
+                    })
+                return result
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                found, value = lookup(*args, **kwargs)
+                return value if found else call(value, *args, **kwargs)
+
+            # offloaded() answers hits on the event loop and only sends
+            # call() to the thread pool (see tool_executor.py)
+            wrapper.memo_lookup = lookup
+            wrapper.memo_call = call
+            return wrapper
+        return decorator
+
+    def _get(self, session_key: tuple, key: str):
+        with self._lock:
+            entries = self._sessions.get(session_key)
+            if entries is None or key not in entries:
+                return None
+            self._sessions.move_to_end(session_key)
+            entries.move_to_end(key)
+            return entries[key]
+
+    def _put(self, session_key: tuple, key: str, entry: dict):
+        now = self._clock()
+        with self._lock:
+            entries = self._sessions.get(session_key)
+            if entries is None:
+                entries = self._sessions[session_key] = OrderedDict()
+            self._sessions.move_to_end(session_key)
+            # Expired entries of the session go first, then its least recently used
+            for stale in [k for k, e in entries.items() if e["expires_at"] <= now]:
+                del entries[stale]
+            entries[key] = entry
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries_per_session:
+                entries.popitem(last=False)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def forget(self, app_name: str, user_id: str, session_id: str):
+        """Drops a session's entries (e.g. when it is deleted or archived)."""
+        with self._lock:
+            self._sessions.pop((app_name, user_id, session_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+
+    def invalidate_inventory(self, tool_context):
+        """Drops every inventory-dependent entry of the calling session."""
+        if tool_context is None:
+            return
+        state = tool_context.state
+        state[EPOCH_STATE_KEY] = state.get(EPOCH_STATE_KEY, 0) + 1
+
+    def _counts(self, tool: str) -> dict:
+        counts = self._metrics.get(tool)
+        if counts is None:
+            counts = self._metrics[tool] = {
+                **dict.fromkeys(LOOKUP_RESULTS, 0), "hit_seconds": 0.0, "ran": 0, "ran_seconds": 0.0}
+        return counts
+
+    def _count(self, tool: str, result: str, seconds: float = None):
+        with self._lock:
+            self._counts(tool)[result] += 1
+        self.telemetry.inc("adk_tool_cache_lookups_total", tool=tool, result=result)
+        if seconds is not None:
+            self._time(tool, result, seconds)
+
+    def _time(self, tool: str, result: str, seconds: float):
+        """Records how long a call took: a hit, or a miss that ran the tool."""
+        with self._lock:
+            counts = self._counts(tool)
+            if result == "hit":
+                counts["hit_seconds"] += seconds
+            else:
+                counts["ran"] += 1
+                counts["ran_seconds"] += seconds
+
+    def stats(self) -> dict:
+        """Lookup counters, hit rate and mean hit / miss latency per tool (this process).
+
+        Miss latency includes running the tool (and its thread pool hop).
+        """
+        with self._lock:
+            metrics = {tool: dict(counts) for tool, counts in self._metrics.items()}
+        for counts in metrics.values():
+            lookups = sum(counts[result] for result in LOOKUP_RESULTS)
+            counts["hit_rate"] = round(counts["hit"] / lookups, 3) if lookups else 0.0
+            hit_seconds, ran, ran_seconds = counts.pop("hit_seconds"), counts.pop("ran"), counts.pop("ran_seconds")
+            counts["hit_mean_ms"] = round(1000 * hit_seconds / counts["hit"], 3) if counts["hit"] else 0.0
+            counts["miss_mean_ms"] = round(1000 * ran_seconds / ran, 3) if ran else 0.0
+        return metrics
+
+    def reset_stats(self):
+        with self._lock:
+            self._metrics.clear()
+
+
+# One cache per process
+_tool_cache = None
+_tool_cache_lock = threading.Lock()
+
+
+def get_tool_cache() -> ToolCache:
+    global _tool_cache
+    if _tool_cache is None:
+        with _tool_cache_lock:
+            if _tool_cache is None:
+                _tool_cache = ToolCache()
+    return _tool_cache
@@ -0,0 +1,127 @@
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .telemetry import get_telemetry
+
+# ================================================================
+# Offloaded tools
+#
+#   ADK calls a plain (sync) function tool on the event loop that
+#   runs every session of the process. While a tool blocks (SQLite
+#   busy wait and retry back-off while booking, re-reading the
+#   workbook or resort_info.json after a change, loading a property
+#   or countries.json on first use) no other conversation makes
+#   progress, and the function calls of one model response, which
+#   ADK starts as concurrent tasks, still run one after another.
+#
+#   offloaded(tool) returns an async tool with the same name,
+#   signature and docstring (so the model sees the same declaration)
+#   that runs the sync function on a bounded thread pool:
+#       - TOOL_WORKERS threads per process, shared by every session;
+#         further calls queue, and the wait is recorded as
+#         adk_tool_queue_wait_seconds
+#       - context variables are copied into the worker thread
+#       - a cancelled turn stops waiting, but a call that already
+#         started finishes (a booking retried within the same turn
+#         is idempotent, see booking_store.py)
+#   Everything a tool touches (booking store connections, indexes,
+#   caches, telemetry) is already thread-safe. The sync functions
+#   stay as they are for scripts and benchmarks. Pure-Python work
+#   still holds the GIL, but the event loop gets it back every switch
+#   interval (5 ms) instead of after the whole call.
+#
+#   The capital agents use this same module: sync_shared_modules.py
+#   (at the repository root) copies it into their packages.
+# ================================================================
+
+# TOOL_OFFLOAD=0 runs tools inline on the event loop again
+TOOL_OFFLOAD_ENABLED = os.getenv("TOOL_OFFLOAD", "1") != "0"
+TOOL_WORKERS = int(os.getenv("TOOL_WORKERS", "8"))
+
+
+class ToolExecutor:
+    """Bounded thread pool that runs sync tools off the event loop."""
+
+    def __init__(self, max_workers: int = TOOL_WORKERS, enabled: bool = TOOL_OFFLOAD_ENABLED):
+        self.max_workers = max_workers
+        self.enabled = enabled
+        self.telemetry = get_telemetry()
+        self._pool = None
+        self._lock = threading.Lock()
+        self.metrics = {"calls": 0, "inline_calls": 0}
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tool")
+        return self._pool
+
+    async def run(self, func, *args, **kwargs):
+        """Runs func(*args, **kwargs) on the pool and waits for it without blocking the loop."""
+        if not self.enabled:
+            self.metrics["inline_calls"] += 1
+            return func(*args, **kwargs)
+
+        self.metrics["calls"] += 1
+        context = contextvars.copy_context()
+        queued = time.perf_counter()
+
+        def call():
+            self.telemetry.observe("adk_tool_queue_wait_seconds", time.perf_counter() - queued, tool=func.__name__)
+            return context.run(func, *args, **kwargs)
+
+        return await asyncio.get_running_loop().run_in_executor(self._executor(), call)
+
+    def stats(self) -> dict:
+        return {**self.metrics, "enabled": self.enabled, "max_workers": self.max_workers}
+
+    def reset_stats(self):
+        with self._lock:
+            for key in self.metrics:
+                self.metrics[key] = 0
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+
+
+def offloaded(func):
+    """Async variant of a sync tool that runs it on the process-wide ToolExecutor.
+
+    A memoized tool (the hospitality agent's tool_cache.py) is looked up
+    on the event loop first: a hit is returned right away, only a miss
+    goes to the pool.
+    """
+    lookup = getattr(func, "memo_lookup", None)
+
+    @functools.wraps(func)
+    async def tool(*args, **kwargs):
+        if lookup is None:
+            return await get_tool_executor().run(func, *args, **kwargs)
+        found, value = lookup(*args, **kwargs)
+        if found:
+            return value
+        return await get_tool_executor().run(func.memo_call, value, *args, **kwargs)
+    return tool
+
+
+# One pool per process
+_tool_executor = None
+_tool_executor_lock = threading.Lock()
+
+
+def get_tool_executor() -> ToolExecutor:
+    global _tool_executor
+    if _tool_executor is None:
+        with _tool_executor_lock:
+            if _tool_executor is None:
+                _tool_executor = ToolExecutor()
+    return _tool_executor
@@ -1,16 +1,30 @@
 import asyncio
 import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
 from dotenv import load_dotenv
 
 # ADK core imports
+from google.adk.agents.run_config import RunConfig, StreamingMode
 from google.adk.runners import Runner #exposes HTTP endpoints
-from google.adk.sessions import DatabaseSessionService
+from google.adk.events import Event
+from google.adk.sessions.base_session_service import BaseSessionService, GetSessionConfig
 from google.genai import types
 
 #Import the root agent
 from hospitality_agent.agent import root_agent
+from hospitality_agent.properties import DEFAULT_PROPERTY_ID, get_properties, property_id_of
+from hospitality_agent.telemetry import describe_metrics, get_telemetry
+from hospitality_agent.tool_cache import get_tool_cache
 
 from utils import display_state
+from response_cache import MAX_ENTRIES, ResponseCache, is_cacheable
+from session_compaction import ARCHIVE_DIR, COMPACTION_ENABLED, SUMMARY_STATE_KEY, SessionCompactor, sqlite_path
+from session_sharding import SESSION_SHARDS, ShardedSessionService, shard_urls
+from session_storage import TunedSessionService
 
 
 # ================================================================
@@ -30,70 +44,295 @@ DB_URL = "sqlite+aiosqlite:////app/agents/Hospitality_Agent/my_agent_data.db"
 #DB_URL = "sqlite+aiosqlite:///./my_agent_data.db"
 
 # ===== Define Initial State =====
-initial_state = {
-    "resort_name": "Heavenly Escape Resort",
-    "location": "Pune",
-}
+def initial_state(property_id: str = DEFAULT_PROPERTY_ID) -> dict:
+    """State of a new session: the property plus its name / city from its resort_info.json."""
+    return get_properties().get(property_id).initial_state()
+
 
 # ================================================================
-# 3. This async function sets up:
-#       - SessionService
-#       - Existing session (or creates a new one)
-#       - Runner
+# 3. Process-wide backend, shared by every user:
+#       - ONE DatabaseSessionService (one pooled async engine; WAL +
+#         group-committed appends, see session_storage.py), or with
+#         SESSION_SHARDS > 1 one per DB file, users spread over them
+#         by consistent hashing (see session_sharding.py)
+#       - ONE Runner per app
+#       - a bounded LRU cache of user_id -> {property_id: session_id}
+#         (a guest has one conversation per property)
 #
-#   We keep it async because ADK requires "await" calls.
+#   The async engine's pooled connections belong to the event loop
+#   that opened them, so everything runs on ONE long-lived background
+#   loop instead of a fresh asyncio.run() per call.
 # ================================================================
+APP_NAME = "Hospitality Agent"
 
-async def _async_setup(user_id: str):
-    APP_NAME = "Hospitality Agent"
-    USER_ID = user_id
+# Async engine pool (per process, per session DB)
+DB_POOL_SIZE = 5
+DB_MAX_OVERFLOW = 10
+
+# Max number of user_id -> session ids entries kept in memory
+SESSION_CACHE_SIZE = 10_000
+
+# Partial (token-level) model events for stream_query_async
+STREAMING_RUN_CONFIG = RunConfig(streaming_mode=StreamingMode.SSE)
+
+# FAQ answers, reused across users of the same property (see
+# response_cache.py). Only turns that used nothing but these tools are
+# stored. One bounded cache per property, so a busy property can't evict
+# the others' answers.
+RESPONSE_CACHE_ENTRIES_PER_PROPERTY = 200
+CACHEABLE_TOOLS = {"getinformation_tool"}
+
+
+def _new_response_cache(prop):
+    # The default property keeps the full-size cache of a single-resort deployment
+    max_entries = MAX_ENTRIES if prop.property_id == DEFAULT_PROPERTY_ID else RESPONSE_CACHE_ENTRIES_PER_PROPERTY
+    return ResponseCache(max_entries=max_entries, data_version=lambda: prop.knowledge_base().stamp)
+
+
+def get_response_cache(property_id: str = DEFAULT_PROPERTY_ID) -> ResponseCache:
+    return get_properties().get(property_id).attachment("response_cache", _new_response_cache)
+
+
+# Spans / metrics (see hospitality_agent/telemetry.py)
+telemetry = get_telemetry()
+describe_metrics({
+    "adk_run_duration_seconds": ("histogram", "runner.run_async turn duration, including session I/O"),
+    "adk_run_payload_bytes_total": ("counter", "Size of user messages and replies"),
+    "adk_session_db_duration_seconds": ("histogram", "Session service call duration"),
+})
+
+_backend_lock = threading.Lock()
+_loop = None
+_session_service = None
+_runners = {}
+_session_ids = OrderedDict()
+_pending_session_lookups = {}
+_compactors = []
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Returns the background event loop, starting it on first use."""
+    global _loop
+    if _loop is None:
+        with _backend_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name="adk-event-loop", daemon=True
+                ).start()
+                _loop = loop
+    return _loop
+
+
+def bind_event_loop(loop: asyncio.AbstractEventLoop):
+    """Makes `loop` the backend loop (for servers that already run one, see server.py).
+
+    Must be called before anything touched the backend, since pooled
+    connections belong to the loop that opened them.
+    """
+    global _loop
+    with _backend_lock:
+        if _loop is not None and _loop is not loop:
+            raise RuntimeError("The backend is already bound to another event loop")
+        _loop = loop
 
-    session_service = DatabaseSessionService(db_url=DB_URL)
+
+def run_sync(coro, timeout: float | None = None):
+    """Runs a coroutine on the background loop and waits for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result(timeout)
+
+
+class TracedSessionService(TunedSessionService):
+    """Session service that times its reads and writes into telemetry."""
+
+    async def get_session(self, *args, **kwargs):
+        with telemetry.timed("adk_session_db_duration_seconds", "session_db", op="get_session", kind="read"):
+            return await super().get_session(*args, **kwargs)
+
+    async def list_sessions(self, *args, **kwargs):
+        with telemetry.timed("adk_session_db_duration_seconds", "session_db", op="list_sessions", kind="read"):
+            return await super().list_sessions(*args, **kwargs)
+
+    async def create_session(self, *args, **kwargs):
+        with telemetry.timed("adk_session_db_duration_seconds", "session_db", op="create_session", kind="write"):
+            return await super().create_session(*args, **kwargs)
+
+    async def append_event(self, session, event):
+        with telemetry.timed("adk_session_db_duration_seconds", "session_db", trace=event.invocation_id,
+                             op="append_event", kind="write"):
+            return await super().append_event(session, event)
+
+    async def _load_states(self, *args, **kwargs):
+        # State cache misses of get_session_state(s)
+        with telemetry.timed("adk_session_db_duration_seconds", "session_db", op="load_states", kind="read"):
+            return await super()._load_states(*args, **kwargs)
+
+
+def _new_db_service(db_url: str) -> TracedSessionService:
+    return TracedSessionService(
+        db_url=db_url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+    )
+
+
+def get_session_service() -> BaseSessionService:
+    """Returns the process-wide session service (one pooled engine per session DB)."""
+    global _session_service
+    if _session_service is None:
+        with _backend_lock:
+            if _session_service is None:
+                urls = shard_urls(DB_URL, SESSION_SHARDS)
+                shards = {name: _new_db_service(url) for name, url in urls.items()}
+                _session_service = ShardedSessionService(shards) if len(shards) > 1 else shards["shard-0"]
+                if COMPACTION_ENABLED:
+                    _start_compactors(urls, shards)
+    return _session_service
+
+
+def _start_compactors(urls: dict, shards: dict):
+    """Keeps every session DB bounded: trims / archives old history in the background."""
+    for name, service in shards.items():
+        # One archive directory per DB (the first keeps the unsharded one)
+        archive_dir = ARCHIVE_DIR if name == "shard-0" else ARCHIVE_DIR / name
+        compactor = SessionCompactor(sqlite_path(urls[name]), archive_dir=archive_dir,
+                                     on_archive=lambda *key, service=service: _forget_session(service, *key),
+                                     on_trim=lambda *args, service=service: _update_summary(service, *args))
+        compactor.start()
+        _compactors.append(compactor)
+
+
+def _forget_session(service, app_name, user_id, session_id):
+    """Drops an archived session from the id, state and tool caches (runs on the event loop)."""
+    def forget():
+        session_ids = _session_ids.get(user_id) or {}
+        for property_id in [p for p, s in session_ids.items() if s == session_id]:
+            del session_ids[property_id]
+        service.state_cache.forget((app_name, user_id, session_id))
+        get_tool_cache().forget(app_name, user_id, session_id)
+
+    get_event_loop().call_soon_threadsafe(forget)
+
+
+def _update_summary(service, app_name, user_id, session_id, summary):
+    """Puts a trimmed session's new summary into the state cache (runs on the event loop)."""
+    get_event_loop().call_soon_threadsafe(
+        service.state_cache.update_session, (app_name, user_id, session_id), {SUMMARY_STATE_KEY: summary})
+
+
+def get_runner(app_name: str = APP_NAME) -> Runner:
+    """Returns the shared Runner for `app_name`.
+
+    A Runner holds no per-user state (user/session ids are passed to
+    run_async on every call), so one instance serves every user.
+    """
+    runner = _runners.get(app_name)
+    if runner is None:
+        # Outside the (non-reentrant) lock: it takes the lock itself
+        session_service = get_session_service()
+        with _backend_lock:
+            runner = _runners.get(app_name)
+            if runner is None:
+                # create a runner with the root_agent
+                runner = Runner(
+                    agent=root_agent,
+                    app_name=app_name,
+                    session_service=session_service,
+                )
+                _runners[app_name] = runner
+    return runner
+
+
+async def _find_or_create_session(user_id: str, property_id: str) -> str:
+    session_service = get_session_service()
 
     # ===== PART 3: Session Management - Find or Create =====
-    # Check for existing sessions for this user
+    # Check for existing sessions for this user at this property
     existing_sessions = await session_service.list_sessions(
         app_name = APP_NAME,
-        user_id = USER_ID,
+        user_id = user_id,
         )
-    
-    print("existing_sessions:", existing_sessions)
+    sessions = [
+        session for session in (existing_sessions.sessions if existing_sessions else [])
+        if property_id_of(session.state) == property_id
+    ]
 
-    if existing_sessions and len(existing_sessions.sessions)>0:
+    if sessions:
         # Use the most recent session
-        SESSION_ID = existing_sessions.sessions[0].id
-        print(f"Continuing existing session: {SESSION_ID}")
+        session_id = sessions[0].id
+        print(f"Continuing existing session: {session_id}")
     else:
         # Create a new session with initial state
         new_session =await session_service.create_session(
             app_name = APP_NAME,
-            user_id = USER_ID,
-            state = initial_state,
+            user_id = user_id,
+            state = initial_state(property_id),
         )
         print(f"Created new session: {new_session.id}")
-        SESSION_ID = new_session.id
+        session_id = new_session.id
+    return session_id
+
+
+async def get_session_id(user_id: str, property_id: str = DEFAULT_PROPERTY_ID) -> str:
+    """Returns the session id for `user_id` at `property_id`.
+
+    Hits are a dict lookup. Misses go to the DB once, even if the same user
+    sends several requests at the same time. The cache is an LRU bounded by
+    SESSION_CACHE_SIZE, so memory stays flat however many users connect.
+    Raises UnknownProperty (properties.py) for a property without data.
+    """
+    session_ids = _session_ids.get(user_id)
+    session_id = session_ids.get(property_id) if session_ids else None
+    if session_id is not None:
+        _session_ids.move_to_end(user_id)
+        return session_id
+
+    key = (user_id, property_id)
+    pending = _pending_session_lookups.get(key)
+    if pending is None:
+        # Before any DB work: unknown properties fail fast
+        get_properties().get(property_id)
+        pending = asyncio.ensure_future(_find_or_create_session(user_id, property_id))
+        _pending_session_lookups[key] = pending
+        try:
+            session_id = await pending
+        finally:
+            del _pending_session_lookups[key]
+        _session_ids.setdefault(user_id, {})[property_id] = session_id
+        _session_ids.move_to_end(user_id)
+        while len(_session_ids) > SESSION_CACHE_SIZE:
+            _session_ids.popitem(last=False)
+        return session_id
+
+    return await pending
 
-    # ===== PART 4: Agent Runner Setup =====
 
-    # create a runner with the root_agent
-    runner = Runner(
-        agent=root_agent,
-        app_name=APP_NAME,
-        session_service=session_service,
-    )
+# ================================================================
+# 4. Async setup used by Streamlit / the console:
+#       returns the shared Runner + SessionService and this user's session
+#
+#   We keep it async because ADK requires "await" calls.
+# ================================================================
+async def _async_setup(user_id: str, property_id: str = DEFAULT_PROPERTY_ID):
+    USER_ID = user_id
+    SESSION_ID = await get_session_id(user_id, property_id)
+
+    # ===== PART 4: Agent Runner Setup =====
+    runner = get_runner(APP_NAME)
 
     # Return everything needed by Streamlit
-    return runner, session_service, APP_NAME, USER_ID, SESSION_ID
+    return runner, get_session_service(), APP_NAME, USER_ID, SESSION_ID
 
 # ================================================================
-# 4. Sync wrapper for Streamlit
-#    Streamlit cannot call async functions → so we wrap it.
+# 4b. Sync wrapper for Streamlit
+#    Streamlit cannot call async functions → so we submit the work
+#    to the shared background loop and wait for it.
 #
-#    This function runs ONLY ONCE when Streamlit imports main.py.
+#    Cheap after the first call for a user (cached session id).
 # ================================================================
-def get_runner_and_session(user_id):
+def get_runner_and_session(user_id, property_id=DEFAULT_PROPERTY_ID):
     #user_id = ask_input("Enter your User ID", default=None)
-    return asyncio.run(_async_setup(user_id))
+    return run_sync(_async_setup(user_id, property_id))
 
 
 # ================================================================
@@ -104,8 +343,16 @@ def get_runner_and_session(user_id):
 #
 #    It streams events from ADK, finds the final response,
 #    and returns it to Streamlit.
+#
+#    FAQ-style questions are answered from the property's response
+#    cache when an equivalent question was answered before (no model
+#    call). `property_id` must be the session's property.
 # ================================================================
-async def run_query_async(runner, user_id, session_id, user_text):
+async def run_query_async(runner, user_id, session_id, user_text, property_id=DEFAULT_PROPERTY_ID):
+    cached_reply = await _cached_reply(runner, user_id, session_id, user_text, property_id)
+    if cached_reply is not None:
+        return cached_reply
+
     # Build message content in ADK format
     content = types.Content(
         role="user",
@@ -113,22 +360,246 @@ async def run_query_async(runner, user_id, session_id, user_text):
     )
 
     final_reply = ""
+    tools_used = set()
+    turn_events = []
 
     # ADK returns events (streaming)
-    async for event in runner.run_async(
-        user_id=user_id,
-        session_id=session_id,
-        new_message=content,
-    ):
+    # The property stays loaded (not evicted) while its tools run
+    with get_properties().in_use(property_id), \
+            telemetry.timed("adk_run_duration_seconds", "run_async", app=runner.app_name, streaming="false") as span:
+        async for event in runner.run_async(
+            user_id=user_id,
+            session_id=session_id,
+            new_message=content,
+        ):
+            turn_events.append(event)
+            tools_used.update(call.name for call in event.get_function_calls())
+
+            # We only care about the final message
+            if event.is_final_response():
+                if event.content and event.content.parts:
+                    final_reply = event.content.parts[0].text
+        span["tools"] = sorted(tools_used)
+
+    _record_payload(runner.app_name, user_text, final_reply)
+    await _remember_reply(runner, user_id, session_id, user_text, final_reply, tools_used, turn_events, property_id)
+    return final_reply
 
-        # We only care about the final message
-        if event.is_final_response():
-            if event.content and event.content.parts:
-                final_reply = event.content.parts[0].text
 
-    return final_reply
+# ================================================================
+# 5b. Response cache hooks
+# ================================================================
+async def _cached_reply(runner, user_id, session_id, user_text, property_id=DEFAULT_PROPERTY_ID):
+    """Returns a cached answer (and records the turn in the session), or None."""
+    reply = get_response_cache(property_id).get(user_text)
+    if reply is None:
+        return None
+
+    # Keep the conversation history complete so follow-up questions still
+    # have context; loading 1 recent event keeps this a cheap DB call.
+    try:
+        session = await runner.session_service.get_session(
+            app_name=runner.app_name,
+            user_id=user_id,
+            session_id=session_id,
+            config=GetSessionConfig(num_recent_events=1),
+        )
+        invocation_id = f"e-{uuid.uuid4()}"
+        await runner.session_service.append_event(session, Event(
+            invocation_id=invocation_id,
+            author="user",
+            content=types.Content(role="user", parts=[types.Part(text=user_text)]),
+        ))
+        await runner.session_service.append_event(session, Event(
+            invocation_id=invocation_id,
+            author=runner.agent.name,
+            content=types.Content(role="model", parts=[types.Part(text=reply)]),
+        ))
+    except Exception as e:
+        # Answering is more important than the history entry
+        print(f"Error recording cached reply: {e}")
+    return reply
+
+
+async def _remember_reply(runner, user_id, session_id, user_text, reply, tools_used, turn_events,
+                          property_id=DEFAULT_PROPERTY_ID):
+    """Caches `reply` if it was answered purely from resort information on the conversation's first turn.
+
+    A later turn may have been answered with the earlier ones in mind
+    ("I'm in the villa" ... "what time is checkout?"), so its reply is
+    not reused for other guests.
+    """
+    if not (reply and tools_used and tools_used <= CACHEABLE_TOOLS and is_cacheable(user_text)):
+        return
+    if await _has_prior_turns(runner, user_id, session_id, turn_events):
+        return
+    get_response_cache(property_id).put(user_text, reply)
+
+
+async def _has_prior_turns(runner, user_id, session_id, turn_events) -> bool:
+    """True if the session holds events from before this turn.
+
+    Loads only this turn's events (the user message plus the persisted
+    `turn_events`) and one more; any event from another invocation is
+    an earlier turn.
+    """
+    persisted = [event for event in turn_events if not event.partial]
+    if not persisted:
+        return True
+    try:
+        session = await runner.session_service.get_session(
+            app_name=runner.app_name,
+            user_id=user_id,
+            session_id=session_id,
+            config=GetSessionConfig(num_recent_events=len(persisted) + 2),
+        )
+    except Exception as e:
+        print(f"Error loading session for the response cache: {e}")
+        return True
+    invocation_id = persisted[-1].invocation_id
+    return session is None or any(event.invocation_id != invocation_id for event in session.events)
+
+
+def _record_payload(app_name, user_text, reply):
+    telemetry.inc("adk_run_payload_bytes_total", len(user_text.encode("utf-8")), app=app_name, direction="request")
+    telemetry.inc("adk_run_payload_bytes_total", len((reply or "").encode("utf-8")), app=app_name, direction="reply")
+
+
+def _event_text(event) -> str:
+    """Concatenates the text parts of an event (function calls have none)."""
+    if not event.content or not event.content.parts:
+        return ""
+    return "".join(part.text for part in event.content.parts if part.text)
 
 
+# ================================================================
+# 6. Streaming variant of run_query_async
+#
+#    Runs the agent with SSE streaming so the model's answer arrives
+#    as partial events, and yields each text chunk as soon as it
+#    lands. The UI can render the first chunk instead of waiting for
+#    the whole turn.
+# ================================================================
+async def stream_query_async(runner, user_id, session_id, user_text, property_id=DEFAULT_PROPERTY_ID):
+    content = types.Content(
+        role="user",
+        parts=[types.Part(text=user_text)],
+    )
+
+    cached_reply = await _cached_reply(runner, user_id, session_id, user_text, property_id)
+    if cached_reply is not None:
+        yield cached_reply
+        return
+
+    final_reply = ""
+    tools_used = set()
+    turn_events = []
+    streamed = False
+    with get_properties().in_use(property_id), \
+            telemetry.timed("adk_run_duration_seconds", "run_async", app=runner.app_name, streaming="true") as span:
+        async for event in runner.run_async(
+            user_id=user_id,
+            session_id=session_id,
+            new_message=content,
+            run_config=STREAMING_RUN_CONFIG,
+        ):
+            if event.partial:
+                chunk = _event_text(event)
+                if chunk:
+                    streamed = True
+                    yield chunk
+            else:
+                turn_events.append(event)
+                tools_used.update(call.name for call in event.get_function_calls())
+                # A non-partial model event repeats the aggregated text; only
+                # emit it if the model did not stream (e.g. streaming unsupported).
+                if event.is_final_response():
+                    final_reply = _event_text(event)
+                    if final_reply and not streamed:
+                        yield final_reply
+                streamed = False
+        span["tools"] = sorted(tools_used)
+
+    _record_payload(runner.app_name, user_text, final_reply)
+    await _remember_reply(runner, user_id, session_id, user_text, final_reply, tools_used, turn_events, property_id)
+
+
+def stream_query(runner, user_id, session_id, user_text, property_id=DEFAULT_PROPERTY_ID):
+    """Sync generator over stream_query_async, for Streamlit / the console.
+
+    The async generator runs on the background loop; chunks are handed
+    over through a thread-safe queue as they arrive.
+    """
+    chunks = queue.Queue()
+    done = object()
+
+    async def pump():
+        try:
+            async for chunk in stream_query_async(runner, user_id, session_id, user_text, property_id):
+                chunks.put(chunk)
+        except BaseException as e:
+            chunks.put(e)
+        finally:
+            chunks.put(done)
+
+    future = asyncio.run_coroutine_threadsafe(pump(), get_event_loop())
+    try:
+        while True:
+            item = chunks.get()
+            if item is done:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        # Consumer stopped early (e.g. Streamlit rerun) -> stop the agent turn
+        future.cancel()
+
+
+# ================================================================
+# 7. Warm-up
+#
+#    Builds everything the first guest would otherwise wait for:
+#    session DB schema, Runner, booking inventory (from the build-time
+#    snapshot, see hospitality_agent/data_snapshot.py), resort
+#    knowledge, ADK's request pipeline (its flow imports the auth /
+#    OAuth stack lazily, ~0.5 s) and tool declarations. server.py runs it before
+#    accepting traffic.
+# ================================================================
+async def warm_up_async() -> dict:
+    """Runs every warm-up step; returns {step: milliseconds}."""
+    from hospitality_agent.availability import get_availability_index
+    from hospitality_agent.resort_knowledge import get_knowledge_base
+
+    timings = {}
+    started = time.perf_counter()
+
+    def lap(step):
+        nonlocal started
+        now = time.perf_counter()
+        timings[step] = round((now - started) * 1000, 2)
+        started = now
+
+    await get_session_service().prepare_tables()
+    lap("session_db")
+    get_runner(APP_NAME)
+    lap("runner")
+    get_availability_index().snapshot()
+    lap("inventory")
+    get_knowledge_base()
+    lap("knowledge_base")
+    root_agent._llm_flow
+    lap("flow")
+    for tool in await root_agent.canonical_tools():
+        if hasattr(tool, "_get_declaration"):
+            tool._get_declaration()
+    lap("tool_declarations")
+    return timings
+
+
+def warm_up() -> dict:
+    """Sync wrapper of warm_up_async (runs on the background loop)."""
+    return run_sync(warm_up_async())
 
 
 def ask_input(prompt: str, default: str | None = None) -> str:
@@ -149,22 +620,18 @@ def ask_input(prompt: str, default: str | None = None) -> str:
 # ================================================================
 if __name__ == "__main__":
     user_id = ask_input("Enter your User ID", default=None)
-    runner, session_service, APP_NAME, USER_ID, SESSION_ID = get_runner_and_session(user_id)
+    property_id = ask_input("Property", default=DEFAULT_PROPERTY_ID)
+    runner, session_service, APP_NAME, USER_ID, SESSION_ID = get_runner_and_session(user_id, property_id)
 
     print(f"\nHospitality Agent Ready!User: {USER_ID}. Type 'exit' to quit.\n")
+    run_sync(display_state(session_service, APP_NAME, USER_ID, SESSION_ID))
 
     while True:
         text = input("You: ").strip()
         if text.lower() == "exit":
             break
 
-        reply = asyncio.run(
-            run_query_async(
-                runner,
-                USER_ID,
-                SESSION_ID,
-                text
-            )
-        )
-
-        print("Bot:", reply)
\ No newline at end of file
+        print("Bot: ", end="", flush=True)
+        for chunk in stream_query(runner, USER_ID, SESSION_ID, text, property_id):
+            print(chunk, end="", flush=True)
+        print()
\ No newline at end of file
@@ -0,0 +1,204 @@
+import hashlib
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+from hospitality_agent.resort_knowledge import get_knowledge_base, tokenize
+
+# ================================================================
+# Local response cache for FAQ-style questions
+#
+#   Sits in front of run_query_async / stream_query_async:
+#       1. exact match on the normalized question (hash lookup)
+#       2. otherwise cosine similarity between small hashed
+#          bag-of-words + char-trigram vectors (numpy, in-process)
+#   A hit returns the stored answer without calling the model.
+#
+#   Only answers that came purely from resort information are
+#   stored, and booking / availability questions are never served
+#   from (or written to) the cache. Neither are follow-ups that lean
+#   on the previous turn ("and for kids?", "when does it open?"), and
+#   answers are only stored from a conversation's first turn (see
+#   main._remember_reply). Entries expire by TTL, the cache is
+#   LRU-bounded, and it is emptied when resort_info.json changes.
+# ================================================================
+
+MAX_ENTRIES = 1000
+TTL_SECONDS = 6 * 60 * 60
+SIMILARITY_THRESHOLD = 0.9
+
+# Hashed feature space for the similarity vectors
+VECTOR_DIM = 1024
+TRIGRAM_WEIGHT = 0.3
+
+# Questions that depend on dates, inventory or the guest's own booking
+_UNCACHEABLE_RE = re.compile(
+    r"\b(book|booking|reserve|reservation|availab\w*|vacan\w*|free rooms?|"
+    r"confirm\w*|my (stay|room|booking|reservation)|tonight|tomorrow|next (week|weekend|month)|"
+    r"jan(uary)?|feb(ruary)?|march|apr(il)?|june?|july?|aug(ust)?|sep(tember)?|oct(ober)?|nov(ember)?|dec(ember)?|"
+    r"monday|tuesday|wednesday|thursday|friday|saturday|sunday|"
+    r"\d+ nights?)\b"
+    # "is a suite free?", but not "free wifi" / "free parking"
+    r"|\bfree\b(?!\s*(-\s*)?(wi-?fi|internet|parking|breakfast|shuttle|cancell\w*|of charge))"
+    r"|\d{4}-\d{1,2}-\d{1,2}|\d{1,2}/\d{1,2}",
+)
+
+# Follow-ups whose meaning depends on the previous turn: pronouns
+# standing in for something said before, or a leading conjunction
+_FOLLOW_UP_RE = re.compile(
+    r"^\s*(and|but|or|so|also|then|what about|how about)\b"
+    r"|\b(it|its|they|them|their|theirs|that|this|those|these|same|one)\b",
+)
+
+# Greetings / politeness that don't change the answer
+_FILLER_RE = re.compile(r"\b(hi|hello|hey|please|pls|thanks|thank you|kindly)\b")
+_NON_WORD_RE = re.compile(r"[^a-z0-9 ]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercases, drops punctuation and filler words, collapses whitespace."""
+    text = _FILLER_RE.sub(" ", text.lower())
+    text = _NON_WORD_RE.sub(" ", text)
+    return " ".join(text.split())
+
+
+def is_cacheable(text: str) -> bool:
+    """False for booking / availability intents and for follow-ups, which must always hit the agent."""
+    text = text.lower()
+    return _UNCACHEABLE_RE.search(text) is None and _FOLLOW_UP_RE.search(text) is None
+
+
+def _vector(normalized: str) -> np.ndarray:
+    """Hashed bag of content words + char trigrams, L2-normalized."""
+    vector = np.zeros(VECTOR_DIM, dtype=np.float32)
+    for token in tokenize(normalized):
+        vector[zlib.crc32(token.encode()) % VECTOR_DIM] += 1.0
+        padded = f" {token} "
+        for i in range(len(padded) - 2):
+            vector[zlib.crc32(padded[i:i + 3].encode()) % VECTOR_DIM] += TRIGRAM_WEIGHT
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class ResponseCache:
+    """TTL + LRU cache of question -> answer with exact and similarity lookup."""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, ttl_seconds: float = TTL_SECONDS,
+                 similarity_threshold: float = SIMILARITY_THRESHOLD, data_version=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        # Changes whenever the answers could change (resort_info.json stamp)
+        self._data_version = data_version or (lambda: get_knowledge_base().stamp)
+
+        self._lock = threading.Lock()
+        # key -> (answer, expires_at, vector)
+        self._entries = OrderedDict()
+        # Stacked vectors of the entries, rebuilt lazily after writes
+        self._matrix = None
+        self._matrix_keys = []
+        self._version = None
+
+        self.metrics = {
+            "exact_hits": 0,
+            "similar_hits": 0,
+            "misses": 0,
+            "bypassed": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+        }
+
+    @staticmethod
+    def _key(normalized: str) -> str:
+        return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+    def _check_version(self):
+        version = self._data_version()
+        if version != self._version:
+            if self._entries:
+                self.metrics["invalidations"] += 1
+            self._entries.clear()
+            self._matrix = None
+            self._version = version
+
+    def get(self, text: str):
+        """Returns a cached answer for `text`, or None."""
+        if not is_cacheable(text):
+            self.metrics["bypassed"] += 1
+            return None
+
+        normalized = normalize(text)
+        key = self._key(normalized)
+        now = time.monotonic()
+
+        with self._lock:
+            self._check_version()
+
+            # 1. Exact match
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.metrics["exact_hits"] += 1
+                return entry[0]
+
+            # 2. Nearest neighbour among the cached questions
+            if self._entries:
+                if self._matrix is None:
+                    self._matrix_keys = list(self._entries)
+                    self._matrix = np.stack([self._entries[k][2] for k in self._matrix_keys])
+                scores = self._matrix @ _vector(normalized)
+                best = int(np.argmax(scores))
+                if scores[best] >= self.similarity_threshold:
+                    match = self._entries.get(self._matrix_keys[best])
+                    if match is not None and match[1] > now:
+                        self._entries.move_to_end(self._matrix_keys[best])
+                        self.metrics["similar_hits"] += 1
+                        return match[0]
+
+            self.metrics["misses"] += 1
+            return None
+
+    def put(self, text: str, answer: str):
+        """Stores `answer` for `text` (ignored for uncacheable questions)."""
+        if not answer or not is_cacheable(text):
+            return
+
+        normalized = normalize(text)
+        key = self._key(normalized)
+        now = time.monotonic()
+
+        with self._lock:
+            self._check_version()
+            self._entries[key] = (answer, now + self.ttl_seconds, _vector(normalized))
+            self._entries.move_to_end(key)
+            self.metrics["stores"] += 1
+
+            # Drop expired entries first, then the least recently used
+            for stale in [k for k, entry in self._entries.items() if entry[1] <= now]:
+                del self._entries[stale]
+                self.metrics["expirations"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.metrics["evictions"] += 1
+            self._matrix = None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def stats(self) -> dict:
+        """Hit/miss counters plus the current size and hit rate."""
+        lookups = self.metrics["exact_hits"] + self.metrics["similar_hits"] + self.metrics["misses"]
+        hits = self.metrics["exact_hits"] + self.metrics["similar_hits"]
+        return {
+            **self.metrics,
+            "entries": len(self._entries),
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,251 @@
+import asyncio
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import uvicorn
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+import main
+from hospitality_agent.properties import DEFAULT_PROPERTY_ID, PROPERTY_ID_PATTERN, UnknownProperty
+from hospitality_agent.telemetry import describe_metrics
+
+# ================================================================
+# Headless HTTP API for the hospitality agent
+#
+#   POST /v1/query          {"user_id", "text", "property_id"?} -> {"reply", ...}
+#   POST /v1/query/stream   same body, reply as server-sent events:
+#                               data: {"text": "..."}     (one per chunk)
+#                               event: done / event: error
+#   GET  /healthz           liveness + current load of this worker
+#   GET  /metrics           Prometheus text (hospitality_agent/telemetry.py)
+#
+#   Every worker process runs main.py's backend (Runner, session
+#   service, caches) on uvicorn's own event loop; the workers share
+#   the session DB (WAL, see session_storage.py).
+#
+#   Backpressure, per worker:
+#       - at most MAX_CONCURRENT_TURNS agent turns run at once
+#       - at most MAX_QUEUED_TURNS wait for a slot; more -> 503
+#       - a turn waiting longer than QUEUE_TIMEOUT_SECONDS -> 503
+#       - one turn per user at a time (a second message from the same
+#         user waits for the first reply instead of racing it)
+#
+#   Run from agents/Hospitality_Agent:
+#       python server.py            (SERVER_WORKERS / PORT from env)
+# ================================================================
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8080"))
+WORKERS = int(os.getenv("SERVER_WORKERS", os.getenv("WEB_CONCURRENCY", "2")))
+
+MAX_CONCURRENT_TURNS = int(os.getenv("MAX_CONCURRENT_TURNS", "32"))
+MAX_QUEUED_TURNS = int(os.getenv("MAX_QUEUED_TURNS", "128"))
+QUEUE_TIMEOUT_SECONDS = float(os.getenv("QUEUE_TIMEOUT_SECONDS", "15"))
+RETRY_AFTER_SECONDS = 1
+
+MAX_MESSAGE_CHARS = 4000
+# Longer than the load balancer's idle timeout, so it never reuses a
+# connection we are about to close
+KEEP_ALIVE_SECONDS = 75
+
+describe_metrics({
+    "adk_server_requests_total": ("counter", "HTTP API requests by endpoint and status (server.py)"),
+    "adk_server_queue_wait_seconds": ("histogram", "Time a turn waited for a free slot (server.py)"),
+})
+
+
+class Overloaded(Exception):
+    pass
+
+
+class TurnLimiter:
+    """Admission control for agent turns in one worker process."""
+
+    def __init__(self, max_active: int = MAX_CONCURRENT_TURNS, max_queued: int = MAX_QUEUED_TURNS,
+                 queue_timeout: float = QUEUE_TIMEOUT_SECONDS):
+        self.max_active = max_active
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.queued = 0
+        self.rejected = 0
+        self._slots = asyncio.Semaphore(max_active)
+        # user_id -> [lock, number of turns holding / waiting for it]
+        self._user_locks = {}
+
+    @asynccontextmanager
+    async def turn(self, user_id: str):
+        """Holds a turn slot (and the user's lock) for the duration of the block.
+
+        Raises Overloaded if the queue is full or the wait times out.
+        """
+        if self.queued >= self.max_queued:
+            self.rejected += 1
+            raise Overloaded("too many queued requests")
+
+        entry = self._user_locks.setdefault(user_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        self.queued += 1
+        started = time.perf_counter()
+        try:
+            async with asyncio.timeout(self.queue_timeout):
+                await self._acquire(entry[0])
+        except TimeoutError:
+            self.rejected += 1
+            self._release_user(user_id, entry)
+            raise Overloaded("timed out waiting for a free slot")
+        except BaseException:
+            self._release_user(user_id, entry)
+            raise
+        finally:
+            self.queued -= 1
+        main.telemetry.observe("adk_server_queue_wait_seconds", time.perf_counter() - started)
+
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._slots.release()
+            entry[0].release()
+            self._release_user(user_id, entry)
+
+    async def _acquire(self, user_lock: asyncio.Lock):
+        await user_lock.acquire()
+        try:
+            await self._slots.acquire()
+        except BaseException:
+            user_lock.release()
+            raise
+
+    def _release_user(self, user_id: str, entry: list):
+        entry[1] -= 1
+        if entry[1] == 0:
+            del self._user_locks[user_id]
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "max_active": self.max_active,
+            "max_queued": self.max_queued,
+        }
+
+
+class QueryRequest(BaseModel):
+    user_id: str = Field(min_length=1, max_length=200)
+    text: str = Field(min_length=1, max_length=MAX_MESSAGE_CHARS)
+    # Resort the guest is talking to (hospitality_agent/properties.py)
+    property_id: str = Field(DEFAULT_PROPERTY_ID, pattern=PROPERTY_ID_PATTERN)
+
+
+# ================================================================
+# App
+# ================================================================
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # main.py's backend lives on this worker's loop (no extra thread hop)
+    main.bind_event_loop(asyncio.get_running_loop())
+    app.state.limiter = TurnLimiter()
+    timings = await main.warm_up_async()
+    print(f"--- Worker {os.getpid()} ready (warm-up ms: {timings}) ---")
+    yield
+    await main.get_session_service().close()
+
+
+app = FastAPI(title="Resort Ranger API", lifespan=lifespan)
+
+
+def _overloaded(endpoint: str, error: Overloaded):
+    main.telemetry.inc("adk_server_requests_total", endpoint=endpoint, status="503")
+    return HTTPException(status_code=503, detail=str(error),
+                         headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+
+
+def _unknown_property(endpoint: str, property_id: str):
+    main.telemetry.inc("adk_server_requests_total", endpoint=endpoint, status="404")
+    return HTTPException(status_code=404, detail=f"unknown property '{property_id}'")
+
+
+@app.post("/v1/query")
+async def query(request: QueryRequest):
+    runner = main.get_runner(main.APP_NAME)
+    try:
+        async with app.state.limiter.turn(request.user_id):
+            session_id = await main.get_session_id(request.user_id, request.property_id)
+            reply = await main.run_query_async(runner, request.user_id, session_id, request.text,
+                                               request.property_id)
+    except Overloaded as e:
+        raise _overloaded("query", e)
+    except UnknownProperty:
+        raise _unknown_property("query", request.property_id)
+
+    main.telemetry.inc("adk_server_requests_total", endpoint="query", status="200")
+    return {"user_id": request.user_id, "session_id": session_id, "reply": reply}
+
+
+def _sse(data: dict, event: str = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/v1/query/stream")
+async def query_stream(request: QueryRequest):
+    runner = main.get_runner(main.APP_NAME)
+
+    async def events():
+        async with app.state.limiter.turn(request.user_id):
+            session_id = await main.get_session_id(request.user_id, request.property_id)
+            # SSE comment: admitted, the reply follows
+            yield ": accepted\n\n"
+            try:
+                async for chunk in main.stream_query_async(runner, request.user_id, session_id, request.text,
+                                                           request.property_id):
+                    yield _sse({"text": chunk})
+            except Exception as e:
+                print(f"Error streaming reply: {e}")
+                main.telemetry.inc("adk_server_requests_total", endpoint="query_stream", status="error")
+                yield _sse({"detail": "the agent failed to answer"}, event="error")
+                return
+            main.telemetry.inc("adk_server_requests_total", endpoint="query_stream", status="200")
+            yield _sse({"user_id": request.user_id, "session_id": session_id}, event="done")
+
+    # Run up to admission before the response starts, so overload is a plain
+    # 503 instead of an error event. From here on the generator owns the slot
+    # and releases it when it finishes or is closed (client disconnect).
+    stream = events()
+    try:
+        accepted = await anext(stream)
+    except Overloaded as e:
+        raise _overloaded("query_stream", e)
+    except UnknownProperty:
+        raise _unknown_property("query_stream", request.property_id)
+
+    async def body():
+        yield accepted
+        async for item in stream:
+            yield item
+
+    return StreamingResponse(body(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok", "pid": os.getpid(), **app.state.limiter.stats()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return main.telemetry.render_prometheus()
+
+
+if __name__ == "__main__":
+    uvicorn.run("server:app", app_dir=str(Path(__file__).parent), host=HOST, port=PORT,
+                workers=WORKERS, timeout_keep_alive=KEEP_ALIVE_SECONDS, timeout_graceful_shutdown=30)
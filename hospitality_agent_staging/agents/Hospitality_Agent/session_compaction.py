@@ -0,0 +1,524 @@
+import argparse
+import base64
+import gzip
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from hospitality_agent.context_budget import summarize_messages
+
+# ================================================================
+# Session compaction for the ADK session database
+#
+#   Runs next to the live DatabaseSessionService, in small steps on
+#   a background thread:
+#       1. Per session, whole invocations (turns) older than
+#          HORIZON_SECONDS, or beyond the newest MAX_LIVE_INVOCATIONS,
+#          are copied to a gzip segment file and deleted. A short
+#          extractive summary of them is kept in the session state
+#          ("conversation_summary"), which the agent instruction reads.
+#          The summary is written straight to the DB, so on_trim tells
+#          the session service to update its cached state.
+#       2. Sessions idle for ARCHIVE_AFTER_SECONDS are archived whole
+#          (session row + events) and removed from the live DB.
+#       3. Freed pages are returned with incremental vacuum.
+#
+#   Rows are deleted with DELETE ... RETURNING inside a short write
+#   transaction, and written to an fsync-ed segment before it commits:
+#   only rows this compactor actually removed are archived and
+#   summarized, so compactors of several worker processes never
+#   archive a turn twice. restore_session() puts an archived session
+#   back.
+#
+#   Switching an existing DB to incremental vacuum takes one full
+#   VACUUM, which locks it for as long as it runs: the background
+#   thread only does it for DBs up to ONLINE_VACUUM_MAX_BYTES, larger
+#   ones are converted offline with `python session_compaction.py`.
+#
+#   Only the columns shared by every ADK session schema are used
+#   (events.id/invocation_id/timestamp, sessions.state/update_time),
+#   so old and new databases are handled alike.
+# ================================================================
+
+ARCHIVE_DIR = Path(__file__).parent / "session_archive"
+
+# Turns older than this are moved out of the live session ...
+HORIZON_SECONDS = 24 * 60 * 60
+# ... and a session never keeps more than this many turns live ...
+MAX_LIVE_INVOCATIONS = 20
+# ... but always keeps its newest few, however old
+MIN_LIVE_INVOCATIONS = 3
+
+# Sessions untouched for this long are archived whole
+ARCHIVE_AFTER_SECONDS = 30 * 24 * 60 * 60
+
+# Work per step, and the pause between steps (lets turns interleave)
+SESSIONS_PER_STEP = 20
+STEP_PAUSE_SECONDS = 0.05
+VACUUM_PAGES_PER_STEP = 256
+# Largest DB the background thread switches to incremental vacuum
+ONLINE_VACUUM_MAX_BYTES = 16 * 1024 * 1024
+# Seconds between background passes
+PASS_INTERVAL_SECONDS = 10 * 60
+
+# Segment files are rotated at this size
+MAX_SEGMENT_BYTES = 64 * 1024 * 1024
+
+BUSY_TIMEOUT_MS = 5000
+
+SUMMARY_STATE_KEY = "conversation_summary"
+SUMMARY_MAX_CHARS = 1500
+SUMMARY_QUESTION_CHARS = 160
+
+# Set SESSION_COMPACTION=0 to keep full history in the live DB
+COMPACTION_ENABLED = os.getenv("SESSION_COMPACTION", "1") != "0"
+
+
+def sqlite_path(db_url: str) -> Path:
+    """Returns the file behind a sqlite SQLAlchemy URL (sqlite+aiosqlite:///./x.db)."""
+    if not db_url.startswith("sqlite"):
+        raise ValueError(f"Session compaction needs a SQLite database, got {db_url!r}")
+    return Path(db_url.split(":///", 1)[1])
+
+
+def _utc_text(moment: datetime) -> str:
+    """Formats a UTC time the way SQLAlchemy stores DATETIME in SQLite."""
+    return moment.astimezone(timezone.utc).replace(tzinfo=None).isoformat(sep=" ")
+
+
+def _encode_row(row: sqlite3.Row) -> dict:
+    return {
+        key: {"$b64": base64.b64encode(value).decode("ascii")} if isinstance(value, bytes) else value
+        for key, value in zip(row.keys(), row)
+    }
+
+
+def _decode_row(row: dict) -> dict:
+    return {
+        key: base64.b64decode(value["$b64"]) if isinstance(value, dict) and "$b64" in value else value
+        for key, value in row.items()
+    }
+
+
+def _event_content(row: sqlite3.Row):
+    """Returns (author, content dict) for an event row of either schema."""
+    keys = row.keys()
+    if "event_data" in keys:
+        data = json.loads(row["event_data"] or "{}")
+        return data.get("author", ""), data.get("content") or {}
+    author = row["author"] if "author" in keys else ""
+    return author, json.loads((row["content"] if "content" in keys else "") or "{}")
+
+
+def _event_messages(rows: list):
+    """(role, text, tool_response) of every part of the rows, for summarize_messages."""
+    for row in rows:
+        author, content = _event_content(row)
+        for part in content.get("parts") or []:
+            response = part.get("function_response") or part.get("functionResponse") or {}
+            yield "user" if author == "user" else "model", part.get("text"), response.get("response")
+
+
+def summarize_events(rows: list, previous: str = "") -> str:
+    """Extractive summary of archived turns: the guest's questions and booking ids."""
+    return summarize_messages(_event_messages(rows), previous,
+                              question_chars=SUMMARY_QUESTION_CHARS, max_chars=SUMMARY_MAX_CHARS)
+
+
+class SegmentWriter:
+    """Appends archived rows to gzip JSONL segment files.
+
+    Every write is its own gzip member (readers see one stream) and is
+    fsync-ed before write() returns.
+    """
+
+    def __init__(self, directory: Path = ARCHIVE_DIR, max_bytes: int = MAX_SEGMENT_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.path = None
+
+    def write(self, records: list) -> int:
+        if not records:
+            return 0
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if self.path is None or not self.path.exists() or self.path.stat().st_size >= self.max_bytes:
+            stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+            self.path = self.directory / f"segment-{stamp}-{os.getpid()}.jsonl.gz"
+
+        payload = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        data = gzip.compress(payload.encode("utf-8"))
+        with open(self.path, "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        return len(data)
+
+
+def read_segments(directory: Path = ARCHIVE_DIR):
+    """Yields every archived record, oldest segment first."""
+    for path in sorted(Path(directory).glob("segment-*.jsonl.gz")):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+class SessionCompactor:
+    """Incrementally trims, summarizes and archives sessions in a SQLite session DB."""
+
+    def __init__(self, db_path, archive_dir: Path = ARCHIVE_DIR,
+                 horizon_seconds: float = HORIZON_SECONDS,
+                 max_live_invocations: int = MAX_LIVE_INVOCATIONS,
+                 min_live_invocations: int = MIN_LIVE_INVOCATIONS,
+                 archive_after_seconds: float = ARCHIVE_AFTER_SECONDS,
+                 on_archive=None, on_trim=None):
+        self.db_path = Path(db_path)
+        self.archive_dir = Path(archive_dir)
+        self.horizon_seconds = horizon_seconds
+        self.max_live_invocations = max_live_invocations
+        self.min_live_invocations = min_live_invocations
+        self.archive_after_seconds = archive_after_seconds
+        # Called with (app_name, user_id, session_id) after a session is archived
+        self.on_archive = on_archive
+        # Called with (app_name, user_id, session_id, summary) after old turns
+        # of a session are trimmed and its new summary is committed
+        self.on_trim = on_trim
+
+        self.segments = SegmentWriter(self.archive_dir)
+        self._conn = None
+        self._thread = None
+        self._stop = threading.Event()
+        self.metrics = {
+            "passes": 0,
+            "events_archived": 0,
+            "sessions_summarized": 0,
+            "sessions_archived": 0,
+            "archive_bytes": 0,
+            "pages_vacuumed": 0,
+            "last_pass_seconds": 0.0,
+        }
+
+    # ----------------------------------------------------------------
+    # Connection
+    # ----------------------------------------------------------------
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT_MS / 1000,
+                                   isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _has_tables(self) -> bool:
+        conn = self._connection()
+        names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        return {"sessions", "events"} <= names
+
+    # ----------------------------------------------------------------
+    # 1. Old turns -> segment + summary
+    # ----------------------------------------------------------------
+    def _sessions_to_trim(self, horizon: str) -> list:
+        # The oldest turn ranks last, so "has an old turn and more than
+        # MIN_LIVE_INVOCATIONS turns" means that turn can go.
+        return self._connection().execute(
+            """
+            SELECT app_name, user_id, session_id
+            FROM (
+                SELECT app_name, user_id, session_id, invocation_id, MAX(timestamp) AS last_time
+                FROM events
+                GROUP BY app_name, user_id, session_id, invocation_id
+            )
+            GROUP BY app_name, user_id, session_id
+            HAVING COUNT(*) > ?
+                OR (MIN(last_time) < ? AND COUNT(*) > ?)
+            LIMIT ?
+            """,
+            (self.max_live_invocations, horizon, self.min_live_invocations, SESSIONS_PER_STEP),
+        ).fetchall()
+
+    def _invocations_to_archive(self, key: tuple, horizon: str) -> list:
+        invocations = self._connection().execute(
+            """
+            SELECT invocation_id, MAX(timestamp) AS last_time
+            FROM events
+            WHERE app_name = ? AND user_id = ? AND session_id = ?
+            GROUP BY invocation_id
+            ORDER BY last_time DESC
+            """,
+            key,
+        ).fetchall()
+        return [
+            row["invocation_id"]
+            for rank, row in enumerate(invocations)
+            if rank >= self.min_live_invocations
+            and (rank >= self.max_live_invocations or row["last_time"] < horizon)
+        ]
+
+    def _trim_session(self, key: tuple, horizon: str) -> int:
+        conn = self._connection()
+        invocation_ids = self._invocations_to_archive(key, horizon)
+        if not invocation_ids:
+            return 0
+
+        app_name, user_id, session_id = key
+        summary = None
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Only the rows deleted here are archived and summarized: another
+            # compactor may have taken some of these turns since we looked.
+            rows = []
+            for start in range(0, len(invocation_ids), 500):
+                chunk = invocation_ids[start:start + 500]
+                rows.extend(conn.execute(
+                    f"""
+                    DELETE FROM events
+                    WHERE app_name = ? AND user_id = ? AND session_id = ?
+                      AND invocation_id IN ({",".join("?" * len(chunk))})
+                    RETURNING *
+                    """,
+                    (*key, *chunk),
+                ).fetchall())
+            if not rows:
+                conn.execute("ROLLBACK")
+                return 0
+            rows.sort(key=lambda row: row["timestamp"])
+
+            # State is read inside the write transaction, so a turn that
+            # committed meanwhile is not overwritten (ADK merges deltas).
+            # update_time is left alone: it is ADK's stale-session marker.
+            state_row = conn.execute(
+                "SELECT state FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?", key
+            ).fetchone()
+            if state_row is not None:
+                state = json.loads(state_row["state"] or "{}")
+                summary = state[SUMMARY_STATE_KEY] = summarize_events(rows, state.get(SUMMARY_STATE_KEY, ""))
+                conn.execute(
+                    "UPDATE sessions SET state = ? WHERE app_name = ? AND user_id = ? AND id = ?",
+                    (json.dumps(state, ensure_ascii=False), *key),
+                )
+
+            # On disk before the delete commits
+            archive_bytes = self.segments.write([{
+                "kind": "events",
+                "app_name": app_name,
+                "user_id": user_id,
+                "session_id": session_id,
+                "archived_at": _utc_text(datetime.now(timezone.utc)),
+                "rows": [_encode_row(row) for row in rows],
+            }])
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+        if summary is not None and self.on_trim is not None:
+            self.on_trim(app_name, user_id, session_id, summary)
+        self.metrics["archive_bytes"] += archive_bytes
+        self.metrics["events_archived"] += len(rows)
+        self.metrics["sessions_summarized"] += 1
+        return len(rows)
+
+    # ----------------------------------------------------------------
+    # 2. Cold sessions -> segment
+    # ----------------------------------------------------------------
+    def _archive_cold_sessions(self, cutoff: str) -> int:
+        conn = self._connection()
+        sessions = conn.execute(
+            "SELECT * FROM sessions WHERE update_time < ? LIMIT ?", (cutoff, SESSIONS_PER_STEP)
+        ).fetchall()
+        archived = 0
+        for session in sessions:
+            key = (session["app_name"], session["user_id"], session["id"])
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Only if nobody resumed (or archived) the session since we read it
+                deleted = conn.execute(
+                    "DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND id = ? AND update_time = ? RETURNING *",
+                    (*key, session["update_time"]),
+                ).fetchone()
+                if deleted is None:
+                    conn.execute("ROLLBACK")
+                    continue
+                events = conn.execute(
+                    "DELETE FROM events WHERE app_name = ? AND user_id = ? AND session_id = ? RETURNING *", key
+                ).fetchall()
+                events.sort(key=lambda row: row["timestamp"])
+                archive_bytes = self.segments.write([{
+                    "kind": "session",
+                    "app_name": key[0],
+                    "user_id": key[1],
+                    "session_id": key[2],
+                    "archived_at": _utc_text(datetime.now(timezone.utc)),
+                    "session": _encode_row(deleted),
+                    "rows": [_encode_row(row) for row in events],
+                }])
+                conn.execute("COMMIT")
+            except Exception:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+
+            archived += 1
+            self.metrics["archive_bytes"] += archive_bytes
+            self.metrics["sessions_archived"] += 1
+            self.metrics["events_archived"] += len(events)
+            if self.on_archive is not None:
+                self.on_archive(*key)
+        return archived
+
+    # ----------------------------------------------------------------
+    # 3. Space reclamation
+    # ----------------------------------------------------------------
+    def enable_incremental_vacuum(self, max_bytes: int = None) -> bool:
+        """Switches the DB to auto_vacuum=INCREMENTAL (one full VACUUM, only once).
+
+        Skipped (returns False) when the DB file is larger than `max_bytes`.
+        """
+        conn = self._connection()
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return True
+        size = self.db_path.stat().st_size
+        if max_bytes is not None and size > max_bytes:
+            print(f"--- Compaction: {self.db_path} is {size // (1024 * 1024)} MB, not enabling incremental "
+                  f"vacuum online; run `python session_compaction.py --db {self.db_path}` offline ---")
+            return False
+        print("--- Compaction: enabling incremental vacuum (one-time VACUUM) ---")
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        return True
+
+    def _vacuum_step(self) -> int:
+        conn = self._connection()
+        # Without auto_vacuum=INCREMENTAL the pragma is a no-op
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            return 0
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if not free_pages:
+            return 0
+        conn.execute(f"PRAGMA incremental_vacuum({VACUUM_PAGES_PER_STEP})").fetchall()
+        freed = free_pages - conn.execute("PRAGMA freelist_count").fetchone()[0]
+        self.metrics["pages_vacuumed"] += freed
+        return freed
+
+    # ----------------------------------------------------------------
+    # Driving
+    # ----------------------------------------------------------------
+    def compact_step(self) -> int:
+        """Does one small unit of work; returns how much was done (0 = nothing left)."""
+        if not self._has_tables():
+            return 0
+        now = datetime.now(timezone.utc)
+        horizon = _utc_text(now - timedelta(seconds=self.horizon_seconds))
+        cutoff = _utc_text(now - timedelta(seconds=self.archive_after_seconds))
+
+        done = self._archive_cold_sessions(cutoff)
+        for key in self._sessions_to_trim(horizon):
+            done += self._trim_session(tuple(key), horizon)
+        if not done:
+            done = self._vacuum_step()
+        return done
+
+    def run_once(self, pause: float = STEP_PAUSE_SECONDS) -> dict:
+        """Runs steps until there is nothing left to compact; returns the metrics."""
+        started = time.perf_counter()
+        while not self._stop.is_set() and self.compact_step():
+            time.sleep(pause)
+        self.metrics["passes"] += 1
+        self.metrics["last_pass_seconds"] = round(time.perf_counter() - started, 3)
+        return dict(self.metrics)
+
+    def start(self, interval: float = PASS_INTERVAL_SECONDS):
+        """Runs a pass every `interval` seconds on a daemon thread."""
+        if self._thread is not None:
+            return
+
+        def loop():
+            try:
+                if self.db_path.exists():
+                    self.enable_incremental_vacuum(max_bytes=ONLINE_VACUUM_MAX_BYTES)
+            except sqlite3.Error as e:
+                print(f"Error enabling incremental vacuum: {e}")
+            while not self._stop.is_set():
+                try:
+                    if self.db_path.exists():
+                        self.run_once()
+                except Exception as e:
+                    # Never take the app down; try again next pass
+                    print(f"Error compacting sessions: {e}")
+                self._stop.wait(interval)
+            self.close()
+
+        self._thread = threading.Thread(target=loop, name="session-compactor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    # ----------------------------------------------------------------
+    # Restore
+    # ----------------------------------------------------------------
+    def restore_session(self, app_name: str, user_id: str, session_id: str) -> int:
+        """Copies an archived session (and its archived turns) back into the live DB.
+
+        Returns: Number of events restored.
+        """
+        conn = self._connection()
+        session_columns = [row[1] for row in conn.execute("PRAGMA table_info(sessions)")]
+        event_columns = [row[1] for row in conn.execute("PRAGMA table_info(events)")]
+
+        session_row = None
+        event_rows = []
+        for record in read_segments(self.archive_dir):
+            if (record["app_name"], record["user_id"], record["session_id"]) != (app_name, user_id, session_id):
+                continue
+            if record["kind"] == "session":
+                session_row = _decode_row(record["session"])
+            event_rows.extend(_decode_row(row) for row in record["rows"])
+
+        def insert(table, columns, row):
+            present = [c for c in columns if c in row]
+            return conn.execute(
+                f"INSERT OR IGNORE INTO {table} ({', '.join(present)}) VALUES ({', '.join('?' * len(present))})",
+                [row[c] for c in present],
+            ).rowcount
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if session_row is not None:
+                insert("sessions", session_columns, session_row)
+            restored = sum(insert("events", event_columns, row) for row in event_rows)
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        return restored
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compact / archive the ADK session database")
+    parser.add_argument("--db", type=Path, default=Path("./my_agent_data.db"))
+    parser.add_argument("--archive-dir", type=Path, default=ARCHIVE_DIR)
+    parser.add_argument("--horizon-hours", type=float, default=HORIZON_SECONDS / 3600)
+    parser.add_argument("--restore", nargs=3, metavar=("APP_NAME", "USER_ID", "SESSION_ID"))
+    args = parser.parse_args()
+
+    compactor = SessionCompactor(args.db, archive_dir=args.archive_dir,
+                                 horizon_seconds=args.horizon_hours * 3600)
+    if args.restore:
+        print(f"Restored {compactor.restore_session(*args.restore)} events")
+    else:
+        compactor.enable_incremental_vacuum()
+        print(json.dumps(compactor.run_once(pause=0), indent=2))
+    compactor.close()
@@ -0,0 +1,529 @@
+import argparse
+import gzip
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from session_compaction import ARCHIVE_DIR, _decode_row, _utc_text
+
+# ================================================================
+# Streaming analytics export of the ADK session database
+#
+#   Copies sessions / events / user_states into columnar files for
+#   offline analytics (booking conversion, tool usage, turn latency):
+#       analytics_export/<table>/date=YYYY-MM-DD/part-*.parquet
+#   (or .arrow with --format arrow).
+#
+#   Rows are read in keyset-paginated chunks, never by OFFSET and never
+#   a whole table at once:
+#       events       ORDER BY (timestamp, id)
+#       sessions     ORDER BY (update_time, app_name, user_id, id)
+#       user_states  ORDER BY (update_time, app_name, user_id)
+#   Each chunk goes straight into the open part file (one row group),
+#   so memory stays at one chunk whatever the size of the database.
+#
+#   Resumable: _checkpoint.json keeps the last exported key per table
+#   and only moves once a part file is complete and in place. A part
+#   file is named after the key it starts from, so a run that died
+#   halfway rewrites the same file instead of duplicating rows. A
+#   nightly run therefore only reads rows added since the last one.
+#   Sessions and user states are mutable: a changed row is exported
+#   again with its new update_time (latest row per key wins).
+#
+#   Rows newer than SETTLE_SECONDS are left for the next run, so
+#   events still being committed are not skipped. Turns that
+#   session_compaction.py moved to session_archive/ before they were
+#   exported are merged back in from the segment files.
+#
+#   Run from agents/Hospitality_Agent:
+#       python session_export.py --db ./my_agent_data.db
+#       python session_export.py --report
+# ================================================================
+
+EXPORT_DIR = Path(__file__).parent / "analytics_export"
+CHECKPOINT_FILE = "_checkpoint.json"
+
+CHUNK_ROWS = 5000
+# Part files are closed at this size (and at every date change)
+MAX_ROWS_PER_FILE = 500_000
+SETTLE_SECONDS = 5 * 60
+BUSY_TIMEOUT_MS = 5000
+
+FORMATS = ("parquet", "arrow")
+
+# Keyset indexes, created if missing (TunedSessionService creates the events one too)
+EXPORT_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_events_timestamp_id ON events (timestamp, id)",
+    "CREATE INDEX IF NOT EXISTS idx_sessions_update_time ON sessions (update_time)",
+    "CREATE INDEX IF NOT EXISTS idx_user_states_update_time ON user_states (update_time)",
+)
+
+EVENT_COLUMNS = (
+    ("event_id", "string"),
+    ("app_name", "string"),
+    ("user_id", "string"),
+    ("session_id", "string"),
+    ("invocation_id", "string"),
+    ("author", "string"),
+    ("timestamp", "timestamp"),
+    ("text", "string"),
+    ("function_calls", "list<string>"),
+    ("function_responses", "list<string>"),
+    ("tool_error", "bool"),
+    ("confirmation_id", "string"),
+    ("prompt_tokens", "int64"),
+    ("completion_tokens", "int64"),
+    ("error_code", "string"),
+)
+
+SESSION_COLUMNS = (
+    ("app_name", "string"),
+    ("user_id", "string"),
+    ("session_id", "string"),
+    ("create_time", "timestamp"),
+    ("update_time", "timestamp"),
+    ("state", "string"),
+)
+
+USER_STATE_COLUMNS = (
+    ("app_name", "string"),
+    ("user_id", "string"),
+    ("update_time", "timestamp"),
+    ("state", "string"),
+)
+
+
+def _timestamp(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+
+def event_record(row: dict) -> dict:
+    """Flattens an events row of either ADK schema into an EVENT_COLUMNS record."""
+    if row.get("event_data") is not None:
+        data = json.loads(row["event_data"] or "{}")
+        content = data.get("content") or {}
+        usage = data.get("usage_metadata") or {}
+        author = data.get("author", "")
+        error_code = data.get("error_code")
+    else:
+        content = json.loads(row.get("content") or "{}")
+        usage = json.loads(row.get("usage_metadata") or "{}")
+        author = row.get("author", "")
+        error_code = row.get("error_code")
+
+    texts, calls, responses = [], [], []
+    tool_error = False
+    confirmation_id = None
+    for part in content.get("parts") or ():
+        if part.get("text"):
+            texts.append(part["text"])
+        if part.get("function_call"):
+            calls.append(part["function_call"].get("name", ""))
+        if part.get("function_response"):
+            response = part["function_response"].get("response") or {}
+            responses.append(part["function_response"].get("name", ""))
+            if isinstance(response, dict):
+                tool_error = tool_error or "error" in response
+                details = response.get("booking_details")
+                if isinstance(details, dict):
+                    confirmation_id = confirmation_id or details.get("confirmation_id")
+
+    return {
+        "event_id": row["id"],
+        "app_name": row["app_name"],
+        "user_id": row["user_id"],
+        "session_id": row["session_id"],
+        "invocation_id": row["invocation_id"],
+        "author": author,
+        "timestamp": _timestamp(row["timestamp"]),
+        "text": "\n".join(texts) or None,
+        "function_calls": calls,
+        "function_responses": responses,
+        "tool_error": tool_error,
+        "confirmation_id": confirmation_id,
+        "prompt_tokens": usage.get("prompt_token_count"),
+        "completion_tokens": usage.get("candidates_token_count"),
+        "error_code": error_code,
+    }
+
+
+def session_record(row: dict) -> dict:
+    return {
+        "app_name": row["app_name"],
+        "user_id": row["user_id"],
+        "session_id": row["id"],
+        "create_time": _timestamp(row["create_time"]),
+        "update_time": _timestamp(row["update_time"]),
+        "state": row["state"],
+    }
+
+
+def user_state_record(row: dict) -> dict:
+    return {
+        "app_name": row["app_name"],
+        "user_id": row["user_id"],
+        "update_time": _timestamp(row["update_time"]),
+        "state": row["state"],
+    }
+
+
+# table -> (keyset columns, record columns, row -> record, partition column)
+TABLES = {
+    "events": (("timestamp", "id"), EVENT_COLUMNS, event_record, "timestamp"),
+    "sessions": (("update_time", "app_name", "user_id", "id"), SESSION_COLUMNS, session_record, "update_time"),
+    "user_states": (("update_time", "app_name", "user_id"), USER_STATE_COLUMNS, user_state_record, "update_time"),
+}
+
+
+# ================================================================
+# Reading
+# ================================================================
+def keyset_chunks(conn: sqlite3.Connection, table: str, after, until: str, chunk_rows: int = CHUNK_ROWS):
+    """Yields lists of rows (dicts) with key > `after` and time <= `until`, in key order."""
+    key_columns = TABLES[table][0]
+    key = ", ".join(key_columns)
+    time_column = key_columns[0]
+    while True:
+        if after is None:
+            where, params = f"{time_column} <= ?", [until]
+        else:
+            where = f"{time_column} <= ? AND ({key}) > ({', '.join('?' * len(key_columns))})"
+            params = [until, *after]
+        rows = conn.execute(
+            f"SELECT * FROM {table} WHERE {where} ORDER BY {key} LIMIT ?", (*params, chunk_rows)
+        ).fetchall()
+        if not rows:
+            return
+        chunk = [dict(row) for row in rows]
+        yield chunk
+        after = [chunk[-1][column] for column in key_columns]
+
+
+def _archived_key(row: dict) -> tuple:
+    return row["timestamp"], row["id"]
+
+
+def _segment_rows(path: Path, after, until: str):
+    """Yields a segment's event rows with key in (after, until], in key order.
+
+    Each record (one compaction step's turns of one session) is a short
+    sorted run; the runs are merged lazily and rows are decoded as they
+    are yielded.
+    """
+    runs = []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            run = [row for row in json.loads(line).get("rows") or ()
+                   if row["timestamp"] <= until and (after is None or [row["timestamp"], row["id"]] > list(after))]
+            if run:
+                run.sort(key=_archived_key)
+                runs.append(run)
+    for row in heapq.merge(*runs, key=_archived_key):
+        yield _decode_row(row)
+
+
+def archived_events(archive_dir: Path, after, until: str):
+    """Iterator over archived event rows with key in (after, until], by (timestamp, id).
+
+    Only segments written since `after` are read (by mtime), so this is
+    bounded by what was archived since the last run. Segments are
+    streamed and merged, never collected into one sorted list.
+    """
+    if not Path(archive_dir).exists():
+        return iter(())
+    since = None
+    if after is not None:
+        # mtime is compared with a day of slack (clock / timezone safety)
+        since = (_timestamp(after[0]) - timedelta(days=1)).replace(tzinfo=timezone.utc).timestamp()
+
+    segments = [
+        _segment_rows(path, after, until)
+        for path in sorted(Path(archive_dir).glob("segment-*.jsonl.gz"))
+        if since is None or path.stat().st_mtime >= since
+    ]
+    return heapq.merge(*segments, key=_archived_key)
+
+
+def merged_event_chunks(conn, after, until: str, archive_dir: Path, chunk_rows: int = CHUNK_ROWS):
+    """Live and archived events in key order, without duplicates, in chunks."""
+    live = (row for chunk in keyset_chunks(conn, "events", after, until, chunk_rows) for row in chunk)
+    archived = archived_events(archive_dir, after, until)
+
+    def key(row):
+        return (row["timestamp"], row["id"], row["app_name"], row["user_id"], row["session_id"])
+
+    # A row archived while this run read it shows up twice, next to itself
+    merged = heapq.merge(live, archived, key=key)
+    unique = (next(group) for _, group in itertools.groupby(merged, key=key))
+    while True:
+        chunk = list(itertools.islice(unique, chunk_rows))
+        if not chunk:
+            return
+        yield chunk
+
+
+# ================================================================
+# Writing
+# ================================================================
+def _arrow_schema(columns: tuple):
+    import pyarrow as pa
+
+    types = {
+        "string": pa.string(),
+        "timestamp": pa.timestamp("us"),
+        "int64": pa.int64(),
+        "bool": pa.bool_(),
+        "list<string>": pa.list_(pa.string()),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in columns])
+
+
+class PartWriter:
+    """One part file: chunks are appended as row groups / record batches.
+
+    Written under a temporary name and moved into place by close(), so a
+    file with its final name is always complete.
+    """
+
+    def __init__(self, path: Path, columns: tuple, file_format: str):
+        # pyarrow is only needed by the export job, not by the agent
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.path = path
+        self.tmp_path = path.with_name(path.name + ".tmp")
+        self.schema = _arrow_schema(columns)
+        self.rows = 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if file_format == "parquet":
+            self._writer = pq.ParquetWriter(self.tmp_path, self.schema, compression="zstd")
+            self._write = self._writer.write_table
+        else:
+            self._sink = pa.OSFile(str(self.tmp_path), "wb")
+            self._writer = pa.ipc.new_file(self._sink, self.schema)
+            self._write = self._writer.write_table
+        self._pa = pa
+
+    def write(self, records: list):
+        table = self._pa.Table.from_pylist(records, schema=self.schema)
+        self._write(table)
+        self.rows += len(records)
+
+    def close(self):
+        self._writer.close()
+        if hasattr(self, "_sink"):
+            self._sink.close()
+        os.replace(self.tmp_path, self.path)
+
+
+def _partition(value) -> str:
+    return f"date={_timestamp(value).date().isoformat()}"
+
+
+def _part_name(after, file_format: str) -> str:
+    start = json.dumps(after, default=str)
+    return f"part-{hashlib.sha1(start.encode('utf-8')).hexdigest()[:16]}.{file_format}"
+
+
+# ================================================================
+# Export
+# ================================================================
+class SessionExporter:
+    """Incremental, resumable export of the session DB into columnar files."""
+
+    def __init__(self, db_path, export_dir: Path = EXPORT_DIR, archive_dir: Path = ARCHIVE_DIR,
+                 file_format: str = "parquet", chunk_rows: int = CHUNK_ROWS,
+                 max_rows_per_file: int = MAX_ROWS_PER_FILE, settle_seconds: float = SETTLE_SECONDS):
+        if file_format not in FORMATS:
+            raise ValueError(f"file_format must be one of {FORMATS}, got {file_format!r}")
+        self.db_path = Path(db_path)
+        self.export_dir = Path(export_dir)
+        self.archive_dir = Path(archive_dir)
+        self.file_format = file_format
+        self.chunk_rows = chunk_rows
+        self.max_rows_per_file = max_rows_per_file
+        self.settle_seconds = settle_seconds
+
+    # ----------------------------------------------------------------
+    # Checkpoint
+    # ----------------------------------------------------------------
+    @property
+    def checkpoint_path(self) -> Path:
+        return self.export_dir / CHECKPOINT_FILE
+
+    def load_checkpoint(self) -> dict:
+        try:
+            return json.loads(self.checkpoint_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+
+    def _save_checkpoint(self, checkpoint: dict):
+        self.export_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.checkpoint_path.with_name(CHECKPOINT_FILE + ".tmp")
+        tmp.write_text(json.dumps(checkpoint, indent=2), encoding="utf-8")
+        os.replace(tmp, self.checkpoint_path)
+
+    # ----------------------------------------------------------------
+    # Run
+    # ----------------------------------------------------------------
+    def _connection(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        for statement in EXPORT_INDEXES:
+            try:
+                conn.execute(statement)
+            except sqlite3.Error as e:
+                # Read-only DB etc.: keyset reads still work, just slower
+                print(f"Error creating export index: {e}", file=sys.stderr)
+        return conn
+
+    def run_once(self) -> dict:
+        """Exports every table up to now - settle_seconds; returns rows / files per table."""
+        until = _utc_text(datetime.now(timezone.utc) - timedelta(seconds=self.settle_seconds))
+        checkpoint = self.load_checkpoint()
+        conn = self._connection()
+        try:
+            tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            report = {}
+            for table in TABLES:
+                if table not in tables:
+                    continue
+                after = checkpoint.get(table)
+                if table == "events":
+                    chunks = merged_event_chunks(conn, after, until, self.archive_dir, self.chunk_rows)
+                else:
+                    chunks = keyset_chunks(conn, table, after, until, self.chunk_rows)
+                report[table] = self._export_table(table, chunks, checkpoint)
+        finally:
+            conn.close()
+        report["until"] = until
+        return report
+
+    def _export_table(self, table: str, chunks, checkpoint: dict) -> dict:
+        key_columns, columns, to_record, partition_column = TABLES[table]
+        writer = None
+        partition = None
+        last_key = checkpoint.get(table)
+        exported = files = 0
+
+        def finish():
+            nonlocal writer, files
+            writer.close()
+            files += 1
+            writer = None
+            # Only now is everything up to last_key safely on disk
+            checkpoint[table] = last_key
+            self._save_checkpoint(checkpoint)
+
+        for chunk in chunks:
+            # Chunks are in key order, so each date is one contiguous run
+            for date, rows in itertools.groupby(chunk, key=lambda row: _partition(row[partition_column])):
+                rows = list(rows)
+                if writer is not None and (date != partition or writer.rows >= self.max_rows_per_file):
+                    finish()
+                if writer is None:
+                    partition = date
+                    path = self.export_dir / table / date / _part_name(last_key, self.file_format)
+                    writer = PartWriter(path, columns, self.file_format)
+                writer.write([to_record(row) for row in rows])
+                last_key = [rows[-1][column] for column in key_columns]
+                exported += len(rows)
+        if writer is not None:
+            finish()
+        return {"rows": exported, "files": files}
+
+
+# ================================================================
+# Report
+# ================================================================
+# check_and_book_tool checks availability and books in one call
+AVAILABILITY_TOOLS = ("booking_availability_tool", "open_windows_tool", "check_and_book_tool")
+REPORT_COLUMNS = ("session_id", "invocation_id", "timestamp", "function_calls", "tool_error", "confirmation_id")
+
+
+def _percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def report(export_dir: Path = EXPORT_DIR, file_format: str = "parquet") -> list:
+    """Per-day booking conversion, tool-call counts and turn latency of exported events.
+
+    Reads one date partition at a time, in record batches of the needed
+    columns only, so memory follows one day's sessions, not the dataset.
+    A turn's latency is the time from its first to its last event.
+    """
+    import pyarrow.dataset as ds
+
+    days = []
+    for partition in sorted((Path(export_dir) / "events").glob("date=*")):
+        files = sorted(str(path) for path in partition.glob(f"*.{file_format}"))
+        if not files:
+            continue
+        dataset = ds.dataset(files, format="parquet" if file_format == "parquet" else "ipc")
+        tool_calls, tool_errors = {}, 0
+        checked, booked, sessions = set(), set(), set()
+        turns = {}
+        for batch in dataset.to_batches(columns=list(REPORT_COLUMNS)):
+            for row in batch.to_pylist():
+                sessions.add(row["session_id"])
+                for name in row["function_calls"] or ():
+                    tool_calls[name] = tool_calls.get(name, 0) + 1
+                    if name in AVAILABILITY_TOOLS:
+                        checked.add(row["session_id"])
+                tool_errors += bool(row["tool_error"])
+                if row["confirmation_id"]:
+                    booked.add(row["session_id"])
+                first, last = turns.get(row["invocation_id"], (row["timestamp"], row["timestamp"]))
+                turns[row["invocation_id"]] = (min(first, row["timestamp"]), max(last, row["timestamp"]))
+
+        latencies = [(last - first).total_seconds() * 1000 for first, last in turns.values()]
+        days.append({
+            "date": partition.name.split("=", 1)[1],
+            "sessions": len(sessions),
+            "turns": len(turns),
+            "sessions_checking_availability": len(checked),
+            "sessions_booking": len(booked),
+            "booking_conversion": round(len(booked & checked) / len(checked), 3) if checked else 0.0,
+            "tool_calls": dict(sorted(tool_calls.items(), key=lambda item: -item[1])),
+            "tool_errors": tool_errors,
+            "turn_latency_ms": {
+                "p50": round(_percentile(latencies, 0.50), 1),
+                "p95": round(_percentile(latencies, 0.95), 1),
+                "max": round(max(latencies, default=0.0), 1),
+            },
+        })
+    return days
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the ADK session database for analytics")
+    parser.add_argument("--db", type=Path, default=Path("./my_agent_data.db"))
+    parser.add_argument("--export-dir", type=Path, default=EXPORT_DIR)
+    parser.add_argument("--archive-dir", type=Path, default=ARCHIVE_DIR)
+    parser.add_argument("--format", choices=FORMATS, default="parquet")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--settle-seconds", type=float, default=SETTLE_SECONDS)
+    parser.add_argument("--report", action="store_true", help="Summarize the exported events instead")
+    args = parser.parse_args()
+
+    if args.report:
+        print(json.dumps(report(args.export_dir, args.format), indent=2, default=str))
+    else:
+        exporter = SessionExporter(args.db, export_dir=args.export_dir, archive_dir=args.archive_dir,
+                                   file_format=args.format, chunk_rows=args.chunk_rows,
+                                   settle_seconds=args.settle_seconds)
+        print(json.dumps(exporter.run_once(), indent=2))
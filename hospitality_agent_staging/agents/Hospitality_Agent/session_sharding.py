@@ -0,0 +1,402 @@
+import asyncio
+import bisect
+import hashlib
+import os
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from google.adk.sessions import DatabaseSessionService
+from google.adk.sessions.base_session_service import BaseSessionService, ListSessionsResponse
+from sqlalchemy import delete, insert, select, union
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+
+from utils import get_session_states
+
+# ================================================================
+# User-sharded session storage
+#
+#   SQLite lets one writer at a time into a file, so every
+#   conversation of every worker process queues behind the same
+#   write lock (group commit, see session_storage.py, batches the
+#   writes of one process but doesn't lift that limit).
+#   ShardedSessionService spreads users over several session
+#   services ("shards"), e.g. one TunedSessionService per SQLite
+#   file:
+#       - user_id -> shard by consistent hashing: VNODES points per
+#         shard on a SHA-1 ring, the same in every process. All of a
+#         user's sessions, events and user: state live on one shard,
+#         so a turn only ever touches that shard
+#       - create / get / list / delete / append_event go to the
+#         owning shard; list_sessions without a user_id asks all of
+#         them
+#       - adding a shard only moves the users the new shard takes
+#         over (about 1/N of them)
+#
+#   Rebalancing is online. add_shard() (or a restart with more
+#   SESSION_SHARDS) scans every shard for users it no longer owns,
+#   and a background task moves them in small batches. Rows are
+#   copied as they are (ids, timestamps and so the stale-session
+#   markers don't change); they are read and deleted from the old
+#   shard in one statement, which commits only once the new shard has
+#   them. A request for a user that hasn't moved yet moves that user
+#   first; every other user carries on as usual. Moves need
+#   DatabaseSessionService shards; other backends are routed to but
+#   never scanned.
+#
+#   app: state is per shard (copied to a shard that has none along
+#   with the first user that moves there); this agent doesn't write
+#   any. Requests wait for moves within one process (a second
+#   process moving the same user finds nothing left on the old
+#   shard), so restart every worker with the same SESSION_SHARDS.
+# ================================================================
+
+# SESSION_SHARDS=4 spreads users over 4 session DBs (1 = one DB, no sharding)
+SESSION_SHARDS = int(os.getenv("SESSION_SHARDS", "1"))
+
+# Ring points per shard: more points, more even shards
+VNODES = 128
+
+# Users moved per transaction by the background rebalance (a request
+# for one of them waits for the whole batch), and the pause between
+# batches (lets turns interleave)
+MOVE_BATCH = 50
+MOVE_PAUSE_SECONDS = 0.01
+
+# A move that times out on a busy shard is tried again
+MOVE_ATTEMPTS = 3
+
+# How often add_shard() checks that requests routed with the old ring are done
+DRAIN_POLL_SECONDS = 0.005
+
+
+def shard_urls(db_url: str, shards: int = SESSION_SHARDS) -> dict:
+    """{shard name: DB URL}. shard-0 is db_url itself, so an existing DB
+    keeps its users; shard-i adds "-i" to the database name
+    (my_agent_data.db -> my_agent_data-1.db)."""
+    url = make_url(db_url)
+    path = Path(url.database)
+    urls = {"shard-0": db_url}
+    for i in range(1, shards):
+        database = str(path.with_name(f"{path.stem}-{i}{path.suffix}"))
+        urls[f"shard-{i}"] = url.set(database=database).render_as_string(hide_password=False)
+    return urls
+
+
+def _ring_point(key: str) -> int:
+    # Python's hash() is salted per process, and every process must agree
+    return int.from_bytes(hashlib.sha1(key.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent hash ring over shard names."""
+
+    def __init__(self, names, vnodes: int = VNODES):
+        points = sorted((_ring_point(f"{name}#{i}"), name) for name in names for i in range(vnodes))
+        self._points = [point for point, _ in points]
+        self._names = [name for _, name in points]
+
+    def owner(self, key: str) -> str:
+        """Name of the shard that owns `key`: the first ring point clockwise of it."""
+        index = bisect.bisect(self._points, _ring_point(key)) % len(self._points)
+        return self._names[index]
+
+
+class ShardedSessionService(BaseSessionService):
+    """Routes every call to the shard that owns the user, moving users when shards are added.
+
+    `shards` maps stable names to session services; the names (not the
+    order) decide which shard owns which user.
+    """
+
+    def __init__(self, shards: dict, vnodes: int = VNODES):
+        if not shards:
+            raise ValueError("ShardedSessionService needs at least one shard")
+        self.shards = dict(shards)
+        self.vnodes = vnodes
+        self.ring = HashRing(self.shards, vnodes)
+
+        # user_id -> names of the shards that still hold its rows
+        self._misplaced = {}
+        # user_id -> task moving it
+        self._moves = {}
+        # Scan for misplaced users (after start-up or add_shard); requests wait for it
+        self._ready = None
+        self._migrator = None
+        self._inflight = 0
+        self.metrics = {"rebalances": 0, "users_moved": 0, "sessions_moved": 0,
+                        "events_moved": 0, "move_retries": 0}
+
+    # ----------------------------------------------------------------
+    # Routing
+    # ----------------------------------------------------------------
+    async def _scanned(self):
+        if self._ready is None:
+            self._ready = asyncio.ensure_future(self._rebalance())
+        ready = self._ready
+        try:
+            await asyncio.shield(ready)
+        except Exception:
+            if self._ready is ready:
+                # Scan again on the next request
+                self._ready = None
+            raise
+
+    async def _place(self, user_ids):
+        """Waits until the rows of user_ids are on the shards that own them."""
+        while True:
+            await self._scanned()
+            pending = [user_id for user_id in user_ids if user_id in self._misplaced]
+            if not pending:
+                return
+            await asyncio.gather(*(self._move(user_id) for user_id in pending))
+
+    @asynccontextmanager
+    async def _tracked(self):
+        # Counts requests routed with the current ring (add_shard waits for them)
+        self._inflight += 1
+        try:
+            yield
+        finally:
+            self._inflight -= 1
+
+    @asynccontextmanager
+    async def _shard_for(self, user_id: str):
+        """Yields the shard that owns user_id, once the user's rows are there."""
+        await self._place((user_id,))
+        async with self._tracked():
+            yield self.shards[self.ring.owner(user_id)]
+
+    # ----------------------------------------------------------------
+    # Session service API
+    # ----------------------------------------------------------------
+    async def prepare_tables(self) -> None:
+        await self._scanned()
+
+    async def create_session(self, *, app_name: str, user_id: str, state=None, session_id=None):
+        async with self._shard_for(user_id) as shard:
+            return await shard.create_session(app_name=app_name, user_id=user_id, state=state,
+                                              session_id=session_id)
+
+    async def get_session(self, *, app_name: str, user_id: str, session_id: str, config=None):
+        async with self._shard_for(user_id) as shard:
+            return await shard.get_session(app_name=app_name, user_id=user_id, session_id=session_id,
+                                           config=config)
+
+    async def list_sessions(self, *, app_name: str, user_id: str | None = None) -> ListSessionsResponse:
+        if user_id is not None:
+            async with self._shard_for(user_id) as shard:
+                return await shard.list_sessions(app_name=app_name, user_id=user_id)
+
+        # Every user: ask every shard (oldest first, like one DB would answer)
+        await self._scanned()
+        async with self._tracked():
+            responses = await asyncio.gather(*(shard.list_sessions(app_name=app_name)
+                                               for shard in self.shards.values()))
+        sessions = [session for response in responses for session in response.sessions]
+        sessions.sort(key=lambda session: session.last_update_time)
+        return ListSessionsResponse(sessions=sessions)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        async with self._shard_for(user_id) as shard:
+            await shard.delete_session(app_name=app_name, user_id=user_id, session_id=session_id)
+
+    async def get_user_state(self, *, app_name: str, user_id: str) -> dict:
+        async with self._shard_for(user_id) as shard:
+            return await shard.get_user_state(app_name=app_name, user_id=user_id)
+
+    async def append_event(self, session, event):
+        async with self._shard_for(session.user_id) as shard:
+            return await shard.append_event(session, event)
+
+    async def flush(self) -> None:
+        await asyncio.gather(*(shard.flush() for shard in self.shards.values()))
+
+    async def get_session_state(self, *, app_name: str, user_id: str, session_id: str):
+        """Returns the session's state (as Session.state shows it), or None if there is no such session."""
+        states = await self.get_session_states(app_name=app_name, sessions=[(user_id, session_id)])
+        return states.get((user_id, session_id))
+
+    async def get_session_states(self, *, app_name: str, sessions: list) -> dict:
+        """Returns {(user_id, session_id): state}, asking each shard once for its users' sessions."""
+        sessions = list(sessions)
+        await self._place({user_id for user_id, _ in sessions})
+        by_shard = {}
+        for user_id, session_id in sessions:
+            by_shard.setdefault(self.ring.owner(user_id), []).append((user_id, session_id))
+        async with self._tracked():
+            results = await asyncio.gather(*(get_session_states(self.shards[name], app_name, keys)
+                                             for name, keys in by_shard.items()))
+        return {key: state for states in results for key, state in states.items()}
+
+    async def close(self):
+        if self._migrator is not None:
+            self._migrator.cancel()
+        for shard in self.shards.values():
+            if hasattr(shard, "close"):
+                await shard.close()
+
+    # ----------------------------------------------------------------
+    # Rebalancing
+    # ----------------------------------------------------------------
+    async def add_shard(self, name: str, shard: BaseSessionService) -> None:
+        """Adds a shard and starts moving the users it now owns to it.
+
+        Returns once requests are routed with the new ring: users that
+        still have to move are moved in the background (or on their
+        next request).
+        """
+        if name in self.shards:
+            raise ValueError(f"Shard {name!r} already exists")
+        previous = self._ready
+        self._ready = asyncio.ensure_future(self._add_shard(previous, name, shard))
+        await self._scanned()
+
+    async def _add_shard(self, previous, name: str, shard: BaseSessionService):
+        if previous is not None:
+            # The new scan below covers whatever this one found
+            await asyncio.gather(previous, return_exceptions=True)
+        if self._migrator is not None:
+            self._migrator.cancel()
+        # Requests routed with the old ring, and moves already running, finish first
+        while self._inflight or self._moves:
+            await asyncio.sleep(DRAIN_POLL_SECONDS)
+        self.shards[name] = shard
+        self.ring = HashRing(self.shards, self.vnodes)
+        await self._rebalance()
+
+    async def _rebalance(self):
+        """Finds users whose rows are not on the shard that owns them and starts moving them."""
+        await asyncio.gather(*(shard.prepare_tables() for shard in self.shards.values()
+                               if hasattr(shard, "prepare_tables")))
+        misplaced = {}
+        if len(self.shards) > 1:
+            for name, shard in self.shards.items():
+                if not isinstance(shard, DatabaseSessionService):
+                    continue
+                for user_id in await self._user_ids(shard):
+                    if self.ring.owner(user_id) != name:
+                        misplaced.setdefault(user_id, []).append(name)
+        self._misplaced = misplaced
+        if misplaced:
+            self.metrics["rebalances"] += 1
+            print(f"--- Session shards: moving {len(misplaced)} users ---")
+            self._migrator = asyncio.ensure_future(self._migrate())
+
+    async def _user_ids(self, shard: DatabaseSessionService) -> list:
+        schema = shard._get_schema_classes()
+        sessions, user_states = schema.StorageSession.__table__, schema.StorageUserState.__table__
+        async with shard.db_engine.connect() as conn:
+            rows = await conn.execute(union(select(sessions.c.user_id), select(user_states.c.user_id)))
+            return [user_id for user_id, in rows]
+
+    async def _migrate(self):
+        """Moves every misplaced user, MOVE_BATCH at a time, while requests keep running."""
+        groups = {}
+        for user_id, sources in self._misplaced.items():
+            groups.setdefault((tuple(sources), self.ring.owner(user_id)), []).append(user_id)
+        for users in groups.values():
+            for start in range(0, len(users), MOVE_BATCH):
+                batch = [user_id for user_id in users[start:start + MOVE_BATCH]
+                         if user_id in self._misplaced and user_id not in self._moves]
+                if not batch:
+                    continue
+                try:
+                    await asyncio.shield(self._start_move(batch))
+                except Exception as e:
+                    # Left in place; their next request tries again
+                    print(f"Error moving sessions of {len(batch)} users: {e}")
+                await asyncio.sleep(MOVE_PAUSE_SECONDS)
+
+    def _start_move(self, user_ids: list) -> asyncio.Future:
+        task = asyncio.ensure_future(self._move_users(user_ids))
+        for user_id in user_ids:
+            self._moves[user_id] = task
+
+        def done(_):
+            for user_id in user_ids:
+                if self._moves.get(user_id) is task:
+                    del self._moves[user_id]
+
+        task.add_done_callback(done)
+        return task
+
+    async def _move(self, user_id: str):
+        # A user already moving with a batch waits for that batch
+        await asyncio.shield(self._moves.get(user_id) or self._start_move([user_id]))
+
+    async def _move_users(self, user_ids: list):
+        moves = {}
+        for user_id in user_ids:
+            for source_name in self._misplaced.get(user_id, ()):
+                moves.setdefault((source_name, self.ring.owner(user_id)), []).append(user_id)
+        for (source_name, target_name), users in moves.items():
+            for attempt in range(MOVE_ATTEMPTS):
+                try:
+                    await self._copy_users(self.shards[source_name], self.shards[target_name], users)
+                    break
+                except OperationalError:
+                    if attempt == MOVE_ATTEMPTS - 1:
+                        raise
+                    self.metrics["move_retries"] += 1
+                    await asyncio.sleep(0.05 * (attempt + 1))
+        for user_id in user_ids:
+            self._misplaced.pop(user_id, None)
+        self.metrics["users_moved"] += len(user_ids)
+
+    async def _copy_users(self, source: DatabaseSessionService, target: DatabaseSessionService, user_ids: list):
+        """Moves every row of user_ids (all apps) from source to target, in one transaction on each.
+
+        Re-running it after a failure is safe: rows already copied are
+        replaced, and users with nothing left on source are skipped.
+        """
+        if source._db_schema_version != target._db_schema_version:
+            raise ValueError("Session shards must use the same schema version")
+        schema = source._get_schema_classes()
+        sessions_table = schema.StorageSession.__table__
+        events_table = schema.StorageEvent.__table__
+        users_table = schema.StorageUserState.__table__
+        apps_table = schema.StorageAppState.__table__
+
+        async with source.db_engine.begin() as src:
+            # DELETE .. RETURNING reads and removes the rows in one statement,
+            # under the source's write lock, so no write to them can slip in
+            # between (children first)
+            events = (await src.execute(delete(events_table).where(events_table.c.user_id.in_(user_ids))
+                                        .returning(*events_table.c))).mappings().all()
+            sessions = (await src.execute(delete(sessions_table).where(sessions_table.c.user_id.in_(user_ids))
+                                          .returning(*sessions_table.c))).mappings().all()
+            user_states = (await src.execute(delete(users_table).where(users_table.c.user_id.in_(user_ids))
+                                             .returning(*users_table.c))).mappings().all()
+            if not sessions and not user_states:
+                return
+            app_names = {row["app_name"] for row in sessions} | {row["app_name"] for row in user_states}
+            app_states = (await src.execute(
+                select(apps_table).where(apps_table.c.app_name.in_(app_names)))).mappings().all()
+
+            session_ids = [row["id"] for row in sessions]
+            async with target.db_engine.begin() as dst:
+                await dst.execute(delete(events_table).where(
+                    events_table.c.user_id.in_(user_ids), events_table.c.session_id.in_(session_ids)))
+                await dst.execute(delete(sessions_table).where(
+                    sessions_table.c.user_id.in_(user_ids), sessions_table.c.id.in_(session_ids)))
+                await dst.execute(delete(users_table).where(
+                    users_table.c.user_id.in_(user_ids), users_table.c.app_name.in_(app_names)))
+                present = set((await dst.execute(
+                    select(apps_table.c.app_name).where(apps_table.c.app_name.in_(app_names)))).scalars())
+                missing_apps = [row for row in app_states if row["app_name"] not in present]
+                for table, rows in ((apps_table, missing_apps), (sessions_table, sessions),
+                                    (events_table, events), (users_table, user_states)):
+                    if rows:
+                        await dst.execute(insert(table), [dict(row) for row in rows])
+            # The source's deletes commit only after the target has the rows
+
+        cache = getattr(source, "state_cache", None)
+        if cache is not None:
+            for row in sessions:
+                cache.forget((row["app_name"], row["user_id"], row["id"]))
+        self.metrics["sessions_moved"] += len(sessions)
+        self.metrics["events_moved"] += len(events)
+
+    def stats(self) -> dict:
+        return {**self.metrics, "shards": len(self.shards), "users_to_move": len(self._misplaced)}
@@ -0,0 +1,165 @@
+import os
+import time
+from collections import OrderedDict
+
+from google.adk.sessions import _session_util
+from google.adk.sessions.state import State
+
+# ================================================================
+# Session state cache
+#
+#   Serves session state (display_state, admin dashboards) without
+#   loading a session's events:
+#       - write-through: TunedSessionService (session_storage.py)
+#         hands over every session it creates or loads and every
+#         event it commits; an event only applies its state_delta,
+#         so nothing is re-read after a turn
+#       - layered like the DB (app / user / session state), so a
+#         "user:" key written in one session shows in all of them
+#       - misses for many sessions are loaded together: one SELECT
+#         per state table, state columns only
+#       - bounded LRU; entries older than STATE_CACHE_TTL_SECONDS are
+#         re-read, which bounds how long a write made elsewhere
+#         (another worker process, the compactor's conversation
+#         summary) goes unnoticed
+#
+#   Everything runs on the session service's event loop, so there
+#   is no locking.
+# ================================================================
+
+# SESSION_STATE_CACHE=0 reads every state from the DB
+STATE_CACHE_ENABLED = os.getenv("SESSION_STATE_CACHE", "1") != "0"
+STATE_CACHE_TTL_SECONDS = float(os.getenv("STATE_CACHE_TTL_SECONDS", "30"))
+MAX_CACHED_SESSIONS = int(os.getenv("MAX_CACHED_SESSION_STATES", "10000"))
+
+# Session ids per SELECT when loading many states at once
+LOAD_CHUNK = 500
+
+
+def split_state(state: dict) -> dict:
+    """Splits a merged session state into {"app", "user", "session"} layers (temp: keys dropped)."""
+    return _session_util.extract_json_safe_state_delta(state or {})
+
+
+def merge_state(app_state: dict, user_state: dict, session_state: dict) -> dict:
+    """The state a Session shows: session keys plus prefixed app: / user: keys."""
+    merged = dict(session_state)
+    merged.update((State.APP_PREFIX + key, value) for key, value in app_state.items())
+    merged.update((State.USER_PREFIX + key, value) for key, value in user_state.items())
+    return merged
+
+
+class SessionStateCache:
+    """Write-through LRU of app, user and session state layers.
+
+    Keys are (app_name, user_id, session_id); returned states are new
+    dicts, but nested values are shared with the cache, so don't mutate
+    them.
+    """
+
+    def __init__(self, max_sessions: int = MAX_CACHED_SESSIONS,
+                 ttl_seconds: float = STATE_CACHE_TTL_SECONDS, enabled: bool = STATE_CACHE_ENABLED):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        # key -> [loaded_at, layer]
+        self._sessions = OrderedDict()
+        self._users = OrderedDict()
+        self._apps = {}
+        self.metrics = {"hits": 0, "misses": 0, "deltas_applied": 0, "evictions": 0}
+
+    def _fresh(self, entry, now: float) -> bool:
+        return entry is not None and now - entry[0] < self.ttl_seconds
+
+    def get(self, key: tuple):
+        """Merged state of the session, or None if it is not cached (or too old)."""
+        if not self.enabled:
+            return None
+        app_name, user_id, _ = key
+        now = time.monotonic()
+        session = self._sessions.get(key)
+        user = self._users.get((app_name, user_id))
+        app = self._apps.get(app_name)
+        if not (self._fresh(session, now) and self._fresh(user, now) and self._fresh(app, now)):
+            self.metrics["misses"] += 1
+            return None
+        self._sessions.move_to_end(key)
+        self._users.move_to_end((app_name, user_id))
+        self.metrics["hits"] += 1
+        return merge_state(app[1], user[1], session[1])
+
+    def put_layers(self, key: tuple, app_state: dict, user_state: dict, session_state: dict):
+        """Stores a session's state as just read from (or written to) the DB."""
+        if not self.enabled:
+            return
+        app_name, user_id, _ = key
+        now = time.monotonic()
+        self._apps[app_name] = [now, dict(app_state)]
+        self._users[(app_name, user_id)] = [now, dict(user_state)]
+        self._users.move_to_end((app_name, user_id))
+        self._sessions[key] = [now, dict(session_state)]
+        self._sessions.move_to_end(key)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.metrics["evictions"] += 1
+        while len(self._users) > self.max_sessions:
+            self._users.popitem(last=False)
+
+    def put(self, session):
+        """Stores the state of a Session the service has just created or loaded."""
+        layers = split_state(session.state)
+        self.put_layers((session.app_name, session.user_id, session.id),
+                        layers["app"], layers["user"], layers["session"])
+
+    def apply_event(self, session, event):
+        """Applies a committed event's state_delta to the cached layers.
+
+        A session that is not cached yet is seeded from the Session object,
+        which the service has just brought up to date.
+        """
+        if not self.enabled or not event.actions.state_delta:
+            return
+        key = (session.app_name, session.user_id, session.id)
+        cached = self._sessions.get(key)
+        if cached is None:
+            self.put(session)
+            return
+        deltas = split_state(event.actions.state_delta)
+        cached[1].update(deltas["session"])
+        if deltas["user"]:
+            user = self._users.get((session.app_name, session.user_id))
+            if user is not None:
+                user[1].update(deltas["user"])
+        if deltas["app"]:
+            app = self._apps.get(session.app_name)
+            if app is not None:
+                app[1].update(deltas["app"])
+        self.metrics["deltas_applied"] += 1
+
+    def update_session(self, key: tuple, values: dict):
+        """Applies session-scoped values written to the DB outside the service
+        (the compactor's summary) to a cached session, if there is one."""
+        cached = self._sessions.get(key)
+        if cached is not None:
+            cached[1].update(values)
+
+    def forget(self, key: tuple):
+        """Drops a deleted / archived session."""
+        self._sessions.pop(key, None)
+
+    def clear(self):
+        self._sessions.clear()
+        self._users.clear()
+        self._apps.clear()
+
+    def stats(self) -> dict:
+        lookups = self.metrics["hits"] + self.metrics["misses"]
+        return {
+            **self.metrics,
+            "sessions": len(self._sessions),
+            "hit_rate": round(self.metrics["hits"] / lookups, 3) if lookups else 0.0,
+        }
+
+    def reset_stats(self):
+        for name in self.metrics:
+            self.metrics[name] = 0
@@ -0,0 +1,368 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+
+from google.adk.errors.session_not_found_error import SessionNotFoundError
+from google.adk.sessions import DatabaseSessionService
+from google.adk.sessions.base_session_service import GetSessionConfig
+from google.adk.sessions.session import Session
+from sqlalchemy import event as sa_event
+from sqlalchemy import select, text
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from session_state import LOAD_CHUNK, SessionStateCache, merge_state
+
+# ================================================================
+# Tuned SQLite storage for the ADK session service
+#
+#   Drop-in DatabaseSessionService with, for sqlite URLs:
+#       - WAL journaling + synchronous=NORMAL on every pooled
+#         connection, so readers never wait for the writer and a
+#         commit is an append to the WAL instead of an fsync'ed
+#         rollback journal
+#       - indexes on events (app_name, user_id, session_id, timestamp)
+#         and sessions (app_name, user_id, update_time)
+#       - ONE writer task: append_event() queues the event and waits;
+#         the writer commits everything queued so far (from every
+#         session) in a single transaction ("group commit")
+#
+#   Reads (get_session / list_sessions) still go through the pool
+#   and run concurrently with the writer.
+#
+#   Session state is also kept write-through in a SessionStateCache
+#   (session_state.py): get_session_state() / get_session_states()
+#   read state without loading events, many sessions per query.
+#
+#   Group commit uses ADK's own storage classes, so it needs the
+#   current (v1) session schema; older databases keep per-event
+#   transactions but still get WAL and the indexes.
+#
+#   It also reuses private DatabaseSessionService helpers (checked
+#   below, google-adk is pinned to the minor version they were
+#   written against in requirements.txt). If an ADK upgrade drops
+#   one of them, appends fall back to ADK's own append_event and
+#   state reads to get_session().
+# ================================================================
+
+try:
+    from google.adk.errors._stale_session_error import StaleSessionError
+    from google.adk.sessions import _session_util
+
+    ADK_INTERNALS_AVAILABLE = (
+        all(hasattr(DatabaseSessionService, name) for name in (
+            "_rollback_on_exception_session", "_uses_naive_datetime", "_apply_temp_state",
+            "_trim_temp_delta_state", "_commit_event_to_session", "_get_schema_classes"))
+        and hasattr(_session_util, "extract_json_safe_state_delta")
+        and "_storage_update_marker" in getattr(Session, "__private_attributes__", {})
+    )
+except ImportError:
+    ADK_INTERNALS_AVAILABLE = False
+
+if not ADK_INTERNALS_AVAILABLE:
+    print("--- Session storage: ADK internals changed, using the stock append_event ---")
+
+# SESSION_STORAGE=default keeps ADK's stock behaviour
+STORAGE_MODE = os.getenv("SESSION_STORAGE", "tuned")
+
+# Max events per group commit
+MAX_BATCH_EVENTS = 256
+
+BUSY_TIMEOUT_MS = 5000
+PREPARE_ATTEMPTS = 3
+CACHE_SIZE_KB = 16 * 1024
+
+INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_events_app_user_session_ts_id "
+    "ON events (app_name, user_id, session_id, timestamp DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_sessions_app_user_update "
+    "ON sessions (app_name, user_id, update_time)",
+    # Keyset reads of session_export.py
+    "CREATE INDEX IF NOT EXISTS idx_events_timestamp_id ON events (timestamp, id)",
+)
+
+
+def _tune_sqlite_connection(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KB}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+class _PendingAppend:
+    __slots__ = ("session", "event", "future")
+
+    def __init__(self, session, event, future):
+        self.session = session
+        self.event = event
+        self.future = future
+
+
+class TunedSessionService(DatabaseSessionService):
+    """DatabaseSessionService with WAL, extra indexes and group-committed appends.
+
+    With `tuned=False` (or a non-SQLite URL) it behaves exactly like
+    DatabaseSessionService.
+    """
+
+    def __init__(self, db_url: str, tuned: bool = STORAGE_MODE == "tuned", **kwargs):
+        super().__init__(db_url=db_url, **kwargs)
+        self.tuned = tuned and self.db_engine.dialect.name == "sqlite"
+        if self.tuned:
+            sa_event.listen(self.db_engine.sync_engine, "connect", _tune_sqlite_connection)
+
+        self._indexes_created = False
+        self._index_lock = asyncio.Lock()
+        self._queue = None
+        self._writer = None
+        self.metrics = {"group_commits": 0, "events_committed": 0, "max_batch": 0}
+        self.state_cache = SessionStateCache()
+
+    # ----------------------------------------------------------------
+    # Tables / indexes
+    # ----------------------------------------------------------------
+    async def prepare_tables(self) -> None:
+        for attempt in range(PREPARE_ATTEMPTS):
+            try:
+                await super().prepare_tables()
+                break
+            except (OperationalError, IntegrityError, ValueError):
+                # Several worker processes setting up a new DB at once: the
+                # loser sees "already exists" or a schema version that is not
+                # written yet; the next check passes
+                if attempt == PREPARE_ATTEMPTS - 1:
+                    raise
+                await asyncio.sleep(0.1 * (attempt + 1))
+        if not self.tuned or self._indexes_created:
+            return
+        async with self._index_lock:
+            if not self._indexes_created:
+                async with self.db_engine.begin() as conn:
+                    for statement in INDEXES:
+                        await conn.execute(text(statement))
+                self._indexes_created = True
+
+    def _group_commit_supported(self) -> bool:
+        return self.tuned and ADK_INTERNALS_AVAILABLE \
+            and self._get_schema_classes().StorageEvent.__table__.c.get("event_data") is not None
+
+    # ----------------------------------------------------------------
+    # Group-committed appends
+    # ----------------------------------------------------------------
+    async def append_event(self, session, event):
+        await self.prepare_tables()
+        if event.partial:
+            return await super().append_event(session, event)
+        if not self._group_commit_supported():
+            event = await super().append_event(session, event)
+            self.state_cache.apply_event(session, event)
+            return event
+
+        # Same in-memory preparation as DatabaseSessionService.append_event
+        self._apply_temp_state(session, event)
+        event = self._trim_temp_delta_state(event)
+
+        if self._writer is None or self._writer.done():
+            self._queue = asyncio.Queue()
+            self._writer = asyncio.get_running_loop().create_task(self._write_loop())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_PendingAppend(session, event, future))
+        await future
+        event = self._commit_event_to_session(session, event)
+        self.state_cache.apply_event(session, event)
+        return event
+
+    async def _write_loop(self):
+        while True:
+            batch = [await self._queue.get()]
+            # Everything that queued up while the last commit ran goes together
+            while len(batch) < MAX_BATCH_EVENTS and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            try:
+                await self._write_batch(batch)
+            except Exception:
+                # One bad event must not fail the others: retry one by one
+                for pending in batch:
+                    if pending.future.done():
+                        continue
+                    try:
+                        await self._write_batch([pending])
+                    except Exception as e:
+                        pending.future.set_exception(e)
+
+    async def _write_batch(self, batch: list):
+        schema = self._get_schema_classes()
+        sessions = {(p.session.app_name, p.session.user_id, p.session.id) for p in batch}
+        app_names = {key[0] for key in sessions}
+        session_ids = {key[2] for key in sessions}
+        markers = {}
+        written = {}
+        accepted = []
+
+        async with self._rollback_on_exception_session() as sql_session:
+            # Load every row the batch touches up front: three SELECTs instead
+            # of a round trip (and an autoflush) per event
+            rows = await sql_session.scalars(
+                select(schema.StorageSession).where(schema.StorageSession.id.in_(session_ids)))
+            storage_sessions = {
+                (row.app_name, row.user_id, row.id): row for row in rows
+                if (row.app_name, row.user_id, row.id) in sessions
+            }
+            rows = await sql_session.scalars(
+                select(schema.StorageAppState).where(schema.StorageAppState.app_name.in_(app_names)))
+            app_states = {row.app_name: row for row in rows}
+            rows = await sql_session.scalars(
+                select(schema.StorageUserState).where(
+                    schema.StorageUserState.app_name.in_(app_names),
+                    schema.StorageUserState.user_id.in_({key[1] for key in sessions})))
+            user_states = {(row.app_name, row.user_id): row for row in rows}
+
+            for pending in batch:
+                session, event = pending.session, pending.event
+                key = (session.app_name, session.user_id, session.id)
+
+                storage_session = storage_sessions.get(key)
+                if storage_session is None:
+                    pending.future.set_exception(SessionNotFoundError(f"Session {session.id} not found."))
+                    continue
+
+                # Stale check (another process wrote the session), unless this
+                # very Session object was already written earlier in the batch
+                if written.get(key) is not session and session._storage_update_marker is not None \
+                        and session._storage_update_marker != storage_session.get_update_marker():
+                    pending.future.set_exception(StaleSessionError(
+                        "The session has been modified in storage since it was loaded."))
+                    continue
+
+                deltas = _session_util.extract_json_safe_state_delta(event.actions.state_delta or {})
+                if deltas["app"]:
+                    app_states[session.app_name].state.update(deltas["app"])
+                if deltas["user"]:
+                    user_states[(session.app_name, session.user_id)].state.update(deltas["user"])
+                if deltas["session"]:
+                    storage_session.state.update(deltas["session"])
+
+                update_time = datetime.fromtimestamp(event.timestamp, timezone.utc)
+                if self._uses_naive_datetime():
+                    update_time = update_time.replace(tzinfo=None)
+                storage_session.update_time = update_time
+                sql_session.add(schema.StorageEvent.from_event(session, event))
+
+                written[key] = session
+                # Read before commit (post-commit access may lazy-load)
+                markers[key] = (storage_session.get_update_timestamp(), storage_session.get_update_marker())
+                accepted.append(pending)
+
+            if not accepted:
+                return
+            await sql_session.commit()
+
+        for pending in accepted:
+            session = pending.session
+            session.last_update_time, session._storage_update_marker = markers[
+                (session.app_name, session.user_id, session.id)]
+            if not pending.future.done():
+                pending.future.set_result(None)
+
+        self.metrics["group_commits"] += 1
+        self.metrics["events_committed"] += len(accepted)
+        self.metrics["max_batch"] = max(self.metrics["max_batch"], len(accepted))
+
+    # ----------------------------------------------------------------
+    # Session state (write-through cache)
+    # ----------------------------------------------------------------
+    async def create_session(self, **kwargs):
+        session = await super().create_session(**kwargs)
+        self.state_cache.put(session)
+        return session
+
+    async def get_session(self, **kwargs):
+        session = await super().get_session(**kwargs)
+        if session is not None:
+            # Already loaded, so caching it costs no DB work
+            self.state_cache.put(session)
+        return session
+
+    async def list_sessions(self, **kwargs):
+        response = await super().list_sessions(**kwargs)
+        for session in response.sessions:
+            self.state_cache.put(session)
+        return response
+
+    async def delete_session(self, app_name: str, user_id: str, session_id: str) -> None:
+        await super().delete_session(app_name=app_name, user_id=user_id, session_id=session_id)
+        self.state_cache.forget((app_name, user_id, session_id))
+
+    async def get_session_state(self, *, app_name: str, user_id: str, session_id: str):
+        """Returns the session's state (as Session.state shows it), or None if there is no such session."""
+        states = await self.get_session_states(app_name=app_name, sessions=[(user_id, session_id)])
+        return states.get((user_id, session_id))
+
+    async def get_session_states(self, *, app_name: str, sessions: list) -> dict:
+        """Returns {(user_id, session_id): state} for many sessions at once.
+
+        Cached states are served from memory; the rest are loaded together
+        (state columns only, no events). Sessions that don't exist are
+        left out.
+        """
+        states = {}
+        missing = []
+        for user_id, session_id in sessions:
+            state = self.state_cache.get((app_name, user_id, session_id))
+            if state is None:
+                missing.append((user_id, session_id))
+            else:
+                states[(user_id, session_id)] = state
+        for start in range(0, len(missing), LOAD_CHUNK):
+            states.update(await self._load_states(app_name, missing[start:start + LOAD_CHUNK]))
+        return states
+
+    async def _load_states(self, app_name: str, sessions: list) -> dict:
+        await self.prepare_tables()
+        if not ADK_INTERNALS_AVAILABLE:
+            return await self._load_states_from_sessions(app_name, sessions)
+        schema = self._get_schema_classes()
+        wanted = set(sessions)
+        user_ids = {user_id for user_id, _ in sessions}
+        async with self._rollback_on_exception_session(read_only=True) as sql_session:
+            rows = await sql_session.execute(
+                select(schema.StorageSession.user_id, schema.StorageSession.id, schema.StorageSession.state)
+                .where(schema.StorageSession.app_name == app_name,
+                       schema.StorageSession.id.in_({session_id for _, session_id in sessions})))
+            session_states = {
+                (user_id, session_id): state for user_id, session_id, state in rows
+                if (user_id, session_id) in wanted
+            }
+            rows = await sql_session.execute(
+                select(schema.StorageUserState.user_id, schema.StorageUserState.state)
+                .where(schema.StorageUserState.app_name == app_name,
+                       schema.StorageUserState.user_id.in_(user_ids)))
+            user_states = {user_id: state or {} for user_id, state in rows}
+            app_state = await sql_session.scalar(
+                select(schema.StorageAppState.state).where(schema.StorageAppState.app_name == app_name)) or {}
+
+        states = {}
+        for (user_id, session_id), session_state in session_states.items():
+            user_state = user_states.get(user_id, {})
+            self.state_cache.put_layers((app_name, user_id, session_id), app_state, user_state, session_state or {})
+            states[(user_id, session_id)] = merge_state(app_state, user_state, session_state or {})
+        return states
+
+    async def _load_states_from_sessions(self, app_name: str, sessions: list) -> dict:
+        """_load_states through the public API: one get_session (no events) per session."""
+        states = {}
+        for user_id, session_id in sessions:
+            session = await super().get_session(app_name=app_name, user_id=user_id, session_id=session_id,
+                                                config=GetSessionConfig(num_recent_events=0))
+            if session is not None:
+                self.state_cache.put(session)
+                states[(user_id, session_id)] = dict(session.state)
+        return states
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.cancel()
+        await super().close()
@@ -1,27 +1,61 @@
+from google.adk.sessions.base_session_service import GetSessionConfig
 
-def display_state(
+
+async def get_session_state(session_service, app_name, user_id, session_id):
+    """Returns a session's state, or None if there is no such session.
+
+    Uses the service's state cache when it has one (TunedSessionService),
+    otherwise loads the session without its events.
+    """
+    if hasattr(session_service, "get_session_state"):
+        return await session_service.get_session_state(
+            app_name=app_name, user_id=user_id, session_id=session_id
+        )
+    session = await session_service.get_session(
+        app_name=app_name, user_id=user_id, session_id=session_id,
+        config=GetSessionConfig(num_recent_events=0),
+    )
+    return session.state if session is not None else None
+
+
+async def get_session_states(session_service, app_name, sessions):
+    """Returns {(user_id, session_id): state} for many sessions (e.g. an admin dashboard)."""
+    if hasattr(session_service, "get_session_states"):
+        return await session_service.get_session_states(app_name=app_name, sessions=list(sessions))
+    states = {}
+    for user_id, session_id in sessions:
+        state = await get_session_state(session_service, app_name, user_id, session_id)
+        if state is not None:
+            states[(user_id, session_id)] = state
+    return states
+
+
+async def display_state(
         session_service, app_name, user_id, session_id, label="Current State"
 ):
     """Display the current session state in a formatted way."""
     try:
-        session = session_service.get_session(
-            app_name=app_name, user_id=user_id, session_id=session_id
-        )
-        #print("----------------- Session State -----------------")
-        #print("session:",session)
-        #print("------------------------------------------------- ")
+        state = await get_session_state(session_service, app_name, user_id, session_id)
 
         # Format the output with clear sections
         print(f"\n{'-' * 10} {label} {'-' * 10}")
+        if state is None:
+            print(f"Session {session_id} not found.")
+            return
 
-        # Handle the user name
-        resort_name = session.state.get("resort_name", "Unknown")
-        print(f"Resort:", resort_name)
+        # Handle the resort name
+        resort_name = state.get("resort_name", "Unknown")
+        print("Resort:", resort_name)
 
-        # Handle reminders
-        location = session.state.get("location", [])
+        # Handle the location
+        location = state.get("location")
         if location:
-            print("Location:",{location})
-            
+            print("Location:", location)
+
+        # Handle the property (multi-property deployments)
+        property_id = state.get("property_id")
+        if property_id:
+            print("Property:", property_id)
+
     except Exception as e:
         print(f"Error displaying state: {e}")
@@ -0,0 +1,98 @@
+"""Copies the modules shared by every agent into the capital agent packages.
+
+Each agent deploys from its own directory (adk deploy / its own Docker
+build context), so the shared modules have to be present in each
+package. The hospitality agent's copies are the ones to edit; the
+capital agents' are generated from them, re-indented to the capital
+code's 2 spaces.
+
+Run from the repository root:
+    python sync_shared_modules.py          # rewrite the copies
+    python sync_shared_modules.py --check  # exit 1 if a copy is out of date
+"""
+import argparse
+import io
+import sys
+import tokenize
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+
+SOURCE_DIR = Path("hospitality_agent_staging/agents/Hospitality_Agent/hospitality_agent")
+MODULES = ("router.py", "telemetry.py", "tool_executor.py")
+PACKAGES = (
+    Path("capital_agent"),
+    Path("capital_agents_docker_deploy"),
+    Path("temp_staging/agents/capital_agents_docker_deploy"),
+)
+
+
+def reindent(source: str) -> str:
+    """Halves the indentation of 4-space Python source.
+
+    Continuation lines and docstrings move with the statement they
+    belong to (so bracket alignment is kept); other multi-line strings
+    are left exactly as they are.
+    """
+    tokens = list(tokenize.generate_tokens(io.StringIO(source).readline))
+    # line number -> spaces to remove
+    shifts = {}
+    shift = None
+    for i, token in enumerate(tokens):
+        if token.type in (tokenize.INDENT, tokenize.DEDENT, tokenize.NL, tokenize.ENDMARKER):
+            continue
+        if token.type == tokenize.NEWLINE:
+            shift = None
+            continue
+        row, col = token.start
+        if shift is None:
+            if token.type == tokenize.COMMENT:
+                # Comment on a line of its own
+                shifts[row] = col - col // 2
+                continue
+            shift = col - col // 2
+        shifts.setdefault(row, shift)
+        if token.type == tokenize.STRING and token.end[0] > row:
+            docstring = tokens[i - 1].type in (tokenize.INDENT, tokenize.DEDENT, tokenize.NEWLINE, tokenize.NL) \
+                and tokens[i + 1].type == tokenize.NEWLINE
+            for line in range(row + 1, token.end[0] + 1):
+                shifts[line] = shift if docstring else 0
+
+    lines = source.splitlines(keepends=True)
+    for number, line in enumerate(lines, 1):
+        remove = min(shifts.get(number, 0), len(line) - len(line.lstrip(" ")))
+        lines[number - 1] = line[remove:]
+    return "".join(lines)
+
+
+def expected(module: str) -> str:
+    source = SOURCE_DIR / module
+    header = f"# Generated from {source} by sync_shared_modules.py; edit that file instead.\n"
+    return header + reindent((ROOT / source).read_text(encoding="utf-8"))
+
+
+def stale_copies() -> list:
+    stale = []
+    for module in MODULES:
+        content = expected(module)
+        for package in PACKAGES:
+            copy = ROOT / package / module
+            if not copy.exists() or copy.read_text(encoding="utf-8") != content:
+                stale.append((package / module, content))
+    return stale
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--check", action="store_true", help="only report copies that differ from the source")
+    args = parser.parse_args()
+
+    stale = stale_copies()
+    if args.check:
+        for copy, _ in stale:
+            print(f"{copy} is out of date with {SOURCE_DIR / copy.name}")
+        sys.exit(1 if stale else 0)
+
+    for copy, content in stale:
+        (ROOT / copy).write_text(content, encoding="utf-8")
+        print(f"--- Updated {copy} ---")
@@ -0,0 +1,197 @@
+import json
+import re
+import threading
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+
+# ================================================================
+# Country -> capital index
+#
+#   countries.json is loaded once into an immutable index:
+#       - exact lookups on normalized names and aliases
+#         ("Côte d'Ivoire" == "cote divoire", "Holland" ...)
+#       - ISO alpha-2 / alpha-3 codes and acronyms ("IT", "DEU",
+#         "UK", "U.S.") only when written in capitals or quoted:
+#         lower-case "it", "in", "us" are English words
+#       - typos fall back to a trigram index: candidates sharing the
+#         most trigrams are checked with an edit distance, and the
+#         closest one within MAX_TYPO_DISTANCE wins
+# ================================================================
+
+COUNTRIES_PATH = Path(__file__).parent / "countries.json"
+
+# Fuzzy matching: candidates checked per query and the allowed edits
+FUZZY_CANDIDATES = 8
+MAX_TYPO_DISTANCE = 2
+# Names shorter than this must match exactly (too many near-misses)
+MIN_FUZZY_LENGTH = 4
+
+_NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+_LEADING_THE_RE = re.compile(r"^the ")
+# Apostrophes and dots join their neighbours: "d'Ivoire" -> "divoire", "U.S." -> "us"
+_DROPPED_CHARS = str.maketrans("", "", "'\u2019.")
+_QUOTES = "'\"\u2018\u2019\u201c\u201d`"
+
+
+def normalize(text: str) -> str:
+  """Lowercases, strips diacritics and punctuation ("Côte d'Ivoire" -> "cote divoire")."""
+  text = unicodedata.normalize("NFKD", text)
+  text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+  text = text.replace("&", " and ").translate(_DROPPED_CHARS)
+  text = " ".join(_NON_WORD_RE.sub(" ", text).split())
+  return _LEADING_THE_RE.sub("", text)
+
+
+def _is_code_like(text: str) -> bool:
+  """True for text written in capitals or in quotes ("IT", "'it'"), as codes are."""
+  text = text.strip()
+  if len(text) >= 2 and text[0] in _QUOTES and text[-1] in _QUOTES:
+    return True
+  return text.isupper()
+
+
+def _is_acronym(name: str) -> bool:
+  """Aliases without lower-case letters ("UK", "U.S.A.") are treated like codes."""
+  return not any(ch.islower() for ch in name)
+
+
+def _trigrams(text: str) -> set:
+  padded = f"  {text} "
+  return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+  """Optimal-string-alignment distance (transpositions count as 1), capped at limit + 1."""
+  if abs(len(a) - len(b)) > limit:
+    return limit + 1
+  previous2 = None
+  previous = list(range(len(b) + 1))
+  for i, ca in enumerate(a, 1):
+    current = [i] + [0] * len(b)
+    for j, cb in enumerate(b, 1):
+      cost = ca != cb
+      current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+      if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+        current[j] = min(current[j], previous2[j - 2] + 1)
+    if min(current) > limit:
+      return limit + 1
+    previous2, previous = previous, current
+  return previous[-1]
+
+
+@dataclass(frozen=True)
+class Country:
+  name: str
+  capital: str
+  iso2: str
+  iso3: str
+  # Name as used in a sentence ("the United States"), defaults to `name`
+  display_name: str
+
+
+@dataclass(frozen=True)
+class CountryMatch:
+  """A resolved country; `exact` is False when it came from typo matching."""
+
+  country: Country
+  exact: bool
+
+
+@dataclass(frozen=True)
+class CountryIndex:
+  """Immutable lookup structure over the bundled country dataset."""
+
+  countries: tuple
+  _exact: dict = field(default_factory=dict, repr=False)
+  # ISO codes and acronyms, see resolve()
+  _codes: dict = field(default_factory=dict, repr=False)
+  # trigram -> tuple of (key, country position) for every name / alias
+  _postings: dict = field(default_factory=dict, repr=False)
+
+  def resolve(self, query: str, codes: bool = True):
+    """Returns a CountryMatch for `query`, or None if nothing is close enough.
+
+    Codes and acronyms match only if `codes` is set and `query` is written
+    in capitals or quoted.
+    """
+    key = normalize(query or "")
+    if not key:
+      return None
+
+    position = self._exact.get(key)
+    if position is None and codes and _is_code_like(query):
+      position = self._codes.get(key)
+    if position is not None:
+      return CountryMatch(self.countries[position], exact=True)
+    if len(key) < MIN_FUZZY_LENGTH:
+      return None
+
+    # Shortlist by shared trigrams, then confirm with an edit distance
+    shared = Counter()
+    for trigram in _trigrams(key):
+      shared.update(self._postings.get(trigram, ()))
+
+    best = None
+    for (name, position), _ in shared.most_common(FUZZY_CANDIDATES):
+      distance = _edit_distance(key, name, MAX_TYPO_DISTANCE)
+      if distance <= MAX_TYPO_DISTANCE and (best is None or distance < best[0]):
+        best = (distance, position)
+    if best is None:
+      return None
+    return CountryMatch(self.countries[best[1]], exact=False)
+
+
+def build_country_index(records: list) -> CountryIndex:
+  """Builds the index from dataset rows ({"name", "capital", "iso2", "iso3", "aliases"},
+  optionally "display_name")."""
+  countries = []
+  exact = {}
+  codes = {}
+  postings = {}
+
+  for position, record in enumerate(records):
+    countries.append(Country(record["name"], record["capital"], record["iso2"], record["iso3"],
+                             record.get("display_name", record["name"])))
+    names = [record["name"], *record.get("aliases", ())]
+    for name in names:
+      key = normalize(name)
+      if _is_acronym(name):
+        codes.setdefault(key, position)
+        continue
+      exact.setdefault(key, position)
+      for trigram in _trigrams(key):
+        postings.setdefault(trigram, []).append((key, position))
+
+  # Codes only match exactly ("IN", "NO" must not typo-match anything) and
+  # never shadow a name or alias
+  for position, record in enumerate(records):
+    for code in (record["iso2"], record["iso3"]):
+      codes.setdefault(normalize(code), position)
+
+  return CountryIndex(
+    countries=tuple(countries),
+    _exact=exact,
+    _codes={key: position for key, position in codes.items() if key not in exact},
+    _postings={trigram: tuple(entries) for trigram, entries in postings.items()},
+  )
+
+
+def load_country_index(path: Path = COUNTRIES_PATH) -> CountryIndex:
+  with open(path, encoding="utf-8") as f:
+    return build_country_index(json.load(f)["countries"])
+
+
+# Loaded once per process; the dataset ships with the agent and never changes
+_country_index = None
+_country_index_lock = threading.Lock()
+
+
+def get_country_index() -> CountryIndex:
+  global _country_index
+  if _country_index is None:
+    with _country_index_lock:
+      if _country_index is None:
+        _country_index = load_country_index()
+  return _country_index